@@ -0,0 +1,70 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.config import settings
+from app.db.base import Base, engine
+import app.models  # noqa: F401  registers every table on Base.metadata
+
+config = context.config
+
+# Only the alembic CLI configures logging; the app and manage.py keep their own
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Full-text search objects created by raw DDL in 0007, outside the ORM metadata
+SEARCH_TABLE_PREFIX = "course_search"
+SEARCH_OBJECTS = {"search_vector", "ix_courses_search_vector"}
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table" and name.startswith(SEARCH_TABLE_PREFIX):
+        return False
+    return name not in SEARCH_OBJECTS
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL for DATABASE_URL without connecting."""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=settings.is_sqlite,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations on the application's engine."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.connect() as connection:
+        _run(connection)
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most things in place; batch mode copies the table
+        render_as_batch=connection.dialect.name == "sqlite",
+        compare_type=True,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,94 @@
+"""unique enrollments and commissions
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:44:02.118503
+
+One enrollment per user and course, and one commission per earner and source
+transaction, so enrolling and settlement can rely on ON CONFLICT. Duplicates
+left by the old check-then-insert code are merged first:
+
+* enrollments keep the earliest row per user and course, carrying over the
+  highest progress, the first completion and the latest access;
+* commissions keep the furthest-along row (paid, approved, pending, then
+  cancelled), oldest first, and the extra rows are deleted.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DUPLICATE_ENROLLMENTS = """
+(user_id, course_id) IN (
+    SELECT user_id, course_id FROM course_enrollments GROUP BY user_id, course_id HAVING count(*) > 1
+)
+"""
+
+MERGE_ENROLLMENTS = f"""
+UPDATE course_enrollments SET
+    progress_percentage = (
+        SELECT max(d.progress_percentage) FROM course_enrollments d
+        WHERE d.user_id = course_enrollments.user_id AND d.course_id = course_enrollments.course_id
+    ),
+    completed_at = (
+        SELECT min(d.completed_at) FROM course_enrollments d
+        WHERE d.user_id = course_enrollments.user_id AND d.course_id = course_enrollments.course_id
+    ),
+    last_accessed_at = (
+        SELECT max(d.last_accessed_at) FROM course_enrollments d
+        WHERE d.user_id = course_enrollments.user_id AND d.course_id = course_enrollments.course_id
+    )
+WHERE {DUPLICATE_ENROLLMENTS}
+"""
+
+DELETE_EXTRA_ENROLLMENTS = """
+DELETE FROM course_enrollments WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (PARTITION BY user_id, course_id ORDER BY enrolled_at, id) AS n
+        FROM course_enrollments
+    ) ranked
+    WHERE n > 1
+)
+"""
+
+DELETE_EXTRA_COMMISSIONS = """
+DELETE FROM commissions WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY source_transaction_id, user_id
+            ORDER BY CASE status WHEN 'paid' THEN 0 WHEN 'approved' THEN 1 WHEN 'pending' THEN 2 ELSE 3 END,
+                     created_at, id
+        ) AS n
+        FROM commissions
+        WHERE source_transaction_id IS NOT NULL
+    ) ranked
+    WHERE n > 1
+)
+"""
+
+
+def upgrade() -> None:
+    op.execute(MERGE_ENROLLMENTS)
+    op.execute(DELETE_EXTRA_ENROLLMENTS)
+    with op.batch_alter_table('course_enrollments', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_course_enrollments_user_course', ['user_id', 'course_id'])
+
+    op.execute(DELETE_EXTRA_COMMISSIONS)
+    with op.batch_alter_table('commissions', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_commissions_source_transaction_user', ['source_transaction_id', 'user_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('commissions', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_commissions_source_transaction_user', type_='unique')
+
+    with op.batch_alter_table('course_enrollments', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_course_enrollments_user_course', type_='unique')
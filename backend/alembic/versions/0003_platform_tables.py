@@ -0,0 +1,157 @@
+"""platform tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:45:40.903114
+
+Tables and indexes added since the baseline: counters, Razorpay webhook
+inbox, course modules and lessons, earnings rollups, payout batches and the
+referral closure table, the commissions' payout batch, and the keyset
+pagination and claim indexes on the baseline tables. The new tables start
+empty; `manage.py migrate --adopt` rebuilds the derived ones from the
+baseline data afterwards.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    op.create_table('razorpay_events',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('order_id', sa.String(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_razorpay_events_order_id', 'razorpay_events', ['order_id'], unique=False)
+    op.create_index('ix_razorpay_events_status_received_at', 'razorpay_events', ['status', 'received_at'], unique=False)
+
+    op.create_table('course_modules',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('course_id', sa.String(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_course_modules_course_position', 'course_modules', ['course_id', 'position'], unique=False)
+
+    op.create_table('lessons',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('course_id', sa.String(), nullable=False),
+    sa.Column('module_id', sa.String(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=True),
+    sa.Column('video_url', sa.String(), nullable=True),
+    sa.Column('body', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['module_id'], ['course_modules.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_lessons_course_module_position', 'lessons', ['course_id', 'module_id', 'position'], unique=False)
+
+    op.create_table('earnings_rollups',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'period_start', 'status')
+    )
+
+    op.create_table('payout_batches',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_by', sa.String(), nullable=True),
+    sa.Column('earner_count', sa.Integer(), nullable=False),
+    sa.Column('commission_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('referral_paths',
+    sa.Column('ancestor_id', sa.String(), nullable=False),
+    sa.Column('descendant_id', sa.String(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_referral_paths_ancestor_depth', 'referral_paths', ['ancestor_id', 'depth'], unique=False)
+    op.create_index('ix_referral_paths_descendant_depth', 'referral_paths', ['descendant_id', 'depth', 'ancestor_id'], unique=False)
+
+    with op.batch_alter_table('commissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payout_batch_id', sa.String(), nullable=True))
+        batch_op.create_foreign_key('fk_commissions_payout_batch_id', 'payout_batches', ['payout_batch_id'], ['id'])
+    op.create_index('ix_commissions_payout_batch_user', 'commissions', ['payout_batch_id', 'user_id'], unique=False)
+    op.create_index('ix_commissions_status_payout_batch', 'commissions', ['status', 'payout_batch_id'], unique=False)
+    op.create_index('ix_commissions_user_created_at_id', 'commissions', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_commissions_user_status_created_at_id', 'commissions', ['user_id', 'status', 'created_at', 'id'], unique=False)
+
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_package_created_at_id', 'users', ['package_type', 'created_at', 'id'], unique=False)
+    op.create_index('ix_course_enrollments_user_enrolled_at_id', 'course_enrollments', ['user_id', 'enrolled_at', 'id'], unique=False)
+    op.create_index('ix_transactions_razorpay_order_id', 'transactions', ['razorpay_order_id'], unique=False)
+    op.create_index('ix_transactions_user_created_at_id', 'transactions', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_transactions_user_status_created_at_id', 'transactions', ['user_id', 'status', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_user_status_created_at_id', table_name='transactions')
+    op.drop_index('ix_transactions_user_created_at_id', table_name='transactions')
+    op.drop_index('ix_transactions_razorpay_order_id', table_name='transactions')
+    op.drop_index('ix_course_enrollments_user_enrolled_at_id', table_name='course_enrollments')
+    op.drop_index('ix_users_package_created_at_id', table_name='users')
+    op.drop_index('ix_users_created_at_id', table_name='users')
+
+    op.drop_index('ix_commissions_user_status_created_at_id', table_name='commissions')
+    op.drop_index('ix_commissions_user_created_at_id', table_name='commissions')
+    op.drop_index('ix_commissions_status_payout_batch', table_name='commissions')
+    op.drop_index('ix_commissions_payout_batch_user', table_name='commissions')
+    with op.batch_alter_table('commissions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_commissions_payout_batch_id', type_='foreignkey')
+        batch_op.drop_column('payout_batch_id')
+
+    op.drop_index('ix_referral_paths_descendant_depth', table_name='referral_paths')
+    op.drop_index('ix_referral_paths_ancestor_depth', table_name='referral_paths')
+    op.drop_table('referral_paths')
+    op.drop_table('payout_batches')
+    op.drop_table('earnings_rollups')
+    op.drop_index('ix_lessons_course_module_position', table_name='lessons')
+    op.drop_table('lessons')
+    op.drop_index('ix_course_modules_course_position', table_name='course_modules')
+    op.drop_table('course_modules')
+    op.drop_index('ix_razorpay_events_status_received_at', table_name='razorpay_events')
+    op.drop_index('ix_razorpay_events_order_id', table_name='razorpay_events')
+    op.drop_table('razorpay_events')
+    op.drop_table('counters')
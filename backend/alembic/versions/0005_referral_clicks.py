@@ -0,0 +1,33 @@
+"""referral clicks
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:01:37.439957
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('referral_clicks_hourly',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('hour_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('clicks', sa.Integer(), nullable=False),
+    sa.Column('visitor_sketch', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'hour_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('referral_clicks_hourly')
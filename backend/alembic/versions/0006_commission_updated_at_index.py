@@ -0,0 +1,26 @@
+"""commission updated_at index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:17:12.709259
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_commissions_updated_at', 'commissions', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_commissions_updated_at', table_name='commissions')
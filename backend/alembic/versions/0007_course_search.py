@@ -0,0 +1,121 @@
+"""course search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:31:05.118342
+
+Full-text index over course titles, descriptions and tags, maintained by the
+database itself so bulk writes stay in sync too. On SQLite an FTS5 table is
+kept current by triggers on ``courses``. Its rowids come from
+``course_search_docs``, because VACUUM may renumber the implicit rowids of a
+table keyed by a string; that table also carries the columns searches filter
+on, so ranking reads neither ``courses`` nor the indexed text. On PostgreSQL
+a generated, weighted ``tsvector`` column is indexed with GIN. These objects
+are not part of the ORM metadata; alembic/env.py leaves them out of
+autogenerate.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_TAGS = "(SELECT group_concat(value, ' ') FROM json_each(coalesce(new.tags, '[]')))"
+
+SQLITE_UPGRADE = [
+    "CREATE TABLE course_search_docs ("
+    "rowid INTEGER PRIMARY KEY, course_id VARCHAR NOT NULL UNIQUE, is_active BOOLEAN, required_package VARCHAR)",
+    "CREATE VIRTUAL TABLE course_search USING fts5("
+    "title, short_description, description, tags, "
+    "tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"""
+    CREATE TRIGGER courses_search_insert AFTER INSERT ON courses BEGIN
+        INSERT INTO course_search_docs (course_id, is_active, required_package)
+        VALUES (new.id, new.is_active, new.required_package);
+        INSERT INTO course_search (rowid, title, short_description, description, tags)
+        VALUES (last_insert_rowid(), new.title, new.short_description, new.description, {SQLITE_TAGS});
+    END
+    """,
+    f"""
+    CREATE TRIGGER courses_search_update AFTER UPDATE OF title, short_description, description, tags
+    ON courses BEGIN
+        UPDATE course_search
+        SET title = new.title, short_description = new.short_description,
+            description = new.description, tags = {SQLITE_TAGS}
+        WHERE rowid = (SELECT rowid FROM course_search_docs WHERE course_id = old.id);
+    END
+    """,
+    # Kept apart so publishing a course or changing its package does not reindex its text
+    """
+    CREATE TRIGGER courses_search_filters AFTER UPDATE OF is_active, required_package ON courses BEGIN
+        UPDATE course_search_docs SET is_active = new.is_active, required_package = new.required_package
+        WHERE course_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER courses_search_delete AFTER DELETE ON courses BEGIN
+        DELETE FROM course_search WHERE rowid = (SELECT rowid FROM course_search_docs WHERE course_id = old.id);
+        DELETE FROM course_search_docs WHERE course_id = old.id;
+    END
+    """,
+    # Index the courses that already exist
+    "INSERT INTO course_search_docs (course_id, is_active, required_package) "
+    "SELECT id, is_active, required_package FROM courses",
+    """
+    INSERT INTO course_search (rowid, title, short_description, description, tags)
+    SELECT docs.rowid, c.title, c.short_description, c.description,
+           (SELECT group_concat(value, ' ') FROM json_each(coalesce(c.tags, '[]')))
+    FROM courses c JOIN course_search_docs docs ON docs.course_id = c.id
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER courses_search_delete",
+    "DROP TRIGGER courses_search_filters",
+    "DROP TRIGGER courses_search_update",
+    "DROP TRIGGER courses_search_insert",
+    "DROP TABLE course_search",
+    "DROP TABLE course_search_docs",
+]
+
+POSTGRESQL_UPGRADE = [
+    """
+    ALTER TABLE courses ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(tags::text, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_courses_search_vector ON courses USING gin (search_vector)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX ix_courses_search_vector",
+    "ALTER TABLE courses DROP COLUMN search_vector",
+]
+
+
+def _run(statements) -> None:
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _run(POSTGRESQL_UPGRADE)
+    else:
+        _run(SQLITE_UPGRADE)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _run(POSTGRESQL_DOWNGRADE)
+    else:
+        _run(SQLITE_DOWNGRADE)
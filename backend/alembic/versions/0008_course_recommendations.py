@@ -0,0 +1,55 @@
+"""course recommendations
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 16:41:22.252062
+
+Neighbor lists for "learners also took" recommendations, the per-course
+learner counts incremental refreshes compare against, and an index for
+reading a course's learners, or those who enrolled since a given time.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('course_neighbors',
+    sa.Column('course_id', sa.String(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('neighbor_id', sa.String(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('shared_learners', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['neighbor_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('course_id', 'rank')
+    )
+    op.create_index('ix_course_neighbors_neighbor_id', 'course_neighbors', ['neighbor_id'], unique=False)
+
+    op.create_table('recommendation_sources',
+    sa.Column('course_id', sa.String(), nullable=False),
+    sa.Column('learners', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('course_id')
+    )
+    op.create_index(
+        'ix_course_enrollments_course_enrolled_at', 'course_enrollments', ['course_id', 'enrolled_at', 'user_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_course_enrollments_course_enrolled_at', table_name='course_enrollments')
+
+    op.drop_table('recommendation_sources')
+    op.drop_index('ix_course_neighbors_neighbor_id', table_name='course_neighbors')
+    op.drop_table('course_neighbors')
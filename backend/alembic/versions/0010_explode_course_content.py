@@ -0,0 +1,108 @@
+"""explode course content
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 19:12:40.118503
+
+Fills the module/lesson store from every course's ``content`` blob, which
+used to be a manual command. From here on ORM writes to ``Course.content``
+re-explode the course on flush. The exploding rules are frozen here as they
+were at this revision, with the same stable lesson ids as
+``app.services.lessons``.
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ID_NAMESPACE = uuid.UUID("6f1c1f9e-6c3b-4f57-9a55-6d0f2d8b7a10")
+LESSON_COLUMNS = {"title", "duration", "video_url"}
+BATCH_SIZE = 500
+
+courses = sa.table("courses", sa.column("id", sa.String), sa.column("content", sa.JSON))
+course_modules = sa.table(
+    "course_modules",
+    sa.column("id", sa.String),
+    sa.column("course_id", sa.String),
+    sa.column("position", sa.Integer),
+    sa.column("title", sa.String),
+)
+lessons = sa.table(
+    "lessons",
+    sa.column("id", sa.String),
+    sa.column("course_id", sa.String),
+    sa.column("module_id", sa.String),
+    sa.column("position", sa.Integer),
+    sa.column("title", sa.String),
+    sa.column("duration_minutes", sa.Integer),
+    sa.column("video_url", sa.String),
+    sa.column("body", sa.JSON),
+)
+
+
+def entries(value):
+    return value if isinstance(value, list) else []
+
+
+def typed(value, kind):
+    return value if isinstance(value, kind) and not isinstance(value, bool) else None
+
+
+def explode(course_id, content, modules, lesson_rows):
+    # Malformed modules and lessons are skipped, keeping the positions of the rest
+    if not isinstance(content, dict):
+        return
+    for module_position, module in enumerate(entries(content.get("modules"))):
+        if not isinstance(module, dict):
+            continue
+        module_id = str(uuid.uuid5(ID_NAMESPACE, f"{course_id}:{module_position}"))
+        modules.append({
+            "id": module_id,
+            "course_id": course_id,
+            "position": module_position,
+            "title": typed(module.get("title"), str) or f"Module {module_position + 1}",
+        })
+        for lesson_position, lesson in enumerate(entries(module.get("lessons"))):
+            if not isinstance(lesson, dict):
+                continue
+            body = {key: value for key, value in lesson.items() if key not in LESSON_COLUMNS}
+            lesson_rows.append({
+                "id": str(uuid.uuid5(ID_NAMESPACE, f"{course_id}:{module_position}:{lesson_position}")),
+                "course_id": course_id,
+                "module_id": module_id,
+                "position": lesson_position,
+                "title": typed(lesson.get("title"), str) or f"Lesson {lesson_position + 1}",
+                "duration_minutes": typed(lesson.get("duration"), int),
+                "video_url": typed(lesson.get("video_url"), str),
+                "body": body or None,
+            })
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    bind.execute(sa.delete(lessons))
+    bind.execute(sa.delete(course_modules))
+    course_ids = list(bind.scalars(sa.select(courses.c.id).order_by(courses.c.id)))
+    for start in range(0, len(course_ids), BATCH_SIZE):
+        ids = course_ids[start:start + BATCH_SIZE]
+        modules, lesson_rows = [], []
+        for course_id, content in bind.execute(sa.select(courses.c.id, courses.c.content).where(courses.c.id.in_(ids))):
+            explode(course_id, content, modules, lesson_rows)
+        if modules:
+            bind.execute(sa.insert(course_modules), modules)
+        if lesson_rows:
+            bind.execute(sa.insert(lessons), lesson_rows)
+
+
+def downgrade() -> None:
+    # The exploded rows are derived data and stay valid at 0009
+    pass
@@ -0,0 +1,51 @@
+"""unique razorpay order id
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 20:05:31.118503
+
+Each Razorpay order belongs to one transaction, and webhook events are
+matched to it by order id, so the lookup index becomes unique. Transactions
+without an order (commissions, refunds) keep NULL, which a unique index
+allows any number of times. Duplicates are money records and are not merged
+here: the upgrade stops and lists them for a person to resolve.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DUPLICATE_ORDERS = """
+SELECT razorpay_order_id, count(*) FROM transactions
+WHERE razorpay_order_id IS NOT NULL
+GROUP BY razorpay_order_id HAVING count(*) > 1
+ORDER BY razorpay_order_id
+LIMIT 20
+"""
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(DUPLICATE_ORDERS)).all()
+    if duplicates:
+        listed = ", ".join(f"{order_id} ({count} transactions)" for order_id, count in duplicates)
+        raise RuntimeError(
+            f"Razorpay orders shared by several transactions: {listed}. "
+            "Keep one transaction per order, then run the migration again."
+        )
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_razorpay_order_id')
+        batch_op.create_index('ix_transactions_razorpay_order_id', ['razorpay_order_id'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_razorpay_order_id')
+        batch_op.create_index('ix_transactions_razorpay_order_id', ['razorpay_order_id'], unique=False)
@@ -1,9 +1,12 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import auth, users, courses, payments
+from app.api.api_v1.endpoints import admin, auth, users, courses, payments, webhooks, leaderboard
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(courses.router, prefix="/courses", tags=["courses"])
-api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
\ No newline at end of file
+api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
+api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
\ No newline at end of file
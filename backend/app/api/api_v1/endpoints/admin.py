@@ -0,0 +1,36 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import current_superuser, leaderboard_ready
+from app.db.base import get_async_db
+from app.models.user import User
+from app.schemas.admin import PlatformStatsResponse
+from app.schemas.leaderboard import AdminLeaderboardEntry, LeaderboardWindow
+from app.services.leaderboard import ranked_users
+from app.services.platform_stats import get_platform_stats
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=PlatformStatsResponse)
+async def read_platform_stats(
+    admin: User = Depends(current_superuser),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Served from counters kept in step with every write, never from table scans
+    return await get_platform_stats(db)
+
+
+@router.get("/leaderboard", response_model=List[AdminLeaderboardEntry], dependencies=[Depends(leaderboard_ready)])
+async def read_admin_leaderboard(
+    window: LeaderboardWindow = LeaderboardWindow.all,
+    limit: int = Query(50, ge=1, le=500),
+    admin: User = Depends(current_superuser),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return [
+        AdminLeaderboardEntry(
+            rank=rank, user_id=user.id, email=user.email, full_name=user.full_name, earnings=earnings,
+        )
+        for rank, user, earnings in await ranked_users(db, window.value, limit)
+    ]
@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.base import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token, verify_token
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_async_db
+from app.api.deps import current_user, login_rate_limit, signup_rate_limit
+from app.core.security import create_access_token
+from app.core.hashing import password_hasher
 from app.models.user import User
+from app.services.referrals import link_user
+from app.services.earnings import record_referral
+from app.services.platform_stats import record_signup
+from app.services.emails import email_dispatcher, queue_emails_async, welcome_email
 from app.schemas.user import UserCreate, UserResponse, Token
 from datetime import timedelta
 from app.core.config import settings
 import uuid
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-@router.post("/signup", response_model=UserResponse)
-async def signup(user_create: UserCreate, db: Session = Depends(get_db)):
+@router.post("/signup", response_model=UserResponse, dependencies=[Depends(signup_rate_limit)])
+async def signup(user_create: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_create.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,13 +30,13 @@ async def signup(user_create: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await password_hasher.hash(user_create.password)
     referral_code = str(uuid.uuid4())[:8].upper()
     
     # Handle referral
     referred_by_id = None
     if user_create.referred_by:
-        referrer = db.query(User).filter(User.referral_code == user_create.referred_by).first()
+        referrer = await db.scalar(select(User).where(User.referral_code == user_create.referred_by))
         if referrer:
             referred_by_id = referrer.id
     
@@ -45,17 +51,32 @@ async def signup(user_create: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
+    await link_user(db, user.id, referred_by_id)
+    if referred_by_id:
+        await record_referral(db, referred_by_id)
+    await record_signup(db)
+    await queue_emails_async(db, [welcome_email(user)])
+    await db.commit()
+    email_dispatcher.notify()
+    await db.refresh(user)
     
     return user
 
 
-@router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid = False
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        if valid and new_hash:
+            # Stored hash is below the current cost or scheme; upgrade it in place
+            user.hashed_password = new_hash
+            await db.commit()
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -77,22 +98,5 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    # Verify JWT token
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user
\ No newline at end of file
+async def get_current_user(user: User = Depends(current_user)):
+    return user
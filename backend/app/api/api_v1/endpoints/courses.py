@@ -1,8 +1,162 @@
-from fastapi import APIRouter
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import current_active_user
+from app.db.base import get_async_db
+from app.models.user import User
+from app.schemas.course import CourseSearchResponse, CourseSearchResult, LessonResponse, ProgressUpdate, RelatedCourse
+from app.services.catalog import CachedBody, PACKAGE_TIERS, catalog, etag_matches
+from app.services.lessons import get_lesson
+from app.services.progress import progress_buffer
+from app.services.recommendations import related_courses
+from app.services.search import search_courses
 
 router = APIRouter()
 
+# Clients may reuse a cached copy but must revalidate it with If-None-Match
+CACHE_CONTROL = "public, no-cache"
+
+
+def _cached_response(cached: CachedBody, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
 
 @router.get("/")
-async def get_courses():
-    return {"message": "Courses endpoint - to be implemented"}
\ No newline at end of file
+async def get_courses(
+    package: Optional[str] = Query(None, description="Only courses unlocked by this package"),
+    tag: Optional[str] = None,
+    featured: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if package is not None and package not in PACKAGE_TIERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown package, expected one of: {', '.join(PACKAGE_TIERS)}"
+        )
+    snapshot = await catalog.get(db)
+    return _cached_response(snapshot.listing(package, tag, featured), if_none_match)
+
+
+@router.get("/search", response_model=CourseSearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match; each also matches as a prefix"),
+    package: Optional[str] = Query(None, description="Only courses unlocked by this package"),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if package is not None and package not in PACKAGE_TIERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown package, expected one of: {', '.join(PACKAGE_TIERS)}"
+        )
+    hits = await search_courses(db, q, package=package, limit=limit, offset=offset)
+    # Summaries come from the catalog snapshot; a course it does not hold yet is skipped
+    snapshot = await catalog.get(db)
+    results = [
+        CourseSearchResult(
+            course=snapshot.summaries[hit.course_id],
+            score=hit.score,
+            title_highlight=hit.title,
+            snippet=hit.snippet,
+        )
+        for hit in hits
+        if hit.course_id in snapshot.summaries
+    ]
+    return CourseSearchResponse(query=q, results=results)
+
+
+@router.get("/{course_id}")
+async def get_course(
+    course_id: str,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    snapshot = await catalog.get(db)
+    cached = snapshot.detail(course_id)
+    if cached is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    return _cached_response(cached, if_none_match)
+
+
+@router.get("/{course_id}/related", response_model=List[RelatedCourse])
+async def get_related_courses(
+    course_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # "Learners also took": precomputed by the recommendation job, inactive courses skipped
+    snapshot = await catalog.get(db)
+    resolved_id = snapshot.resolve(course_id)
+    if resolved_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    related = [
+        RelatedCourse(course=snapshot.summaries[neighbor_id], score=score, shared_learners=shared)
+        for neighbor_id, score, shared in await related_courses(db, resolved_id, limit)
+        if neighbor_id in snapshot.summaries
+    ]
+    return related[:limit]
+
+
+@router.get("/{course_id}/lessons/{lesson_id}", response_model=LessonResponse)
+async def get_course_lesson(
+    course_id: str,
+    lesson_id: str,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    snapshot = await catalog.get(db)
+    resolved_id = snapshot.resolve(course_id)
+    if resolved_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    if not snapshot.unlocked(resolved_id, user.package_type):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your package does not include this course"
+        )
+    
+    lesson = await get_lesson(db, resolved_id, lesson_id)
+    if lesson is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+    return lesson
+
+
+@router.post("/{course_id}/progress", status_code=status.HTTP_202_ACCEPTED)
+async def record_progress(
+    course_id: str,
+    update: ProgressUpdate,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Player heartbeat: buffered and written behind, enrolling on first contact
+    snapshot = await catalog.get(db)
+    resolved_id = snapshot.resolve(course_id)
+    if resolved_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    if not snapshot.unlocked(resolved_id, user.package_type):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your package does not include this course"
+        )
+    
+    progress_buffer.record(user.id, resolved_id, update.progress_percentage)
+    return {"status": "accepted"}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import current_active_user, leaderboard_ready
+from app.db.base import get_async_db
+from app.models.user import User
+from app.schemas.leaderboard import LeaderboardEntry, LeaderboardPosition, LeaderboardResponse, LeaderboardWindow
+from app.services.leaderboard import leaderboard, ranked_users
+
+router = APIRouter()
+
+
+def display_name(full_name: str) -> str:
+    parts = full_name.split()
+    if len(parts) < 2:
+        return full_name
+    return f"{parts[0]} {parts[-1][0]}."
+
+
+@router.get("/", response_model=LeaderboardResponse, dependencies=[Depends(leaderboard_ready)])
+async def read_leaderboard(
+    window: LeaderboardWindow = LeaderboardWindow.all,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Public: top earners by approved commissions, without contact details
+    entries = [
+        LeaderboardEntry(rank=rank, name=display_name(user.full_name), earnings=earnings)
+        for rank, user, earnings in await ranked_users(db, window.value, limit)
+    ]
+    return LeaderboardResponse(window=window, period_start=leaderboard.period_start(window.value), entries=entries)
+
+
+@router.get("/me", response_model=LeaderboardPosition, dependencies=[Depends(leaderboard_ready)])
+async def read_my_position(
+    window: LeaderboardWindow = LeaderboardWindow.all,
+    user: User = Depends(current_active_user),
+):
+    rank, score, ranked = leaderboard.position(window.value, user.id)
+    return LeaderboardPosition(window=window, rank=rank, earnings=score / 100, ranked_users=ranked)
@@ -1,8 +1,105 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status as http_status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import current_active_user, current_superuser
+from app.core.responses import page_response, row_columns
+from app.db.base import SessionLocal, get_async_db
+from app.db.pagination import paginate
+from app.models.payment import Commission, PayoutBatch, Transaction
+from app.models.user import User
+from app.schemas.pagination import Page
+from app.schemas.payment import CommissionResponse, TransactionResponse
+from app.services.payouts import PAYOUT_FORMATS, create_payout_batch, stream_payout
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(current_active_user)])
 
 
-@router.get("/")
-async def get_payments():
-    return {"message": "Payments endpoint - to be implemented"}
\ No newline at end of file
+@router.get("/transactions", response_model=Page[TransactionResponse])
+async def get_transactions(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    status: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(*row_columns(TransactionResponse, Transaction)).where(Transaction.user_id == user.id)
+    if status is not None:
+        stmt = stmt.where(Transaction.status == status)
+    if transaction_type is not None:
+        stmt = stmt.where(Transaction.transaction_type == transaction_type)
+    rows, next_cursor = await paginate(db, stmt, Transaction.created_at, Transaction.id, cursor, limit)
+    return page_response(TransactionResponse, rows, next_cursor)
+
+
+@router.get("/commissions", response_model=Page[CommissionResponse])
+async def get_commissions(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    status: Optional[str] = None,
+    commission_type: Optional[str] = None,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(*row_columns(CommissionResponse, Commission)).where(Commission.user_id == user.id)
+    if status is not None:
+        stmt = stmt.where(Commission.status == status)
+    if commission_type is not None:
+        stmt = stmt.where(Commission.commission_type == commission_type)
+    rows, next_cursor = await paginate(db, stmt, Commission.created_at, Commission.id, cursor, limit)
+    return page_response(CommissionResponse, rows, next_cursor)
+
+
+def _payout_response(batch_id: str, format: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_payout(SessionLocal, batch_id, format),
+        media_type=PAYOUT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="payout-{batch_id}.{format}"',
+            "X-Payout-Batch-Id": batch_id,
+        },
+    )
+
+
+def _claim_payout_batch(created_by: str, created_before: Optional[datetime]) -> str:
+    db = SessionLocal()
+    try:
+        return create_payout_batch(db, created_by=created_by, created_before=created_before).id
+    finally:
+        db.close()
+
+
+@router.post("/payouts")
+async def create_payout(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    created_before: Optional[datetime] = None,
+    admin: User = Depends(current_superuser),
+):
+    """Claim all approved commissions into a payout batch and stream its bank file."""
+    batch_id = await run_in_threadpool(_claim_payout_batch, admin.id, created_before)
+    return _payout_response(batch_id, format)
+
+
+@router.get("/payouts/{batch_id}/export")
+async def export_payout(
+    batch_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    admin: User = Depends(current_superuser),
+    db: AsyncSession = Depends(get_async_db),
+):
+    batch = await db.get(PayoutBatch, batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Payout batch not found"
+        )
+    if batch.status == "released":
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail="Payout batch was interrupted and its commissions released; create a new payout"
+        )
+    return _payout_response(batch_id, format)
\ No newline at end of file
@@ -1,8 +1,110 @@
-from fastapi import APIRouter
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import current_active_user, current_superuser
+from app.core.responses import page_response, row_columns
+from app.db.base import get_async_db
+from app.db.pagination import paginate
+from app.models.course import CourseEnrollment
+from app.models.user import User
+from app.schemas.user import UserResponse, ReferralStats, ReferralLevel, ReferralClickStats
+from app.schemas.course import CourseRecommendation, EnrollmentResponse
+from app.schemas.earnings import EarningsSummaryResponse
+from app.schemas.pagination import Page
+from app.services.catalog import catalog
+from app.services.clicks import get_click_stats
+from app.services.referrals import get_downline_counts
+from app.services.earnings import get_earnings_summary
+from app.services.recommendations import recommended_courses
 
 router = APIRouter()
 
 
-@router.get("/")
-async def get_users():
-    return {"message": "Users endpoint - to be implemented"}
\ No newline at end of file
+@router.get("/", response_model=Page[UserResponse])
+async def get_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    is_active: Optional[bool] = None,
+    package_type: Optional[str] = None,
+    admin: User = Depends(current_superuser),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(*row_columns(UserResponse, User))
+    if is_active is not None:
+        stmt = stmt.where(User.is_active.is_(is_active))
+    if package_type is not None:
+        stmt = stmt.where(User.package_type == package_type)
+    rows, next_cursor = await paginate(db, stmt, User.created_at, User.id, cursor, limit)
+    return page_response(UserResponse, rows, next_cursor)
+
+
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(user: User = Depends(current_active_user)):
+    return user
+
+
+@router.get("/me/referrals", response_model=ReferralStats)
+async def read_referral_stats(
+    levels: int = Query(2, ge=1, le=10),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    counts = await get_downline_counts(db, user.id, levels)
+    return ReferralStats(
+        levels=[ReferralLevel(level=level, count=count) for level, count in counts.items()],
+        total=sum(counts.values()),
+    )
+
+
+@router.get("/me/referral-clicks", response_model=ReferralClickStats)
+async def read_referral_clicks(
+    days: int = Query(30, ge=1, le=90),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Clicks on the user's referral link and how many became signups, per UTC day."""
+    return await get_click_stats(db, user.id, days)
+
+
+@router.get("/me/earnings", response_model=EarningsSummaryResponse)
+async def read_earnings(
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await get_earnings_summary(db, user.id)
+
+
+@router.get("/me/enrollments", response_model=Page[EnrollmentResponse])
+async def read_enrollments(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    status: Optional[str] = Query(None, pattern="^(completed|in_progress)$"),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(*row_columns(EnrollmentResponse, CourseEnrollment)).where(CourseEnrollment.user_id == user.id)
+    if status == "completed":
+        stmt = stmt.where(CourseEnrollment.completed_at.is_not(None))
+    elif status == "in_progress":
+        stmt = stmt.where(CourseEnrollment.completed_at.is_(None))
+    rows, next_cursor = await paginate(
+        db, stmt, CourseEnrollment.enrolled_at, CourseEnrollment.id, cursor, limit
+    )
+    return page_response(EnrollmentResponse, rows, next_cursor)
+
+
+@router.get("/me/recommended", response_model=List[CourseRecommendation])
+async def read_recommended_courses(
+    limit: int = Query(10, ge=1, le=50),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Courses related to the ones the user took, from the precomputed neighbor lists; empty until they enroll."""
+    snapshot = await catalog.get(db)
+    recommended = [
+        CourseRecommendation(course=snapshot.summaries[course_id], score=score)
+        for course_id, score in await recommended_courses(db, user.id, limit)
+        if course_id in snapshot.summaries
+    ]
+    return recommended[:limit]
@@ -0,0 +1,48 @@
+import hashlib
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.base import get_async_db
+from app.services.razorpay import verify_signature
+from app.services.webhooks import parse_event, store_event, webhook_workers
+
+router = APIRouter()
+
+
+@router.post("/razorpay")
+async def razorpay_webhook(
+    request: Request,
+    x_razorpay_signature: Optional[str] = Header(None),
+    x_razorpay_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Verify and store a Razorpay event; it is applied in the background."""
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Razorpay webhooks are not configured"
+        )
+
+    body = await request.body()
+    if not x_razorpay_signature or not verify_signature(body, x_razorpay_signature, secret):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
+
+    try:
+        event_type, order_id = parse_event(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed webhook payload"
+        )
+
+    # Razorpay always sends an event id; fall back to the body for replays without one
+    event_id = x_razorpay_event_id or hashlib.sha256(body).hexdigest()
+    stored = await store_event(db, event_id, event_type, order_id, body)
+    await db.commit()
+    webhook_workers.notify(stored)
+    return {"status": "ok"}
@@ -0,0 +1,110 @@
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.principals import principal_cache, principal_version, resolve_token_subject
+from app.core.ratelimit import Rate, rate_limiter
+from app.db.base import get_async_db
+from app.models.user import User
+from app.services.leaderboard import leaderboard
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+LOGIN_RATE_PER_IP = Rate.parse(settings.LOGIN_RATE_PER_IP)
+LOGIN_RATE_PER_EMAIL = Rate.parse(settings.LOGIN_RATE_PER_EMAIL)
+LOGIN_RATE_GLOBAL = Rate.parse(settings.LOGIN_RATE_GLOBAL)
+SIGNUP_RATE_PER_IP = Rate.parse(settings.SIGNUP_RATE_PER_IP)
+SIGNUP_RATE_GLOBAL = Rate.parse(settings.SIGNUP_RATE_GLOBAL)
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def login_rate_limit(request: Request, form_data: OAuth2PasswordRequestForm = Depends()) -> None:
+    """
+    Throttle login attempts per client IP, per account and in total.
+
+    Runs before the endpoint, so a rejected attempt never reaches bcrypt. The
+    per-account bucket slows password guessing spread over many addresses.
+    """
+    # Hashed so the shared limiter file never holds email addresses
+    account = hashlib.sha256(form_data.username.strip().lower().encode()).hexdigest()[:32]
+    await rate_limiter.check("login", [
+        (f"login:ip:{_client_ip(request)}", LOGIN_RATE_PER_IP),
+        (f"login:email:{account}", LOGIN_RATE_PER_EMAIL),
+        ("login:global", LOGIN_RATE_GLOBAL),
+    ])
+
+
+async def signup_rate_limit(request: Request) -> None:
+    await rate_limiter.check("signup", [
+        (f"signup:ip:{_client_ip(request)}", SIGNUP_RATE_PER_IP),
+        ("signup:global", SIGNUP_RATE_GLOBAL),
+    ])
+
+
+async def current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    Resolve the bearer token to its ``User``.
+
+    The returned instance may come from the per-worker principal cache and is
+    detached from ``db``: read its columns freely, but re-query or
+    ``db.merge()`` it before changing it.
+    """
+    email = resolve_token_subject(token)
+    if not email:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    await principal_version.check(db)
+    user = principal_cache.get(email)
+    if user is None:
+        user = await db.scalar(select(User).where(User.email == email))
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        db.expunge(user)
+        principal_cache.set(email, user)
+
+    return user
+
+
+async def current_active_user(user: User = Depends(current_user)) -> User:
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Account is disabled"
+        )
+    return user
+
+
+async def current_superuser(user: User = Depends(current_active_user)) -> User:
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user
+
+
+async def leaderboard_ready() -> None:
+    # Boards are built from the ledger in the background after startup
+    if not leaderboard.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Leaderboard is loading, please retry",
+            headers={"Retry-After": "1"},
+        )
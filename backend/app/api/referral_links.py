@@ -0,0 +1,31 @@
+from urllib.parse import quote
+from fastapi import APIRouter, Request, status
+from fastapi.responses import RedirectResponse
+from app.core.config import settings
+from app.services.clicks import click_buffer, resolve_referrer, visitor_hash
+
+router = APIRouter()
+
+
+@router.get("/r/{referral_code}", status_code=status.HTTP_302_FOUND, response_class=RedirectResponse)
+async def follow_referral_link(referral_code: str, request: Request):
+    """
+    Count a click on a referral link and send the visitor on to signup with
+    the code filled in. Unknown or deactivated codes redirect without one.
+
+    Behind a proxy, run uvicorn with ``--proxy-headers`` so the visitor's
+    address, not the proxy's, identifies unique visitors.
+    """
+    signup_url = f"{settings.FRONTEND_URL.rstrip('/')}/auth/signup"
+    referrer_id = await resolve_referrer(referral_code)
+    if referrer_id is None:
+        return RedirectResponse(signup_url, status_code=status.HTTP_302_FOUND)
+
+    client_ip = request.client.host if request.client else None
+    click_buffer.record(referrer_id, visitor_hash(client_ip, request.headers.get("user-agent")))
+    return RedirectResponse(
+        f"{signup_url}?ref={quote(referral_code, safe='')}",
+        status_code=status.HTTP_302_FOUND,
+        # Every visit must reach us to be counted
+        headers={"Cache-Control": "no-store"},
+    )
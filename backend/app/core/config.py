@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from typing import List, Optional
 import os
+import tempfile
 
 
 class Settings(BaseSettings):
@@ -10,12 +11,48 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-key-change-this-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Render JSON responses with orjson when installed (falls back to the stdlib encoder)
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+    
+    # Request instrumentation
+    SLOW_REQUEST_MS: int = int(os.getenv("SLOW_REQUEST_MS", "500"))
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))  # repeats of one query to flag
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    HASHING_EXECUTOR: str = os.getenv("HASHING_EXECUTOR", "thread")  # thread, process
+    HASHING_WORKERS: int = int(os.getenv("HASHING_WORKERS", str(min(4, os.cpu_count() or 1))))
+    HASHING_QUEUE_SIZE: int = int(os.getenv("HASHING_QUEUE_SIZE", "64"))
+    
+    # Rate limits on auth endpoints, as "<count>/<second|minute|hour|day>"; state is
+    # kept in a SQLite file shared by the workers on a host (or "memory": per worker)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "sqlite")
+    RATE_LIMIT_SQLITE_PATH: str = os.getenv(
+        "RATE_LIMIT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "raju-ratelimit.sqlite")
+    )
+    LOGIN_RATE_PER_IP: str = os.getenv("LOGIN_RATE_PER_IP", "20/minute")
+    LOGIN_RATE_PER_EMAIL: str = os.getenv("LOGIN_RATE_PER_EMAIL", "5/minute")
+    LOGIN_RATE_GLOBAL: str = os.getenv("LOGIN_RATE_GLOBAL", "50/second")
+    SIGNUP_RATE_PER_IP: str = os.getenv("SIGNUP_RATE_PER_IP", "5/minute")
+    SIGNUP_RATE_GLOBAL: str = os.getenv("SIGNUP_RATE_GLOBAL", "20/second")
+    
+    # Authenticated principal cache (per worker)
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    # How often a worker checks whether another one changed a user's access
+    PRINCIPAL_VERSION_POLL_SECONDS: float = float(os.getenv("PRINCIPAL_VERSION_POLL_SECONDS", "5"))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "50000"))
+    
     # CORS
     ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000")
     
@@ -23,9 +60,52 @@ class Settings(BaseSettings):
     def allowed_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
     
+    # Commissions: percentage paid to each upline level, nearest first
+    COMMISSION_LEVEL_RATES: str = os.getenv("COMMISSION_LEVEL_RATES", "10,2")
+    COMMISSION_SETTLEMENT_BATCH_SIZE: int = int(os.getenv("COMMISSION_SETTLEMENT_BATCH_SIZE", "5000"))
+    
+    @property
+    def commission_level_rates(self) -> List[float]:
+        return [float(rate) for rate in self.COMMISSION_LEVEL_RATES.split(",") if rate.strip()]
+    
+    # Course catalog: how often a worker checks whether its snapshot is stale
+    CATALOG_VERSION_POLL_SECONDS: float = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "5"))
+    
+    # Course progress write-behind buffer (per worker)
+    PROGRESS_FLUSH_INTERVAL_MS: int = int(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", "2000"))
+    PROGRESS_FLUSH_MAX_ENTRIES: int = int(os.getenv("PROGRESS_FLUSH_MAX_ENTRIES", "1000"))
+    
+    # Admin platform counters: how often each worker recomputes them from the tables (0 disables)
+    PLATFORM_STATS_RECONCILE_SECONDS: float = float(os.getenv("PLATFORM_STATS_RECONCILE_SECONDS", "3600"))
+    
+    # Earnings leaderboards (per worker): how often approvals are picked up
+    LEADERBOARD_POLL_SECONDS: float = float(os.getenv("LEADERBOARD_POLL_SECONDS", "2"))
+    
+    # Course recommendations: neighbors kept per course by `manage.py build-recommendations`
+    RECOMMENDATION_NEIGHBORS: int = int(os.getenv("RECOMMENDATION_NEIGHBORS", "20"))
+    
+    # Referral links: /r/{code} redirects to the frontend signup page
+    FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    REFERRAL_CODE_CACHE_SIZE: int = int(os.getenv("REFERRAL_CODE_CACHE_SIZE", "10000"))
+    REFERRAL_CODE_CACHE_TTL_SECONDS: int = int(os.getenv("REFERRAL_CODE_CACHE_TTL_SECONDS", "300"))
+    # Unknown codes are remembered briefly, so a mistyped or scraped link costs one query per TTL
+    REFERRAL_CODE_UNKNOWN_TTL_SECONDS: int = int(os.getenv("REFERRAL_CODE_UNKNOWN_TTL_SECONDS", "30"))
+    
+    # Referral click ingest buffer (per worker); entries are (referrer, hour) pairs
+    CLICK_FLUSH_INTERVAL_MS: int = int(os.getenv("CLICK_FLUSH_INTERVAL_MS", "5000"))
+    CLICK_FLUSH_MAX_ENTRIES: int = int(os.getenv("CLICK_FLUSH_MAX_ENTRIES", "1000"))
+    
     # Razorpay
     RAZORPAY_KEY_ID: Optional[str] = os.getenv("RAZORPAY_KEY_ID")
     RAZORPAY_KEY_SECRET: Optional[str] = os.getenv("RAZORPAY_KEY_SECRET")
+    RAZORPAY_WEBHOOK_SECRET: Optional[str] = os.getenv("RAZORPAY_WEBHOOK_SECRET", os.getenv("RAZORPAY_KEY_SECRET"))
+    
+    # Razorpay webhook workers (per API worker process)
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_CLAIM_BATCH_SIZE: int = int(os.getenv("WEBHOOK_CLAIM_BATCH_SIZE", "100"))
+    WEBHOOK_POLL_SECONDS: float = float(os.getenv("WEBHOOK_POLL_SECONDS", "2"))
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+    WEBHOOK_CLAIM_TIMEOUT_SECONDS: int = int(os.getenv("WEBHOOK_CLAIM_TIMEOUT_SECONDS", "300"))
     
     # Email Configuration
     EMAIL_FROM: Optional[str] = os.getenv("EMAIL_FROM")
@@ -33,6 +113,21 @@ class Settings(BaseSettings):
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USER: Optional[str] = os.getenv("SMTP_USER")
     SMTP_PASSWORD: Optional[str] = os.getenv("SMTP_PASSWORD")
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+    
+    # Email outbox dispatcher (per API worker process); emails are always queued and
+    # sent only by processes with SMTP_HOST and EMAIL_FROM set
+    EMAIL_CONNECTIONS: int = int(os.getenv("EMAIL_CONNECTIONS", "2"))
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+    EMAIL_POLL_SECONDS: float = float(os.getenv("EMAIL_POLL_SECONDS", "5"))
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+    EMAIL_RETRY_BASE_SECONDS: float = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+    EMAIL_CLAIM_TIMEOUT_SECONDS: int = int(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", "300"))
+    
+    @property
+    def email_enabled(self) -> bool:
+        return bool(self.SMTP_HOST and self.EMAIL_FROM)
     
     # External APIs
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
@@ -55,6 +150,16 @@ class Settings(BaseSettings):
     def is_postgresql(self) -> bool:
         return self.DATABASE_URL.startswith("postgresql")
     
+    @property
+    def async_database_url(self) -> str:
+        scheme, _, rest = self.DATABASE_URL.partition("://")
+        driver = scheme.split("+", 1)[0]
+        if self.is_sqlite:
+            return f"{driver}+aiosqlite://{rest}"
+        if self.is_postgresql:
+            return f"{driver}+asyncpg://{rest}"
+        return self.DATABASE_URL
+    
     class Config:
         env_file = ".env"
 
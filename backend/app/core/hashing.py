@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password
+
+
+class HashingServiceBusy(Exception):
+    """Raised when the hashing queue is full and the request should be shed."""
+
+
+# Worker functions live at module level so a ProcessPoolExecutor can pickle them.
+def _timed_hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    hashed = get_password_hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _timed_verify(password: str, hashed_password: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    result = verify_and_update_password(password, hashed_password)
+    return result, time.perf_counter() - started
+
+
+class HashingMetrics:
+    """Counters for the hashing service; all values are per worker process."""
+
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.hash_seconds_total = 0.0
+        self.wait_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.latency_buckets = [0] * (len(self.LATENCY_BUCKETS) + 1)
+
+    def observe(self, hash_seconds: float, wait_seconds: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.hash_seconds_total += hash_seconds
+            self.wait_seconds_total += wait_seconds
+            self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds)
+            total = hash_seconds + wait_seconds
+            for index, bound in enumerate(self.LATENCY_BUCKETS):
+                if total <= bound:
+                    self.latency_buckets[index] += 1
+                    break
+            else:
+                self.latency_buckets[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": self.queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "hash_seconds_avg": self.hash_seconds_total / completed,
+                "hash_seconds_max": self.hash_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / completed,
+                "latency_buckets": {
+                    **{f"le_{bound}": count for bound, count in zip(self.LATENCY_BUCKETS, self.latency_buckets)},
+                    "le_inf": self.latency_buckets[-1],
+                },
+            }
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated pool so password work never blocks the event loop.
+
+    At most ``workers`` hashes run at once and at most ``queue_size`` more wait
+    for a slot; anything beyond that is rejected immediately with
+    ``HashingServiceBusy`` instead of piling up behind the pool.
+    """
+
+    def __init__(self, executor: str = "thread", workers: int = 4, queue_size: int = 64) -> None:
+        self.executor_kind = executor
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.metrics = HashingMetrics()
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="bcrypt"
+                        )
+        return self._executor
+
+    def start(self) -> None:
+        self._get_executor()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    async def _submit(self, fn: Callable, *args: Any) -> Any:
+        metrics = self.metrics
+        with metrics._lock:
+            if metrics.in_flight >= self.capacity:
+                metrics.rejected += 1
+                raise HashingServiceBusy()
+            metrics.in_flight += 1
+            metrics.queued = max(0, metrics.in_flight - self.workers)
+
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_seconds = await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with metrics._lock:
+                metrics.in_flight -= 1
+                metrics.queued = max(0, metrics.in_flight - self.workers)
+
+        wait_seconds = max(0.0, time.perf_counter() - submitted - hash_seconds)
+        metrics.observe(hash_seconds, wait_seconds)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_timed_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify ``password`` and return ``(valid, new_hash)``.
+
+        ``new_hash`` is set when the stored hash uses a deprecated scheme or a
+        cost factor below ``BCRYPT_ROUNDS``; callers should persist it.
+        """
+        valid, new_hash = await self._submit(_timed_verify, password, hashed_password)
+        if valid and new_hash:
+            with self.metrics._lock:
+                self.metrics.rehashed += 1
+        return valid, new_hash
+
+
+password_hasher = PasswordHasher(
+    executor=settings.HASHING_EXECUTOR,
+    workers=settings.HASHING_WORKERS,
+    queue_size=settings.HASHING_QUEUE_SIZE,
+)
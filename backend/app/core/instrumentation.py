@@ -0,0 +1,201 @@
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.metrics import (
+    Gauge,
+    db_pool_checkout_wait,
+    db_query_duration,
+    http_request_duration,
+    http_request_queries,
+    http_request_query_time,
+    http_requests,
+    http_slow_requests,
+    registry,
+)
+
+slow_request_logger = logging.getLogger("app.slow_requests")
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    query_time: float = 0.0
+    pool_wait: float = 0.0
+    fingerprints: Dict[str, int] = field(default_factory=dict)
+
+
+# Stats of the HTTP request being served; threads started with
+# run_in_threadpool / asyncio.to_thread inherit it
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Statement text with literals and IN-list lengths normalized away."""
+    normalized = _IN_LIST.sub("(?…)", statement)
+    normalized = _LITERAL.sub("?", normalized)
+    return _SPACE.sub(" ", normalized).strip()
+
+
+# --- Database hooks -------------------------------------------------------
+
+_engines: Dict[str, Engine] = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_query_duration.observe(elapsed, conn.info.get("engine_name", "sync"))
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+        key = fingerprint(statement)
+        stats.fingerprints[key] = stats.fingerprints.get(key, 0) + 1
+
+
+def _on_error(exception_context):
+    # Keep the start-time stack balanced when a statement raises
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every statement on ``engine`` (pass ``async_engine.sync_engine`` for async)."""
+    _engines[name] = engine
+
+    @event.listens_for(engine, "engine_connect")
+    def _tag(conn):
+        conn.info["engine_name"] = name
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _on_error)
+
+
+def timed_pool(pool_class, name: str):
+    """
+    ``pool_class`` that records how long each checkout waits for a connection.
+
+    SQLAlchemy has no event for the start of a checkout, so the wait is
+    measured around the pool's ``_do_get``: queueing for a free connection
+    plus opening a new one when the pool is below its limit.
+    """
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                waited = time.perf_counter() - started
+                db_pool_checkout_wait.observe(waited, name)
+                stats = current_request.get()
+                if stats is not None:
+                    stats.pool_wait += waited
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def _pool_connections() -> Iterable[Tuple[Tuple[str, str], float]]:
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            yield (name, "checked_out"), pool.checkedout()
+            yield (name, "idle"), pool.checkedin()
+            yield (name, "overflow"), max(pool.overflow(), 0)
+
+
+registry.register(Gauge(
+    "db_pool_connections", "Pooled connections by state.", ("engine", "state"), _pool_connections
+))
+
+
+# --- HTTP middleware ------------------------------------------------------
+
+def _repeated_queries(stats: RequestStats) -> List[dict]:
+    return [
+        {"count": count, "sql": sql}
+        for sql, count in sorted(stats.fingerprints.items(), key=lambda item: -item[1])
+        if count >= settings.N_PLUS_ONE_THRESHOLD
+    ]
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, query count, query time and pool wait per route template.
+
+    Requests slower than ``SLOW_REQUEST_MS`` are logged as one JSON record
+    on the ``app.slow_requests`` logger, including every query fingerprint
+    repeated at least ``N_PLUS_ONE_THRESHOLD`` times (the usual N+1 shape).
+    Written as plain ASGI to keep per-request overhead to a few microseconds.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.slow_seconds = settings.SLOW_REQUEST_MS / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = scope.get("route")
+            # Templates, not raw paths, keep label cardinality bounded
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+
+            http_requests.inc(method, template, str(status_code))
+            http_request_duration.observe(elapsed, method, template)
+            http_request_queries.observe(stats.queries, method, template)
+            http_request_query_time.observe(stats.query_time, method, template)
+
+            if elapsed >= self.slow_seconds:
+                http_slow_requests.inc(method, template)
+                slow_request_logger.warning(json.dumps({
+                    "method": method,
+                    "route": template,
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "queries": stats.queries,
+                    "query_ms": round(stats.query_time * 1000, 1),
+                    "pool_wait_ms": round(stats.pool_wait * 1000, 1),
+                    "repeated_queries": _repeated_queries(stats),
+                }))
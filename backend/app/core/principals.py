@@ -0,0 +1,152 @@
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.models.user import User
+from app.services.counters import increment_counter, read_counter
+
+# Shared counter bumped whenever a user's access may have changed
+PRINCIPALS_VERSION = "principals_version"
+# Columns a cached principal is authorized by
+_ACCESS_COLUMNS = ("email", "is_active", "is_superuser", "package_type")
+
+# token -> subject; entries never outlive the token's own expiry
+token_cache: TTLCache[str] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+# subject (email) -> detached User loaded by a previous request
+principal_cache: TTLCache[User] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def resolve_token_subject(token: str) -> Optional[str]:
+    """Return the token's subject, verifying the signature only on first sight."""
+    subject = token_cache.get(token)
+    if subject is not None:
+        return subject
+
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    subject = payload.get("sub")
+    if subject is None:
+        return None
+
+    expires_at = payload.get("exp")
+    ttl = expires_at - time.time() if expires_at else None
+    token_cache.set(token, subject, ttl=ttl)
+    return subject
+
+
+def invalidate_principal(email: str) -> None:
+    principal_cache.pop(email)
+
+
+class PrincipalVersion:
+    """
+    Watches the shared ``principals_version`` counter for this worker.
+
+    Other workers bump it when they change a user's access; the first request
+    to notice, at most ``PRINCIPAL_VERSION_POLL_SECONDS`` later, clears the
+    whole principal cache. Between polls cached principals need no I/O.
+    """
+
+    def __init__(self, poll_seconds: float) -> None:
+        self.poll_seconds = poll_seconds
+        self._version: Optional[int] = None
+        self._checked_at = float("-inf")
+        self.clears = 0
+
+    async def check(self, db: AsyncSession) -> None:
+        if time.monotonic() - self._checked_at < self.poll_seconds:
+            return
+        self._checked_at = time.monotonic()
+        version = await read_counter(db, PRINCIPALS_VERSION)
+        if version != self._version:
+            self._version = version
+            principal_cache.clear()
+            self.clears += 1
+
+
+principal_version = PrincipalVersion(poll_seconds=settings.PRINCIPAL_VERSION_POLL_SECONDS)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "principals": principal_cache.stats(),
+        "tokens": token_cache.stats(),
+        "version_clears": principal_version.clears,
+    }
+
+
+def bump_principals_version(session: Session) -> None:
+    """Tell every worker to drop its cached principals once ``session`` commits; once per transaction."""
+    if session.info.get(_BUMPED_KEY):
+        return
+    increment_counter(session, PRINCIPALS_VERSION)
+    session.info[_BUMPED_KEY] = True
+
+
+# Invalidate cached principals once changes to their rows are committed.
+# Collecting in after_flush and evicting in after_commit keeps another request
+# from re-caching the old row between the flush and the commit. Changes to
+# access columns also bump the shared version, in the same transaction, for
+# the other workers.
+_PENDING_KEY = "invalidated_principals"
+_BUMPED_KEY = "principals_version_bumped"
+_CLEAR_KEY = "clear_principals"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context: Any) -> None:
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        pending = session.info.setdefault(_PENDING_KEY, set())
+        state = inspect(obj)
+        history = state.attrs.email.history
+        pending.update(email for email in (history.deleted or ()) if email)
+        if obj.email:
+            pending.add(obj.email)
+        if obj in session.deleted or any(state.attrs[name].history.has_changes() for name in _ACCESS_COLUMNS):
+            bump_principals_version(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_writes(orm_execute_state: ORMExecuteState) -> None:
+    # update(User) / delete(User) statements name no rows: drop every principal.
+    # Core statements on the users table carry no mapper, so match the table too.
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if (mapper is not None and mapper.class_ is User) or getattr(
+        orm_execute_state.statement, "table", None
+    ) is User.__table__:
+        session = orm_execute_state.session
+        bump_principals_version(session)
+        session.info[_CLEAR_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed_users(session: Session) -> None:
+    session.info.pop(_BUMPED_KEY, None)
+    if session.info.pop(_CLEAR_KEY, False):
+        principal_cache.clear()
+    for email in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    for key in (_PENDING_KEY, _BUMPED_KEY, _CLEAR_KEY):
+        session.info.pop(key, None)
@@ -0,0 +1,54 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+
+class RankedBoard:
+    """
+    Scores kept in rank order for top-N and rank lookups in O(log n).
+
+    Entries sort by descending score, then member id. Ranks are competition
+    ranks: members with equal scores share a rank, which is one more than
+    the number of members scoring strictly higher. Members with a score of 0
+    or less are not ranked.
+    """
+
+    __slots__ = ("_scores", "_order")
+
+    def __init__(self, scores: Optional[Iterable[Tuple[str, int]]] = None) -> None:
+        self._scores: Dict[str, int] = {member: score for member, score in scores or () if score > 0}
+        self._order = SortedList((-score, member) for member, score in self._scores.items())
+
+    def set(self, member: str, score: int) -> None:
+        old = self._scores.pop(member, None)
+        if old is not None:
+            self._order.remove((-old, member))
+        if score > 0:
+            self._scores[member] = score
+            self._order.add((-score, member))
+
+    def add(self, member: str, delta: int) -> None:
+        self.set(member, self._scores.get(member, 0) + delta)
+
+    def score(self, member: str) -> int:
+        return self._scores.get(member, 0)
+
+    def rank(self, member: str) -> Optional[int]:
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        # "" sorts before every member id, so this counts strictly higher scores
+        return self._order.bisect_left((-score, "")) + 1
+
+    def top(self, count: int) -> List[Tuple[int, str, int]]:
+        """``(rank, member, score)`` for the first ``count`` members."""
+        entries = []
+        rank, previous = 0, None
+        for position, (negative, member) in enumerate(self._order.islice(0, count)):
+            if negative != previous:
+                rank, previous = position + 1, negative
+            entries.append((rank, member, -negative))
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._scores)
@@ -0,0 +1,223 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Protocol, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+rate_limited_requests = registry.register(Counter(
+    "rate_limited_requests_total", "Requests rejected by a rate limit.", ("limit",)
+))
+
+
+@dataclass(frozen=True)
+class Rate:
+    """``count`` requests per ``period`` seconds, in bursts of up to ``count``."""
+    count: int
+    period: float
+
+    @classmethod
+    def parse(cls, text: str) -> "Rate":
+        """Parse ``"10/minute"``-style limits."""
+        count, _, unit = text.partition("/")
+        if unit.strip() not in PERIODS:
+            raise ValueError(f"Invalid rate {text!r}; use <count>/<{'|'.join(PERIODS)}>")
+        return cls(int(count), PERIODS[unit.strip()])
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+
+# (key, rate) pairs checked together
+Limits = Sequence[Tuple[str, Rate]]
+
+
+def gcra(stored: Optional[float], rate: Rate, now: float) -> Tuple[float, float]:
+    """
+    One step of the generic cell rate algorithm, a token bucket kept as a
+    single number: the key's theoretical arrival time.
+
+    Returns ``(new_tat, retry_after)``; the request is allowed when
+    ``retry_after`` is 0, and only then should ``new_tat`` be stored.
+    """
+    tat = max(stored or now, now) + rate.interval
+    retry_after = tat - now - rate.period
+    return tat, max(0.0, retry_after)
+
+
+class RateLimitStore(Protocol):
+    """
+    Shared bucket state. ``hit`` must check and charge every key atomically:
+    either all of them are charged, or none is and the longest wait is returned.
+    """
+
+    def hit(self, limits: Limits, now: float) -> float: ...
+
+    def close(self) -> None: ...
+
+
+def _check(stored: Dict[str, Optional[float]], limits: Limits, now: float) -> Tuple[Dict[str, float], float]:
+    updates, retry_after = {}, 0.0
+    for key, rate in limits:
+        updates[key], wait = gcra(stored.get(key), rate, now)
+        retry_after = max(retry_after, wait)
+    return updates, retry_after
+
+
+class MemoryStore:
+    """Per-process buckets; limits apply to each worker separately."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, limits: Limits, now: float) -> float:
+        with self._lock:
+            updates, retry_after = _check({key: self._tats.get(key) for key, _ in limits}, limits, now)
+            if retry_after:
+                return retry_after
+            if len(self._tats) + len(updates) > self.max_keys:
+                # A bucket whose arrival time has passed is full again; forgetting it changes nothing
+                self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+            self._tats.update(updates)
+            return 0.0
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStore:
+    """
+    Buckets in a SQLite file shared by every worker on the host.
+
+    Each check is one ``BEGIN IMMEDIATE`` transaction, so concurrent workers
+    serialize on the file lock. The state is disposable: the journal is not
+    synced and a lost file only resets the buckets.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._local.connection = connection
+        return connection
+
+    def hit(self, limits: Limits, now: float) -> float:
+        connection = self._connection()
+        keys = [key for key, _ in limits]
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                f"SELECT key, tat FROM buckets WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+            updates, retry_after = _check(dict(rows), limits, now)
+            if not retry_after:
+                connection.executemany(
+                    "INSERT INTO buckets (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET tat = excluded.tat",
+                    updates.items(),
+                )
+                self._hits += 1
+                if self._hits % self.PRUNE_EVERY == 0:
+                    connection.execute("DELETE FROM buckets WHERE tat <= ?", (now,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, limit: str, retry_after: float) -> None:
+        super().__init__(limit)
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Checks limits against the store on one dedicated thread, so a file lock
+    wait never blocks the event loop and each process uses one connection.
+    """
+
+    def __init__(self, store: RateLimitStore, enabled: bool = True) -> None:
+        self.store = store
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.allowed = 0
+        self.limited: Dict[str, int] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ratelimit")
+        return self._executor
+
+    async def check(self, name: str, limits: Limits) -> None:
+        """Charge every limit or raise ``RateLimitExceeded`` without charging any."""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        retry_after = await loop.run_in_executor(self._get_executor(), self.store.hit, limits, time.time())
+        if retry_after:
+            self.limited[name] = self.limited.get(name, 0) + 1
+            rate_limited_requests.inc(name)
+            raise RateLimitExceeded(name, retry_after)
+        self.allowed += 1
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.submit(self.store.close).result()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "allowed": self.allowed,
+            "limited": dict(self.limited),
+        }
+
+
+def create_store(backend: str) -> RateLimitStore:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore(settings.RATE_LIMIT_SQLITE_PATH)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r}; use memory or sqlite")
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+rate_limiter = RateLimiter(create_store(settings.RATE_LIMIT_BACKEND), enabled=settings.RATE_LIMIT_ENABLED)
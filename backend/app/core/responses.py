@@ -0,0 +1,58 @@
+import json
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Type
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.schemas.pagination import Page
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is the fallback
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Body already encoded as JSON bytes, e.g. by ``TypeAdapter.dump_json``."""
+
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def page_adapter(item_model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(Page[item_model])
+
+
+def row_columns(item_model: Type[BaseModel], entity) -> List[Any]:
+    """The ``entity`` columns backing ``item_model``'s fields, in field order."""
+    return [getattr(entity, name) for name in item_model.model_fields]
+
+
+def page_response(
+    item_model: Type[BaseModel], rows: Sequence[Sequence[Any]], next_cursor: Optional[str]
+) -> RawJSONResponse:
+    """
+    Encode a page of ``row_columns`` tuples without building ORM instances.
+
+    Rows are validated into ``Page[item_model]`` and dumped to JSON by one
+    cached ``TypeAdapter``, both in pydantic-core. Returning the response
+    directly also skips FastAPI's own second validation and encoding pass.
+    """
+    names = tuple(item_model.model_fields)
+    adapter = page_adapter(item_model)
+    page = adapter.validate_python({"items": [dict(zip(names, row)) for row in rows], "next_cursor": next_cursor})
+    return RawJSONResponse(adapter.dump_json(page))
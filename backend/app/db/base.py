@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine, timed_pool
 
 # Database engine configuration
 connect_args = {}
@@ -10,8 +14,9 @@ if settings.is_sqlite:
     connect_args = {"check_same_thread": False}
 
 engine = create_engine(
-    settings.DATABASE_URL, 
+    settings.DATABASE_URL,
     connect_args=connect_args,
+    poolclass=timed_pool(QueuePool, "sync"),
     # PostgreSQL optimizations
     pool_pre_ping=True if settings.is_postgresql else False,
     pool_recycle=300 if settings.is_postgresql else -1,
@@ -19,6 +24,36 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine configuration (aiosqlite / asyncpg)
+async_url = make_url(settings.async_database_url)
+async_connect_args = {}
+if settings.is_postgresql and "sslmode" in async_url.query:
+    # asyncpg does not understand libpq's sslmode; translate it to its ssl flag
+    sslmode = async_url.query["sslmode"]
+    async_url = async_url.difference_update_query(["sslmode"])
+    if sslmode != "disable":
+        async_connect_args["ssl"] = sslmode
+
+async_engine = create_async_engine(
+    async_url,
+    connect_args=async_connect_args,
+    # aiosqlite defaults to NullPool (a new thread per connection); pool it like Postgres
+    poolclass=timed_pool(AsyncAdaptedQueuePool, "async"),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True if settings.is_postgresql else False,
+    pool_recycle=300 if settings.is_postgresql else -1,
+)
+
+# Per-request query counts and timings, pool waits and /metrics histograms
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -28,4 +63,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Async dependency for endpoints that should not block the event loop on I/O
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value  # None is written as an unquoted empty field, which COPY reads as NULL
+
+
+def _copy(db: Session, table, rows: List[dict]) -> None:
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    # The session's own connection, so the COPY commits with everything else
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert(db: Session, table, rows: List[dict]) -> None:
+    """
+    Insert ``rows`` (dicts with the same keys) as fast as the database allows.
+
+    PostgreSQL gets a single ``COPY ... FROM STDIN``; other databases an
+    executemany INSERT. Column defaults are not applied on the COPY path, so
+    pass every value explicitly and avoid empty strings (COPY reads them as
+    NULL).
+    """
+    if not rows:
+        return
+    table = getattr(table, "__table__", table)
+    if settings.is_postgresql:
+        _copy(db, table, rows)
+    else:
+        db.execute(insert(table), rows)
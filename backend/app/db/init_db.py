@@ -1,9 +1,9 @@
-from app.db.base import Base, engine
-from app.models import User, Course, CourseEnrollment, Transaction, Commission
+from app.db.base import engine
+from app.db.migrations import upgrade
 
 
 def init_db() -> None:
     """
-    Initialize the database by creating all tables
+    Bring the database schema up to date by applying pending migrations
     """
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    upgrade(engine)
@@ -0,0 +1,141 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Revision matching the schema that create_all() produced before migrations,
+# which databases created that way can be stamped at
+BASELINE_REVISION = "0001"
+
+# {table: (column names, index names)}
+Schema = Dict[str, Tuple[Set[str], Set[str]]]
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the migration revision this code expects."""
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    config.attributes["configure_logging"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """Latest revision in alembic/versions; read from disk once per process."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """The database's stored revision, or None if it has never been migrated."""
+    with engine.connect() as connection:
+        try:
+            return connection.scalar(text("SELECT version_num FROM alembic_version"))
+        except (OperationalError, ProgrammingError):
+            return None
+
+
+def check_schema(engine: Engine) -> None:
+    """
+    Refuse to run against a database at any revision but head.
+
+    One single-row SELECT, with no reflection, so it is cheap enough for
+    every worker boot. Schema changes are applied only by ``manage.py migrate``.
+    """
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {current or 'none'} but this code expects {head}; "
+            "run `python manage.py migrate`"
+        )
+
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), revision)
+
+
+def reflect_schema(engine: Engine) -> Schema:
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)},
+        )
+        for table in inspector.get_table_names()
+        if table != "alembic_version"
+    }
+
+
+@lru_cache(maxsize=1)
+def baseline_schema() -> Schema:
+    """Tables, columns and indexes of the baseline revision, migrated into a scratch database."""
+    scratch = create_engine("sqlite://")
+    try:
+        upgrade(scratch, BASELINE_REVISION)
+        return reflect_schema(scratch)
+    finally:
+        scratch.dispose()
+
+
+def has_baseline_tables(engine: Engine) -> bool:
+    return bool(set(inspect(engine).get_table_names()) & set(baseline_schema()))
+
+
+def baseline_differences(engine: Engine) -> List[str]:
+    """
+    How the database differs from the baseline revision, in ways that would
+    break the later revisions: a baseline table, column or index it lacks,
+    or a table, column or index that a later revision creates.
+    """
+    from app.db.base import Base
+    import app.models  # noqa: F401  registers every table on Base.metadata
+
+    expected, actual = baseline_schema(), reflect_schema(engine)
+    later_indexes = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+    problems = []
+    for table, (columns, indexes) in sorted(expected.items()):
+        if table not in actual:
+            problems.append(f"missing table {table}")
+            continue
+        have_columns, have_indexes = actual[table]
+        problems += [f"missing column {table}.{column}" for column in sorted(columns - have_columns)]
+        problems += [f"unexpected column {table}.{column}" for column in sorted(have_columns - columns)]
+        problems += [f"missing index {index} on {table}" for index in sorted(indexes - have_indexes)]
+        problems += [
+            f"unexpected index {index} on {table}"
+            for index in sorted((have_indexes - indexes) & later_indexes)
+        ]
+    problems += [
+        f"unexpected table {table}"
+        for table in sorted(actual.keys() - expected.keys())
+        if table in Base.metadata.tables
+    ]
+    return problems
+
+
+def stamp_baseline(engine: Engine) -> None:
+    """
+    Record an unmigrated database built by create_all() as the baseline
+    revision, after checking that its schema is the baseline's.
+    """
+    problems = baseline_differences(engine)
+    if problems:
+        raise SchemaOutOfDate(
+            f"Cannot adopt this database at revision {BASELINE_REVISION}, its schema differs: "
+            + "; ".join(problems)
+        )
+    with engine.begin() as connection:
+        command.stamp(alembic_config(connection), BASELINE_REVISION)
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, Select, bindparam, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+_SIGNATURE_BYTES = 12
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that were tampered with or minted by another key."""
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(_sign(payload) + payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        signature, payload = raw[:_SIGNATURE_BYTES], raw[_SIGNATURE_BYTES:]
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise InvalidCursor("Invalid cursor")
+        sort_value, row_id = json.loads(payload)
+        return sort_value, row_id
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def _sort_expression(column):
+    # SQLite stores DateTime as text, and server defaults (CURRENT_TIMESTAMP) omit
+    # the microseconds that SQLAlchemy writes for Python values. Comparing the raw
+    # text keeps the cursor consistent with ORDER BY and with the index.
+    if settings.is_sqlite:
+        return type_coerce(column, String)
+    return column
+
+
+def _sort_parameter(value: Any):
+    if settings.is_sqlite:
+        return bindparam(None, value, type_=String)
+    return bindparam(None, datetime.fromisoformat(value), type_=None)
+
+
+def keyset_query(stmt: Select, sort_column, id_column, cursor: Optional[str], limit: int) -> Select:
+    """The page query ``paginate`` runs: ``limit + 1`` rows after ``cursor``, newest first."""
+    sort_expr = _sort_expression(sort_column)
+    stmt = stmt.add_columns(sort_expr.label("_keyset_sort"), id_column.label("_keyset_id"))
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        try:
+            stmt = stmt.where(tuple_(sort_expr, id_column) < tuple_(_sort_parameter(sort_value), row_id))
+        except (TypeError, ValueError) as exc:
+            raise InvalidCursor("Invalid cursor") from exc
+    return stmt.order_by(sort_expr.desc(), id_column.desc()).limit(limit + 1)
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Sequence[Any]], Optional[str]]:
+    """
+    Keyset-paginate ``stmt`` newest first on ``(sort_column, id_column)``.
+
+    Instead of OFFSET, each page continues strictly after the last
+    ``(sort_column, id)`` pair of the previous one, so with a composite index
+    on those columns (after any equality filters) every page costs the same.
+    Returns the page's rows, with the statement's own columns only, and an
+    opaque signed cursor for the next page (``None`` on the last page).
+    """
+    stmt = keyset_query(stmt, sort_column, id_column, cursor, limit)
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[-2], last[-1])
+    return [tuple(row)[:-2] for row in rows], next_cursor
@@ -0,0 +1,221 @@
+"""
+Registry of the app's hot queries and an EXPLAIN-based check that each one
+is served by an index rather than a full table scan.
+
+Each statement is built with the same helpers the endpoints and services
+use, so a change to a query or a dropped index shows up here. SQLite plans
+come from ``EXPLAIN QUERY PLAN``; a ``SCAN <table>`` step without an index
+is a failure, while walking an index in order (keyset pages, LIMIT reads) is
+fine. On PostgreSQL the plan is ``EXPLAIN (FORMAT JSON)`` with sequential
+scans disabled for the transaction, so a ``Seq Scan`` remains only where no
+index can serve the query, regardless of table size.
+
+Run by tests/test_query_plans.py and by ``python -m benchmarks.query_plans``.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Any well-formed id: plans do not depend on which row is asked for
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+SAMPLE_TIME = datetime(2025, 6, 1, tzinfo=timezone.utc)
+PAGE_SIZE = 20
+
+
+@dataclass
+class HotQuery:
+    name: str
+    build: Callable[[], Any]
+    # Tables the query is meant to read in full (small, or read once and cached)
+    allow_scans: Tuple[str, ...] = ()
+
+
+def hot_queries() -> List[HotQuery]:
+    # Imported here: settings are read at import time, after DATABASE_URL is set
+    from sqlalchemy import select, update
+
+    from app.core.responses import row_columns
+    from app.db.pagination import encode_cursor, keyset_query
+    from app.models.course import Course, CourseEnrollment, Lesson
+    from app.models.earnings import EarningsRollup
+    from app.models.referral import ReferralClick
+    from app.models.payment import Commission, Transaction
+    from app.models.user import User
+    from app.schemas.course import EnrollmentResponse
+    from app.schemas.payment import CommissionResponse, TransactionResponse
+    from app.schemas.user import UserResponse
+    from app.services.commissions import unsettled_transactions_query
+    from app.services.emails import claim_emails_query
+    from app.services.leaderboard import changed_earners_query, rescore_query, window_starts
+    from app.services.platform_stats import platform_stats_query, signups_counter
+    from app.services.recommendations import co_enrollments_query, recommended_query, related_query
+    from app.services.referrals import backfill_level_query, downline_counts_query, uplines_query
+    from app.services.search import search_params, search_statement
+    from app.services.webhooks import claim_events_query
+
+    cursor = encode_cursor(SAMPLE_TIME, SAMPLE_ID)
+
+    def page(stmt, sort_column, id_column):
+        return lambda: keyset_query(stmt, sort_column, id_column, cursor, PAGE_SIZE)
+
+    return [
+        # Auth
+        HotQuery("login: user by email", lambda: select(User).where(User.email == "user1@example.com")),
+        HotQuery("signup: referrer by code", lambda: select(User).where(User.referral_code == "R0000001")),
+        HotQuery("direct referrals", lambda: select(User.id).where(User.referred_by == SAMPLE_ID)),
+        # Paginated lists
+        HotQuery("transactions page", page(
+            select(*row_columns(TransactionResponse, Transaction)).where(Transaction.user_id == SAMPLE_ID),
+            Transaction.created_at, Transaction.id,
+        )),
+        HotQuery("transactions page by status", page(
+            select(*row_columns(TransactionResponse, Transaction)).where(Transaction.user_id == SAMPLE_ID, Transaction.status == "completed"),
+            Transaction.created_at, Transaction.id,
+        )),
+        HotQuery("commissions page", page(
+            select(*row_columns(CommissionResponse, Commission)).where(Commission.user_id == SAMPLE_ID),
+            Commission.created_at, Commission.id,
+        )),
+        HotQuery("commissions page by status", page(
+            select(*row_columns(CommissionResponse, Commission)).where(Commission.user_id == SAMPLE_ID, Commission.status == "pending"),
+            Commission.created_at, Commission.id,
+        )),
+        HotQuery("enrollments page", page(
+            select(*row_columns(EnrollmentResponse, CourseEnrollment)).where(CourseEnrollment.user_id == SAMPLE_ID),
+            CourseEnrollment.enrolled_at, CourseEnrollment.id,
+        )),
+        HotQuery("admin users page", page(select(*row_columns(UserResponse, User)), User.created_at, User.id)),
+        HotQuery("admin users page by package", page(
+            select(*row_columns(UserResponse, User)).where(User.package_type == "gold"), User.created_at, User.id,
+        )),
+        # Courses and progress
+        HotQuery("enrollment by user and course", lambda: select(CourseEnrollment).where(
+            CourseEnrollment.user_id == SAMPLE_ID, CourseEnrollment.course_id == SAMPLE_ID,
+        )),
+        HotQuery("lesson by course", lambda: select(Lesson).where(
+            Lesson.id == SAMPLE_ID, Lesson.course_id == SAMPLE_ID,
+        )),
+        HotQuery("course completion", lambda: update(CourseEnrollment).where(
+            CourseEnrollment.user_id == SAMPLE_ID,
+            CourseEnrollment.course_id == SAMPLE_ID,
+            CourseEnrollment.completed_at.is_(None),
+        ).values(completed_at=SAMPLE_TIME)),
+        HotQuery("course search", lambda: search_statement(True).bindparams(
+            **search_params(["seo", "mark"], "gold", PAGE_SIZE, 0)
+        )),
+        HotQuery("related courses", lambda: related_query(SAMPLE_ID, PAGE_SIZE)),
+        HotQuery("recommended courses", lambda: recommended_query(SAMPLE_ID, PAGE_SIZE)),
+        HotQuery("recommendation co-enrollments", lambda: co_enrollments_query([SAMPLE_ID])),
+        HotQuery("catalog snapshot", lambda: select(Course).where(Course.is_active.is_(True)),
+                 allow_scans=("courses",)),
+        # Referrals and earnings
+        HotQuery("uplines", lambda: uplines_query(SAMPLE_ID, 10)),
+        HotQuery("downline counts", lambda: downline_counts_query(SAMPLE_ID, 10)),
+        HotQuery("earnings summary", lambda: select(EarningsRollup).where(
+            EarningsRollup.user_id == SAMPLE_ID, EarningsRollup.period == "month",
+        )),
+        # The rebuild reads every path of the previous level, then finds the users each one referred
+        HotQuery("referral backfill level", lambda: backfill_level_query(2), allow_scans=("referral_paths",)),
+        HotQuery("referral clicks by hour", lambda: select(ReferralClick).where(
+            ReferralClick.user_id == SAMPLE_ID, ReferralClick.hour_start >= SAMPLE_TIME,
+        )),
+        HotQuery("referred signups since", lambda: select(User.created_at).where(
+            User.referred_by == SAMPLE_ID, User.created_at >= SAMPLE_TIME,
+        )),
+        HotQuery("leaderboard changed earners", lambda: changed_earners_query(SAMPLE_TIME)),
+        HotQuery("leaderboard rescore", lambda: rescore_query([SAMPLE_ID], window_starts(SAMPLE_TIME))),
+        # Admin
+        HotQuery("admin platform stats", lambda: platform_stats_query(signups_counter())),
+        # Settlement, approval and payouts
+        HotQuery("unsettled transactions batch", lambda: (
+            unsettled_transactions_query().where(Transaction.id > SAMPLE_ID).order_by(Transaction.id).limit(1000)
+        )),
+        HotQuery("approve aged commissions", lambda: update(Commission).where(
+            Commission.status == "pending", Commission.created_at < SAMPLE_TIME,
+        ).values(status="approved")),
+        HotQuery("payout claim chunk", lambda: select(Commission.id).where(
+            Commission.status == "approved", Commission.payout_batch_id.is_(None),
+        ).limit(5000)),
+        HotQuery("payout batch by earner", lambda: select(Commission.user_id, Commission.amount, User.email)
+                 .join(User, User.id == Commission.user_id)
+                 .where(Commission.payout_batch_id == SAMPLE_ID, Commission.status.in_(("approved", "paid")))
+                 .order_by(Commission.user_id)),
+        # Webhooks
+        HotQuery("webhook claim", lambda: claim_events_query(SAMPLE_TIME, 100)),
+        HotQuery("transaction by Razorpay order", lambda: select(Transaction).where(
+            Transaction.razorpay_order_id == "order_sample",
+        )),
+        # Email outbox
+        HotQuery("email outbox claim", lambda: claim_emails_query(SAMPLE_TIME, 50)),
+        HotQuery("commission email recipients", lambda: select(User.id, User.email, User.full_name).where(
+            User.id.in_([SAMPLE_ID]),
+        )),
+    ]
+
+
+def _sql(statement, dialect) -> str:
+    return str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def sqlite_plan(connection, statement) -> Tuple[List[str], List[str]]:
+    """Plan lines (indented as a tree) and the tables read by a full scan."""
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + _sql(statement, connection.dialect)).all()
+    depths: Dict[int, int] = {}
+    lines, scanned = [], []
+    for node_id, parent, _, detail in rows:
+        depths[node_id] = depths.get(parent, -1) + 1
+        lines.append("  " * depths[node_id] + detail)
+        words = detail.split()
+        # "SCAN t" reads the whole table; "SCAN t USING [COVERING] INDEX i" walks an index in order
+        if words[0] == "SCAN" and "USING" not in words:
+            scanned.append(words[1])
+    return lines, scanned
+
+
+def _postgres_nodes(node: dict, depth: int = 0):
+    yield depth, node
+    for child in node.get("Plans", ()):
+        yield from _postgres_nodes(child, depth + 1)
+
+
+def postgres_plan(connection, statement) -> Tuple[List[str], List[str]]:
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    (document,), = connection.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + _sql(statement, connection.dialect)
+    ).all()
+    lines, scanned = [], []
+    for depth, node in _postgres_nodes(document[0]["Plan"]):
+        relation = node.get("Relation Name")
+        index = node.get("Index Name")
+        lines.append("  " * depth + " ".join(filter(None, (node["Node Type"], relation, index and f"({index})"))))
+        if node["Node Type"] == "Seq Scan":
+            scanned.append(relation)
+    return lines, scanned
+
+
+def check_plans(database_url: str, queries: Sequence[HotQuery], verbose: bool) -> List[str]:
+    """EXPLAIN each query; returns one message per disallowed table scan."""
+    from sqlalchemy import create_engine
+
+    from app.db.base import Base
+
+    engine = create_engine(database_url)
+    explain = sqlite_plan if engine.dialect.name == "sqlite" else postgres_plan
+    tables = set(Base.metadata.tables)
+    failures: List[str] = []
+    try:
+        for query in queries:
+            with engine.connect() as connection:
+                lines, scanned = explain(connection, query.build())
+                connection.rollback()
+            # Scans of subqueries and temporary results are not table reads
+            bad = sorted({name for name in scanned if name in tables} - set(query.allow_scans))
+            print(f"{'❌' if bad else '✅'} {query.name}")
+            if bad or verbose:
+                for line in lines:
+                    print(f"     {line}")
+            failures.extend(f"{query.name}: full scan of {table}" for table in bad)
+    finally:
+        engine.dispose()
+    return failures
@@ -0,0 +1,27 @@
+from typing import Sequence
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+
+
+def dialect_insert(table):
+    """INSERT construct that supports ``on_conflict_do_*`` on the configured database."""
+    return postgresql.insert(table) if settings.is_postgresql else sqlite.insert(table)
+
+
+def increment_upsert(table, key_columns: Sequence[str], increment_columns: Sequence[str]):
+    """
+    INSERT ... ON CONFLICT DO UPDATE that adds to existing counters.
+
+    Execute it with a list of row dicts (executemany) on a sync or async
+    session; rows whose key already exists have ``increment_columns`` added to
+    the stored values instead of replacing them.
+    """
+    table = getattr(table, "__table__", table)
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={column: table.c[column] + stmt.excluded[column] for column in increment_columns},
+    )
+
@@ -1,14 +1,32 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
 from app.api.api_v1.api import api_router
-from app.db.init_db import init_db
+from app.api import referral_links
+from app.db.base import async_engine, engine
+from app.db.pagination import InvalidCursor
+from app.db.migrations import check_schema
+from app.core.hashing import HashingServiceBusy, password_hasher
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.metrics import registry
+from app.core.principals import cache_stats
+from app.core.responses import FastJSONResponse
+from app.core.ratelimit import RateLimitExceeded, rate_limiter, retry_after_header
+from app.services.catalog import catalog
+from app.services.clicks import click_buffer
+from app.services.emails import email_dispatcher
+from app.services.leaderboard import leaderboard
+from app.services.platform_stats import platform_reconciler
+from app.services.progress import progress_buffer
+from app.services.webhooks import webhook_workers
 
 app = FastAPI(
     title="Raju Affiliate Learning Platform API",
     description="Backend API for the affiliate learning platform",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse,
 )
 
 # CORS middleware
@@ -20,8 +38,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, query and pool metrics; outermost so it times everything
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# Shareable short links live outside the versioned API
+app.include_router(referral_links.router, tags=["referrals"])
+
+@app.exception_handler(HashingServiceBusy)
+async def hashing_busy_handler(request: Request, exc: HashingServiceBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many requests, please retry later"},
+        headers={"Retry-After": retry_after_header(exc.retry_after)},
+    )
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": "Invalid pagination cursor"},
+    )
 
 @app.get("/")
 async def root():
@@ -31,7 +77,70 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/hashing")
+async def hashing_health():
+    return password_hasher.metrics.snapshot()
+
+@app.get("/health/rate-limits")
+async def rate_limits_health():
+    return rate_limiter.stats()
+
+@app.get("/health/principal-cache")
+async def principal_cache_health():
+    return cache_stats()
+
+@app.get("/health/catalog")
+async def catalog_health():
+    return catalog.stats()
+
+@app.get("/health/progress-buffer")
+async def progress_buffer_health():
+    return progress_buffer.stats()
+
+@app.get("/health/clicks")
+async def clicks_health():
+    return click_buffer.stats()
+
+@app.get("/health/webhooks")
+async def webhooks_health():
+    return webhook_workers.stats()
+
+@app.get("/health/email")
+async def email_health():
+    return email_dispatcher.stats()
+
+@app.get("/health/leaderboard")
+async def leaderboard_health():
+    return leaderboard.stats()
+
+@app.get("/health/platform-stats")
+async def platform_stats_health():
+    return platform_reconciler.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
-    # Initialize database
-    init_db()
\ No newline at end of file
+    # Schema changes ship through `python manage.py migrate`; never serve a stale schema
+    check_schema(engine)
+    password_hasher.start()
+    progress_buffer.start()
+    click_buffer.start()
+    webhook_workers.start()
+    email_dispatcher.start()
+    platform_reconciler.start()
+    leaderboard.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await leaderboard.stop()
+    await platform_reconciler.stop()
+    await webhook_workers.stop()
+    await email_dispatcher.stop()
+    await click_buffer.stop()
+    await progress_buffer.stop()
+    password_hasher.shutdown()
+    rate_limiter.close()
+    await async_engine.dispose()
\ No newline at end of file
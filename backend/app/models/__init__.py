@@ -1,5 +1,16 @@
 from .user import User
-from .course import Course, CourseEnrollment
-from .payment import Transaction, Commission
+from .course import Course, CourseEnrollment, CourseModule, Lesson
+from .payment import Transaction, Commission, PayoutBatch
+from .referral import ReferralPath, ReferralClick
+from .earnings import EarningsRollup
+from .counter import Counter
+from .webhook import RazorpayEvent
+from .recommendation import CourseNeighbor, RecommendationSource
+from .email import EmailOutbox
 
-__all__ = ["User", "Course", "CourseEnrollment", "Transaction", "Commission"]
\ No newline at end of file
+__all__ = [
+    "User", "Course", "CourseEnrollment", "CourseModule", "Lesson",
+    "Transaction", "Commission", "PayoutBatch",
+    "ReferralPath", "ReferralClick", "EarningsRollup", "Counter", "RazorpayEvent",
+    "CourseNeighbor", "RecommendationSource", "EmailOutbox",
+]
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class Counter(Base):
+    """Named integer counters shared by every worker (cache versions, platform totals)."""
+    __tablename__ = "counters"
+    
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, JSON, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.db.base import Base
 import uuid
@@ -10,13 +10,14 @@ class Course(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
-    description = Column(Text, nullable=True)
+    description = deferred(Column(Text, nullable=True))  # loaded only when accessed or undeferred
     short_description = Column(String, nullable=True)
     thumbnail_url = Column(String, nullable=True)
     video_url = Column(String, nullable=True)
     
     # Course content
-    content = Column(JSON, nullable=True)  # Store course modules, lessons etc.
+    # Authoring copy of modules/lessons; readers use the CourseModule/Lesson store
+    content = deferred(Column(JSON, nullable=True))
     duration_minutes = Column(Integer, nullable=True)
     difficulty_level = Column(String, nullable=True)  # beginner, intermediate, advanced
     
@@ -36,6 +37,45 @@ class Course(Base):
     
     # Relationships
     enrollments = relationship("CourseEnrollment", back_populates="course")
+    modules = relationship("CourseModule", back_populates="course", order_by="CourseModule.position")
+
+
+class CourseModule(Base):
+    __tablename__ = "course_modules"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_course_modules_course_position", "course_id", "position"),
+    )
+    
+    # Relationships
+    course = relationship("Course", back_populates="modules")
+    lessons = relationship("Lesson", back_populates="module", order_by="Lesson.position")
+
+
+class Lesson(Base):
+    __tablename__ = "lessons"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    module_id = Column(String, ForeignKey("course_modules.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    
+    title = Column(String, nullable=False)
+    duration_minutes = Column(Integer, nullable=True)
+    video_url = Column(String, nullable=True)
+    body = deferred(Column(JSON, nullable=True))  # Everything else from the authored lesson
+    
+    __table_args__ = (
+        Index("ix_lessons_course_module_position", "course_id", "module_id", "position"),
+    )
+    
+    # Relationships
+    module = relationship("CourseModule", back_populates="lessons")
 
 
 class CourseEnrollment(Base):
@@ -53,6 +93,15 @@ class CourseEnrollment(Base):
     # Timestamps
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # One enrollment per learner per course; progress heartbeats upsert on it
+        UniqueConstraint("user_id", "course_id", name="uq_course_enrollments_user_course"),
+        # Keyset pagination of a user's enrollments
+        Index("ix_course_enrollments_user_enrolled_at_id", "user_id", "enrolled_at", "id"),
+        # A course's learners, and those who enrolled since a time (recommendation job)
+        Index("ix_course_enrollments_course_enrolled_at", "course_id", "enrolled_at", "user_id"),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
\ No newline at end of file
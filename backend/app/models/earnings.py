@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey
+from app.db.base import Base
+
+
+class EarningsRollup(Base):
+    """
+    Per-user commission totals bucketed by day and by month.
+
+    ``status`` is a commission status (pending, approved, paid, cancelled) or
+    ``referral``, whose ``count`` is the number of direct signups in the period.
+    Rows are adjusted in the same transaction as the commission writes, so the
+    earnings dashboard never has to aggregate the raw ledger.
+    """
+    __tablename__ = "earnings_rollups"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    period = Column(String, primary_key=True)  # day, month
+    period_start = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    
+    amount = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+import uuid
+
+
+class EmailOutbox(Base):
+    """
+    Outbox of transactional emails, rendered and written in the same
+    transaction as the event that triggers them.
+
+    ``dedupe_key`` names that event (``welcome:<user id>``, ...), so an event
+    applied twice queues its email once. The email dispatcher claims rows
+    oldest first and sends them in the background.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    dedupe_key = Column(String, unique=True, nullable=False)
+    kind = Column(String, nullable=False)  # welcome, purchase_receipt, commission_earned
+    to_address = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+
+    # Delivery state
+    status = Column(String, nullable=False, default="pending")  # pending, sending, sent, failed, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # The dispatcher claims the oldest pending/retryable emails first
+        Index("ix_email_outbox_status_created_at", "status", "created_at"),
+    )
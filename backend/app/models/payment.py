@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, JSON, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -33,6 +33,14 @@ class Transaction(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Keyset pagination of a user's transactions, optionally by status
+        Index("ix_transactions_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_transactions_user_status_created_at_id", "user_id", "status", "created_at", "id"),
+        # Webhook events are matched to their transaction by order id; one transaction per order
+        Index("ix_transactions_razorpay_order_id", "razorpay_order_id", unique=True),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="transactions")
 
@@ -56,12 +64,47 @@ class Commission(Base):
     status = Column(String, default="pending")  # pending, approved, paid, cancelled
     approved_at = Column(DateTime(timezone=True), nullable=True)
     paid_at = Column(DateTime(timezone=True), nullable=True)
+    payout_batch_id = Column(String, ForeignKey("payout_batches.id"), nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # One commission per earner per source transaction keeps settlement idempotent
+        UniqueConstraint("source_transaction_id", "user_id", name="uq_commissions_source_transaction_user"),
+        # Keyset pagination of a user's commissions, optionally by status
+        Index("ix_commissions_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_commissions_user_status_created_at_id", "user_id", "status", "created_at", "id"),
+        # Payout runs claim approved rows and stream a batch grouped by earner
+        Index("ix_commissions_status_payout_batch", "status", "payout_batch_id"),
+        Index("ix_commissions_payout_batch_user", "payout_batch_id", "user_id"),
+        # Leaderboards poll for commissions changed since their last look
+        Index("ix_commissions_updated_at", "updated_at"),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="commissions", foreign_keys=[user_id])
     source_transaction = relationship("Transaction", foreign_keys=[source_transaction_id])
-    referred_user = relationship("User", foreign_keys=[referred_user_id])
\ No newline at end of file
+    referred_user = relationship("User", foreign_keys=[referred_user_id])
+    payout_batch = relationship("PayoutBatch", back_populates="commissions")
+
+
+class PayoutBatch(Base):
+    __tablename__ = "payout_batches"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(String, nullable=False, default="claimed")  # claimed, completed, released
+    created_by = Column(String, ForeignKey("users.id"), nullable=True)
+    
+    # Totals, filled in when the export finishes
+    earner_count = Column(Integer, nullable=False, default=0)
+    commission_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    commissions = relationship("Commission", back_populates="payout_batch")
\ No newline at end of file
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class CourseNeighbor(Base):
+    """
+    Precomputed "learners also took" list: the courses most similar to
+    ``course_id`` by co-enrollment, best first.
+
+    ``score`` is the cosine similarity of the two courses' learner sets and
+    ``shared_learners`` the size of their overlap. Written only by the
+    recommendation job, so reads are a primary-key range scan.
+    """
+    __tablename__ = "course_neighbors"
+
+    course_id = Column(String, ForeignKey("courses.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 1 = most similar
+    neighbor_id = Column(String, ForeignKey("courses.id"), nullable=False)
+
+    score = Column(Float, nullable=False)
+    shared_learners = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Courses listing a given neighbor, refreshed when its learners change
+        Index("ix_course_neighbors_neighbor_id", "neighbor_id"),
+    )
+
+
+class RecommendationSource(Base):
+    """
+    Learner count of each course when its neighbors were last computed.
+
+    An incremental refresh recomputes only the courses whose count has moved
+    or that have enrolled learners since, plus the courses that share
+    learners with them.
+    """
+    __tablename__ = "recommendation_sources"
+
+    course_id = Column(String, ForeignKey("courses.id"), primary_key=True)
+    learners = Column(Integer, nullable=False)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
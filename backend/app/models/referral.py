@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, ForeignKey, Index
+from app.db.base import Base
+
+
+class ReferralPath(Base):
+    """
+    Closure table over ``User.referred_by``.
+
+    One row per (ancestor, descendant) pair with the number of hops between
+    them, including a depth-0 row for every user, so uplines and per-level
+    downline counts are single indexed range scans instead of recursive queries.
+    """
+    __tablename__ = "referral_paths"
+    
+    ancestor_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    descendant_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_referral_paths_ancestor_depth", "ancestor_id", "depth"),
+        Index("ix_referral_paths_descendant_depth", "descendant_id", "depth", "ancestor_id"),
+    )
+
+
+class ReferralClick(Base):
+    """
+    Referral-link clicks per referrer per hour.
+
+    Keyed by the referrer's user id, the value new signups get in
+    ``User.referred_by``, so clicks and signups join directly.
+    ``visitor_sketch`` is a HyperLogLog over hashed visitor identities:
+    unique visitors can be estimated for any range of hours by merging
+    sketches, without keeping IP addresses.
+    """
+    __tablename__ = "referral_clicks_hourly"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    hour_start = Column(DateTime(timezone=True), primary_key=True)  # UTC, truncated to the hour
+    
+    clicks = Column(Integer, nullable=False, default=0)
+    visitor_sketch = Column(LargeBinary, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -31,6 +31,14 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Keyset pagination (newest first) for the admin user list
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_package_created_at_id", "package_type", "created_at", "id"),
+        # Direct referrals of a user; the referral closure rebuild joins on it
+        Index("ix_users_referred_by", "referred_by"),
+    )
+    
     # Relationships
     referrer = relationship("User", remote_side=[id])
     enrollments = relationship("CourseEnrollment", back_populates="user")
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class RazorpayEvent(Base):
+    """
+    Inbox of verified Razorpay webhook deliveries.
+
+    The primary key is Razorpay's event id, so redelivered events are dropped
+    at insert time. Rows are acknowledged as soon as they are stored and
+    applied later by the webhook workers.
+    """
+    __tablename__ = "razorpay_events"
+    
+    id = Column(String, primary_key=True)  # X-Razorpay-Event-Id
+    event_type = Column(String, nullable=False)  # payment.captured, order.paid, payment.failed, ...
+    order_id = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)  # Raw request body, exactly as signed
+    
+    # Processing state
+    status = Column(String, nullable=False, default="pending")  # pending, processing, processed, ignored, failed, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Timestamps
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Workers claim the oldest pending/retryable events first
+        Index("ix_razorpay_events_status_received_at", "status", "received_at"),
+        Index("ix_razorpay_events_order_id", "order_id"),
+    )
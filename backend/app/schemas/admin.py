@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class PlatformStatsResponse(BaseModel):
+    total_users: int
+    active_users: int  # users holding a package
+    new_signups_today: int
+    total_revenue: float
+    pending_commissions: float
+    courses_completed: int
+    
+    class Config:
+        from_attributes = True
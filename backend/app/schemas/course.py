@@ -0,0 +1,78 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+from datetime import datetime
+
+
+class CourseSummary(BaseModel):
+    id: str
+    title: str
+    slug: Optional[str] = None
+    short_description: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    difficulty_level: Optional[str] = None
+    price: Optional[float] = None
+    required_package: Optional[str] = None
+    is_featured: Optional[bool] = None
+    tags: Optional[List[str]] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CourseDetail(CourseSummary):
+    description: Optional[str] = None
+    video_url: Optional[str] = None
+    content: Optional[Any] = None  # Syllabus outline: modules with lesson titles and durations
+
+
+class CourseSearchResult(BaseModel):
+    course: CourseSummary
+    score: float
+    title_highlight: str  # HTML-escaped, matched words wrapped in <mark>
+    snippet: str
+
+
+class CourseSearchResponse(BaseModel):
+    query: str
+    results: List[CourseSearchResult]
+
+
+class CourseRecommendation(BaseModel):
+    course: CourseSummary
+    score: float
+
+
+class RelatedCourse(CourseRecommendation):
+    shared_learners: int  # learners who took both courses
+
+
+class LessonResponse(BaseModel):
+    id: str
+    course_id: str
+    module_id: str
+    position: int
+    title: str
+    duration_minutes: Optional[int] = None
+    video_url: Optional[str] = None
+    body: Optional[Any] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class EnrollmentResponse(BaseModel):
+    id: str
+    course_id: str
+    progress_percentage: Optional[float] = None
+    completed_at: Optional[datetime] = None
+    last_accessed_at: Optional[datetime] = None
+    enrolled_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ProgressUpdate(BaseModel):
+    progress_percentage: float = Field(..., ge=0, le=100)
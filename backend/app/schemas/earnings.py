@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class EarningsSummaryResponse(BaseModel):
+    total_earnings: float
+    pending_earnings: float
+    paid_earnings: float
+    this_month: float
+    total_referrals: int
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,38 @@
+from datetime import date
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class LeaderboardWindow(str, Enum):
+    all = "all"
+    month = "month"
+    week = "week"
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    name: str  # first name and last initial
+    earnings: float
+
+
+class LeaderboardResponse(BaseModel):
+    window: LeaderboardWindow
+    period_start: Optional[date] = None
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardPosition(BaseModel):
+    window: LeaderboardWindow
+    rank: Optional[int] = None  # None until the user has approved earnings
+    earnings: float
+    ranked_users: int
+
+
+class AdminLeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    email: str
+    full_name: str
+    earnings: float
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class TransactionResponse(BaseModel):
+    id: str
+    amount: float
+    currency: Optional[str] = None
+    transaction_type: str
+    status: str
+    package_type: Optional[str] = None
+    razorpay_order_id: Optional[str] = None
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CommissionResponse(BaseModel):
+    id: str
+    amount: float
+    commission_type: str
+    commission_rate: float
+    source_transaction_id: Optional[str] = None
+    referred_user_id: str
+    status: Optional[str] = None
+    approved_at: Optional[datetime] = None
+    paid_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
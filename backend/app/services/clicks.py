@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.hyperloglog import HyperLogLog, hash64
+from app.db.base import AsyncSessionLocal
+from app.db.upsert import increment_upsert
+from app.models.referral import ReferralClick
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Keys per SELECT when reading back stored sketches during a flush
+SKETCH_READ_CHUNK = 500
+
+# Secret hash key: stored sketches cannot be tested for a known visitor
+_VISITOR_KEY = settings.SECRET_KEY.encode()
+
+# referral code -> referrer user id, so a viral link costs no query per click
+referrer_cache: TTLCache[str] = TTLCache(
+    maxsize=settings.REFERRAL_CODE_CACHE_SIZE,
+    ttl=settings.REFERRAL_CODE_CACHE_TTL_SECONDS,
+)
+
+# referral codes with no active owner; kept apart so a flood of bogus codes
+# cannot evict the real ones, and briefly, so a reactivated link works again soon
+unknown_code_cache: TTLCache[bool] = TTLCache(
+    maxsize=settings.REFERRAL_CODE_CACHE_SIZE,
+    ttl=settings.REFERRAL_CODE_UNKNOWN_TTL_SECONDS,
+)
+
+
+# Lookups in flight, so a burst of clicks on an uncached code runs one query
+_lookups: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
+
+async def _load_referrer(code: str) -> Optional[str]:
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(
+            select(User.id).where(User.referral_code == code, User.is_active.is_(True))
+        )
+    if user_id is not None:
+        referrer_cache.set(code, user_id)
+    else:
+        unknown_code_cache.set(code, True)
+    return user_id
+
+
+async def resolve_referrer(code: str) -> Optional[str]:
+    """Id of the active user owning ``code``; unknown codes are cached for a shorter time."""
+    user_id = referrer_cache.get(code)
+    if user_id is not None:
+        return user_id
+    if unknown_code_cache.get(code):
+        return None
+    lookup = _lookups.get(code)
+    if lookup is None:
+        lookup = _lookups[code] = asyncio.ensure_future(_load_referrer(code))
+        lookup.add_done_callback(lambda _: _lookups.pop(code, None))
+    return await asyncio.shield(lookup)
+
+
+def visitor_hash(client_ip: Optional[str], user_agent: Optional[str]) -> int:
+    return hash64(f"{client_ip or ''}|{user_agent or ''}", _VISITOR_KEY)
+
+
+def hour_start(at: datetime) -> datetime:
+    # SQLite hands back naive datetimes; every stored time is UTC
+    at = at.replace(tzinfo=timezone.utc) if at.tzinfo is None else at.astimezone(timezone.utc)
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class PendingClicks:
+    clicks: int = 0
+    visitors: HyperLogLog = field(default_factory=HyperLogLog)
+
+
+class ClickBuffer:
+    """
+    Per-worker buffered ingest for referral-link clicks.
+
+    Clicks are aggregated in memory per (referrer, hour): a counter plus a
+    HyperLogLog of hashed visitors. Every ``interval_ms``, or once
+    ``max_entries`` pairs are pending, the batch is written in one
+    transaction: an executemany upsert adds the click counts, which also locks
+    the rows, then the stored sketches are read back, merged with the batch's
+    and written where they changed. Holding the row locks across the merge
+    keeps concurrent flushes from other workers from losing visitors.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        interval_ms: int,
+        max_entries: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.max_entries = max_entries
+        self._pending: Dict[Tuple[str, datetime], PendingClicks] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.clicks = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, user_id: str, visitor: int, at: Optional[datetime] = None) -> None:
+        key = (user_id, hour_start(at or datetime.now(timezone.utc)))
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = PendingClicks()
+            if len(self._pending) >= self.max_entries:
+                self._wakeup.set()
+        pending.clicks += 1
+        pending.visitors.add_hash(visitor)
+        self.clicks += 1
+
+    def _merge_back(self, batch: Dict[Tuple[str, datetime], PendingClicks]) -> None:
+        for key, failed in batch.items():
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = failed
+                continue
+            pending.clicks += failed.clicks
+            pending.visitors.update(failed.visitors)
+
+    async def _write(self, db: AsyncSession, batch: Dict[Tuple[str, datetime], PendingClicks]) -> None:
+        await db.execute(
+            increment_upsert(ReferralClick, ["user_id", "hour_start"], ["clicks"]),
+            [
+                {
+                    "user_id": user_id,
+                    "hour_start": hour,
+                    "clicks": pending.clicks,
+                    "visitor_sketch": pending.visitors.to_bytes(),
+                }
+                for (user_id, hour), pending in batch.items()
+            ],
+        )
+
+        keys = list(batch)
+        changed: List[dict] = []
+        for offset in range(0, len(keys), SKETCH_READ_CHUNK):
+            chunk = keys[offset:offset + SKETCH_READ_CHUNK]
+            stored = await db.execute(
+                select(ReferralClick.user_id, ReferralClick.hour_start, ReferralClick.visitor_sketch)
+                .where(tuple_(ReferralClick.user_id, ReferralClick.hour_start).in_(chunk))
+            )
+            for user_id, hour, sketch in stored:
+                pending = batch.get((user_id, hour_start(hour)))
+                if pending is None:
+                    continue
+                merged = HyperLogLog(sketch)
+                merged.update(pending.visitors)
+                registers = merged.to_bytes()
+                if registers != sketch:
+                    changed.append({"u": user_id, "h": hour, "sketch": registers})
+
+        if changed:
+            table = ReferralClick.__table__
+            await db.execute(
+                update(table)
+                .where(table.c.user_id == bindparam("u"), table.c.hour_start == bindparam("h"))
+                .values(visitor_sketch=bindparam("sketch")),
+                changed,
+            )
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+
+            started = time.perf_counter()
+            try:
+                async with self.session_factory() as db:
+                    await self._write(db, batch)
+                    await db.commit()
+            except Exception:
+                self.failed_flushes += 1
+                self._merge_back(batch)
+                raise
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.flushes += 1
+            self.rows_written += len(batch)
+            return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Click flush failed; %d entries requeued", len(self._pending))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "clicks": self.clicks,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "referrer_cache": referrer_cache.stats(),
+            "unknown_code_cache": unknown_code_cache.stats(),
+        }
+
+
+click_buffer = ClickBuffer(
+    session_factory=AsyncSessionLocal,
+    interval_ms=settings.CLICK_FLUSH_INTERVAL_MS,
+    max_entries=settings.CLICK_FLUSH_MAX_ENTRIES,
+)
+
+
+@dataclass
+class DailyClicks:
+    day: date
+    clicks: int = 0
+    unique_visitors: int = 0
+    signups: int = 0
+
+
+@dataclass
+class ClickStats:
+    clicks: int = 0
+    unique_visitors: int = 0
+    signups: int = 0
+    conversion_rate: float = 0.0  # signups per 100 unique visitors
+    days: List[DailyClicks] = field(default_factory=list)
+
+
+async def get_click_stats(db: AsyncSession, user_id: str, days: int) -> ClickStats:
+    """
+    Clicks, estimated unique visitors and signups through ``user_id``'s link
+    for the last ``days`` UTC days, in total and per day.
+
+    Unique visitors are the size of the merged hourly sketches, so a visitor
+    who comes back on several days counts once in the total. Clicks still in
+    a worker's buffer are not included.
+    """
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=days - 1)
+    since = datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+
+    per_day: Dict[date, DailyClicks] = {}
+    day_sketches: Dict[date, HyperLogLog] = {}
+    for i in range(days):
+        day = first_day + timedelta(days=i)
+        per_day[day] = DailyClicks(day=day)
+
+    rows = await db.execute(
+        select(ReferralClick.hour_start, ReferralClick.clicks, ReferralClick.visitor_sketch)
+        .where(ReferralClick.user_id == user_id, ReferralClick.hour_start >= since)
+    )
+    for hour, clicks, sketch in rows:
+        day = hour_start(hour).date()
+        if day not in per_day:
+            continue
+        per_day[day].clicks += clicks
+        day_sketches.setdefault(day, HyperLogLog()).update(HyperLogLog(sketch))
+
+    signup_day = func.date(User.created_at)
+    signups = await db.execute(
+        select(signup_day, func.count())
+        .where(User.referred_by == user_id, User.created_at >= since)
+        .group_by(signup_day)
+    )
+    for day, count in signups:
+        day = date.fromisoformat(day) if isinstance(day, str) else day
+        if day in per_day:
+            per_day[day].signups += count
+
+    for day, sketch in day_sketches.items():
+        per_day[day].unique_visitors = sketch.estimate()
+
+    stats = ClickStats(days=list(per_day.values()))
+    stats.clicks = sum(day.clicks for day in stats.days)
+    stats.signups = sum(day.signups for day in stats.days)
+    stats.unique_visitors = HyperLogLog.union(day_sketches.values()).estimate()
+    if stats.unique_visitors:
+        stats.conversion_rate = round(stats.signups / stats.unique_visitors * 100, 2)
+    return stats
@@ -0,0 +1,202 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import exists, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.payment import Commission, Transaction
+from app.models.referral import ReferralPath
+from app.services.earnings import RollupDelta
+from app.services.emails import commission_emails, queue_emails
+from app.services.platform_stats import PENDING_COMMISSIONS_PAISE, PlatformDelta, paise
+
+# Transaction types that pay commissions to the buyer's upline
+COMMISSIONABLE_TRANSACTION_TYPES = ("package_purchase",)
+
+# Allowed status transitions and the timestamp column each one stamps
+STATUS_TRANSITIONS: Dict[str, Dict[str, Optional[str]]] = {
+    "approved": {"from": ("pending",), "timestamp": "approved_at"},
+    "paid": {"from": ("approved",), "timestamp": "paid_at"},
+    "cancelled": {"from": ("pending", "approved"), "timestamp": None},
+}
+
+
+@dataclass
+class SettlementResult:
+    transactions: int = 0
+    commissions: int = 0
+    batches: int = 0
+
+
+def _commission_type(level: int) -> str:
+    return "direct" if level == 1 else "indirect"
+
+
+def unsettled_transactions_query():
+    """Completed purchases whose buyer has an upline and that have no commissions yet."""
+    has_upline = exists().where(
+        ReferralPath.descendant_id == Transaction.user_id,
+        ReferralPath.depth == 1,
+    )
+    already_settled = exists().where(Commission.source_transaction_id == Transaction.id)
+    return select(Transaction.id).where(
+        Transaction.status == "completed",
+        Transaction.transaction_type.in_(COMMISSIONABLE_TRANSACTION_TYPES),
+        has_upline,
+        ~already_settled,
+    )
+
+
+def _commission_rows(
+    db: Session, transaction_ids: List[str], rates: Sequence[float], created_at: datetime
+) -> List[dict]:
+    upline_rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.user_id,
+            Transaction.amount,
+            ReferralPath.ancestor_id,
+            ReferralPath.depth,
+        )
+        .join(ReferralPath, ReferralPath.descendant_id == Transaction.user_id)
+        .where(
+            Transaction.id.in_(transaction_ids),
+            ReferralPath.depth.between(1, len(rates)),
+        )
+    )
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": ancestor_id,
+            "amount": round(amount * rates[depth - 1] / 100, 2),
+            "commission_type": _commission_type(depth),
+            "commission_rate": rates[depth - 1],
+            "source_transaction_id": transaction_id,
+            "referred_user_id": buyer_id,
+            "status": "pending",
+            "created_at": created_at,
+        }
+        for transaction_id, buyer_id, amount, ancestor_id, depth in upline_rows
+    ]
+
+
+def settle_transactions(
+    db: Session,
+    transaction_ids: Optional[Iterable[str]] = None,
+    batch_size: Optional[int] = None,
+    rates: Optional[Sequence[float]] = None,
+    emails: bool = True,
+) -> SettlementResult:
+    """
+    Create pending commissions for completed purchases, batch by batch.
+
+    Each batch is one keyset SELECT of unsettled transaction ids, one SELECT
+    joining them to their uplines in the referral closure table, and one
+    executemany INSERT plus the matching earnings rollup upsert and
+    "commission earned" emails, committed together. Transactions that already have
+    commissions are skipped, so re-running (or running concurrently, thanks to
+    the unique constraint) never pays twice. Pass ``transaction_ids`` to
+    settle specific transactions, e.g. right after a payment completes, and
+    ``emails=False`` for bulk loads that should not notify anyone.
+    """
+    rates = list(rates if rates is not None else settings.commission_level_rates)
+    batch_size = batch_size or settings.COMMISSION_SETTLEMENT_BATCH_SIZE
+    result = SettlementResult()
+    if not rates:
+        return result
+
+    candidates = unsettled_transactions_query()
+    if transaction_ids is not None:
+        candidates = candidates.where(Transaction.id.in_(list(transaction_ids)))
+
+    cursor = None
+    while True:
+        batch_query = candidates.order_by(Transaction.id).limit(batch_size)
+        if cursor is not None:
+            batch_query = batch_query.where(Transaction.id > cursor)
+        batch = list(db.scalars(batch_query))
+        if not batch:
+            break
+
+        now = datetime.now(timezone.utc)
+        rows = _commission_rows(db, batch, rates, now)
+        if rows:
+            db.execute(insert(Commission), rows)
+            rollups = RollupDelta()
+            platform = PlatformDelta()
+            for row in rows:
+                rollups.add(row["user_id"], now, "pending", row["amount"])
+                platform.add(PENDING_COMMISSIONS_PAISE, paise(row["amount"]))
+            rollups.apply(db)
+            platform.apply(db)
+            if emails:
+                queue_emails(db, commission_emails(db, rows))
+        db.commit()
+
+        cursor = batch[-1]
+        result.batches += 1
+        result.transactions += len(batch)
+        result.commissions += len(rows)
+
+    return result
+
+
+def transition_commissions(
+    db: Session,
+    to_status: str,
+    commission_ids: Optional[Iterable[str]] = None,
+    user_id: Optional[str] = None,
+    created_before: Optional[datetime] = None,
+) -> int:
+    """
+    Move commissions to ``to_status`` with one UPDATE per source status.
+
+    Only rows in a valid source status are touched, ``approved_at`` /
+    ``paid_at`` are stamped in the same statement, and the earnings rollups
+    and the platform's pending total are adjusted from the RETURNING rows.
+    Returns the number of commissions changed; the caller commits.
+    """
+    if to_status not in STATUS_TRANSITIONS:
+        raise ValueError(f"Unknown commission status: {to_status}")
+    transition = STATUS_TRANSITIONS[to_status]
+    now = datetime.now(timezone.utc)
+
+    values = {"status": to_status, "updated_at": now}
+    if transition["timestamp"]:
+        values[transition["timestamp"]] = now
+
+    if commission_ids is not None:
+        # Read once: every source status below filters on the same ids
+        commission_ids = list(commission_ids)
+
+    changed = 0
+    rollups = RollupDelta()
+    platform = PlatformDelta()
+    # One UPDATE per source status so RETURNING tells us which rollup bucket to debit
+    for from_status in transition["from"]:
+        stmt = update(Commission).where(Commission.status == from_status)
+        if commission_ids is not None:
+            stmt = stmt.where(Commission.id.in_(commission_ids))
+        if user_id is not None:
+            stmt = stmt.where(Commission.user_id == user_id)
+        if created_before is not None:
+            stmt = stmt.where(Commission.created_at < created_before)
+
+        updated = db.execute(
+            stmt.values(**values)
+            .returning(Commission.user_id, Commission.created_at, Commission.amount)
+            .execution_options(synchronize_session=False)
+        )
+        for earner_id, created_at, amount in updated:
+            rollups.add(earner_id, created_at, from_status, -amount, -1)
+            rollups.add(earner_id, created_at, to_status, amount)
+            if from_status == "pending":
+                platform.add(PENDING_COMMISSIONS_PAISE, -paise(amount))
+            changed += 1
+
+    rollups.apply(db)
+    platform.apply(db)
+    return changed
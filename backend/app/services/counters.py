@@ -0,0 +1,21 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.upsert import increment_upsert
+from app.models.counter import Counter
+
+
+def increment_statement():
+    return increment_upsert(Counter, ["name"], ["value"])
+
+
+def increment_counter(db: Session, name: str, amount: int = 1) -> None:
+    """Add ``amount`` to counter ``name`` inside the caller's transaction."""
+    db.execute(increment_statement(), [{"name": name, "value": amount}])
+
+
+async def read_counter(db: AsyncSession, name: str) -> Optional[int]:
+    return await db.scalar(select(Counter.value).where(Counter.name == name))
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.upsert import increment_upsert
+from app.models.earnings import EarningsRollup
+from app.models.payment import Commission
+from app.models.user import User
+
+REFERRAL = "referral"
+PERIODS = ("day", "month")
+
+# (user_id, period, period_start, status) -> [amount, count]
+RollupKey = Tuple[str, str, date, str]
+
+
+def _period_starts(at: Optional[datetime]) -> Tuple[date, date]:
+    at = at or datetime.now(timezone.utc)
+    day = at.date()
+    return day, day.replace(day=1)
+
+
+class RollupDelta:
+    """Accumulates rollup changes so one executemany upsert applies them all."""
+
+    def __init__(self) -> None:
+        self._deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0.0, 0])
+
+    def add(self, user_id: str, at: Optional[datetime], status: str, amount: float, count: int = 1) -> None:
+        day, month = _period_starts(at)
+        for period, period_start in zip(PERIODS, (day, month)):
+            entry = self._deltas[(user_id, period, period_start, status)]
+            entry[0] += amount
+            entry[1] += count
+
+    def rows(self) -> List[dict]:
+        return [
+            {
+                "user_id": user_id,
+                "period": period,
+                "period_start": period_start,
+                "status": status,
+                "amount": round(amount, 2),
+                "count": count,
+            }
+            for (user_id, period, period_start, status), (amount, count) in self._deltas.items()
+        ]
+
+    def statement(self):
+        return increment_upsert(
+            EarningsRollup,
+            ["user_id", "period", "period_start", "status"],
+            ["amount", "count"],
+        )
+
+    def apply(self, db: Session) -> None:
+        rows = self.rows()
+        if rows:
+            db.execute(self.statement(), rows)
+
+    async def apply_async(self, db: AsyncSession) -> None:
+        rows = self.rows()
+        if rows:
+            await db.execute(self.statement(), rows)
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+
+async def record_referral(db: AsyncSession, referrer_id: str, at: Optional[datetime] = None) -> None:
+    delta = RollupDelta()
+    delta.add(referrer_id, at, REFERRAL, 0.0)
+    await delta.apply_async(db)
+
+
+@dataclass
+class EarningsSummary:
+    total_earnings: float = 0.0
+    pending_earnings: float = 0.0
+    paid_earnings: float = 0.0
+    this_month: float = 0.0
+    total_referrals: int = 0
+
+
+async def get_earnings_summary(db: AsyncSession, user_id: str) -> EarningsSummary:
+    """Dashboard totals from the user's monthly rollup rows only."""
+    _, current_month = _period_starts(None)
+    rows = await db.execute(
+        select(
+            EarningsRollup.period_start,
+            EarningsRollup.status,
+            EarningsRollup.amount,
+            EarningsRollup.count,
+        ).where(EarningsRollup.user_id == user_id, EarningsRollup.period == "month")
+    )
+
+    summary = EarningsSummary()
+    for period_start, status, amount, count in rows:
+        if status == REFERRAL:
+            summary.total_referrals += count
+            continue
+        if status == "cancelled":
+            continue
+        summary.total_earnings += amount
+        if status == "paid":
+            summary.paid_earnings += amount
+        else:
+            summary.pending_earnings += amount
+        if period_start == current_month:
+            summary.this_month += amount
+
+    for name in ("total_earnings", "pending_earnings", "paid_earnings", "this_month"):
+        setattr(summary, name, round(getattr(summary, name), 2))
+    return summary
+
+
+@dataclass
+class RebuildReport:
+    rows: int = 0
+    drifted: List[dict] = field(default_factory=list)
+
+
+def rebuild_rollups(db: Session, dry_run: bool = False, chunk_size: int = 10000) -> RebuildReport:
+    """
+    Recompute every rollup from ``commissions`` and ``users.referred_by``.
+
+    The ledger is streamed with ``yield_per`` and aggregated through the same
+    ``RollupDelta`` used for incremental updates. Rows that differ from the
+    stored rollups are reported, then the table is replaced unless ``dry_run``.
+    """
+    expected = RollupDelta()
+    commissions = db.execute(
+        select(Commission.user_id, Commission.created_at, Commission.status, Commission.amount)
+        .execution_options(yield_per=chunk_size)
+    )
+    for user_id, created_at, status, amount in commissions:
+        expected.add(user_id, created_at, status, amount)
+
+    referrals = db.execute(
+        select(User.referred_by, User.created_at)
+        .where(User.referred_by.is_not(None))
+        .execution_options(yield_per=chunk_size)
+    )
+    for referrer_id, created_at in referrals:
+        expected.add(referrer_id, created_at, REFERRAL, 0.0)
+
+    expected_rows = {
+        (row["user_id"], row["period"], row["period_start"], row["status"]): row
+        for row in expected.rows()
+    }
+    stored_rows = {
+        (row.user_id, row.period, row.period_start, row.status): {"amount": row.amount, "count": row.count}
+        for row in db.execute(select(EarningsRollup)).scalars()
+    }
+
+    report = RebuildReport(rows=len(expected_rows))
+    for key in expected_rows.keys() | stored_rows.keys():
+        want = expected_rows.get(key, {"amount": 0.0, "count": 0})
+        have = stored_rows.get(key, {"amount": 0.0, "count": 0})
+        if want["count"] != have["count"] or abs(want["amount"] - have["amount"]) > 0.005:
+            user_id, period, period_start, status = key
+            report.drifted.append({
+                "user_id": user_id,
+                "period": period,
+                "period_start": period_start.isoformat(),
+                "status": status,
+                "expected_amount": round(want["amount"], 2),
+                "stored_amount": round(have["amount"], 2),
+                "expected_count": want["count"],
+                "stored_count": have["count"],
+            })
+
+    if not dry_run:
+        db.execute(delete(EarningsRollup))
+        rows = list(expected_rows.values())
+        for start in range(0, len(rows), chunk_size):
+            db.execute(insert(EarningsRollup), rows[start:start + chunk_size])
+        db.commit()
+
+    return report
@@ -0,0 +1,383 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formatdate, parseaddr
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.upsert import dialect_insert
+from app.models.email import EmailOutbox
+from app.models.payment import Transaction
+from app.models.user import User
+from app.services.smtp import MESSAGE_ERRORS, SMTPConnection, is_permanent
+
+logger = logging.getLogger(__name__)
+
+# (claimed outbox row, error or None when sent)
+Delivery = Tuple[Any, Optional[Exception]]
+
+
+def _rupees(amount: float) -> str:
+    return f"₹{amount:,.2f}"
+
+
+def _email(kind: str, key: str, to_address: str, subject: str, body: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "dedupe_key": f"{kind}:{key}",
+        "kind": kind,
+        "to_address": to_address,
+        "subject": subject,
+        "body": body,
+        "status": "pending",
+        "attempts": 0,
+    }
+
+
+def welcome_email(user: User) -> dict:
+    return _email(
+        "welcome", user.id, user.email,
+        f"Welcome to {settings.PROJECT_NAME}",
+        f"Hi {user.full_name},\n\n"
+        f"Your {settings.PROJECT_NAME} account is ready. Browse the courses at "
+        f"{settings.FRONTEND_URL}/courses.\n\n"
+        f"Your referral code is {user.referral_code}. Share it and earn a commission "
+        f"on every package your referrals buy.\n",
+    )
+
+
+def purchase_receipt_email(user: User, transaction: Transaction, payment_id: Optional[str], paid_at: datetime) -> dict:
+    item = f"{transaction.package_type.title()} package" if transaction.package_type else transaction.description
+    return _email(
+        "purchase_receipt", transaction.id, user.email,
+        f"Your {settings.PROJECT_NAME} receipt",
+        f"Hi {user.full_name},\n\n"
+        f"Thank you for your purchase.\n\n"
+        f"Item: {item or transaction.transaction_type}\n"
+        f"Amount paid: {_rupees(transaction.amount)}\n"
+        f"Date: {paid_at:%d %b %Y %H:%M} UTC\n"
+        f"Order: {transaction.razorpay_order_id}\n"
+        f"Payment: {payment_id or '-'}\n",
+    )
+
+
+def commission_emails(db: Session, commissions: Sequence[dict]) -> List[dict]:
+    """One email per new commission row, as built by the settlement job."""
+    earners = {
+        user_id: (email, name)
+        for user_id, email, name in db.execute(
+            select(User.id, User.email, User.full_name)
+            .where(User.id.in_({row["user_id"] for row in commissions}))
+        )
+    }
+    emails = []
+    for row in commissions:
+        email, name = earners[row["user_id"]]
+        level = "a direct referral" if row["commission_type"] == "direct" else "your extended network"
+        emails.append(_email(
+            "commission_earned", row["id"], email,
+            f"You earned a {_rupees(row['amount'])} commission",
+            f"Hi {name},\n\n"
+            f"A purchase by {level} earned you {_rupees(row['amount'])} "
+            f"({row['commission_rate']:g}%). It is pending until approved.\n\n"
+            f"Track your earnings at {settings.FRONTEND_URL}/earnings.\n",
+        ))
+    return emails
+
+
+def outbox_insert():
+    """INSERT that skips emails whose ``dedupe_key`` is already queued."""
+    return dialect_insert(EmailOutbox.__table__).on_conflict_do_nothing(index_elements=["dedupe_key"])
+
+
+def queue_emails(db: Session, emails: Sequence[dict]) -> None:
+    """
+    Add ``emails`` to the outbox in the caller's transaction; the caller
+    commits. Rows are written even while SMTP is not configured, so they are
+    sent once a dispatcher with SMTP settings starts.
+    """
+    if emails:
+        db.execute(outbox_insert(), list(emails))
+
+
+async def queue_emails_async(db: AsyncSession, emails: Sequence[dict]) -> None:
+    if emails:
+        await db.execute(outbox_insert(), list(emails))
+
+
+def _ready_condition(now: datetime):
+    stale = now - timedelta(seconds=settings.EMAIL_CLAIM_TIMEOUT_SECONDS)
+    return or_(
+        EmailOutbox.status == "pending",
+        and_(EmailOutbox.status == "failed", EmailOutbox.next_attempt_at <= now),
+        # Claimed by a dispatcher that died before recording the outcome
+        and_(EmailOutbox.status == "sending", EmailOutbox.claimed_at < stale),
+    )
+
+
+def claim_emails_query(now: datetime, limit: int):
+    """UPDATE ... RETURNING that marks the ``limit`` oldest ready emails as sending."""
+    ready = _ready_condition(now)
+    oldest = (
+        select(EmailOutbox.id)
+        .where(ready)
+        .order_by(EmailOutbox.created_at, EmailOutbox.id)
+        .limit(limit)
+    )
+    return (
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(oldest.scalar_subquery()), ready)
+        .values(status="sending", claimed_at=now)
+        .returning(
+            EmailOutbox.id,
+            EmailOutbox.to_address,
+            EmailOutbox.subject,
+            EmailOutbox.body,
+            EmailOutbox.attempts,
+            EmailOutbox.created_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim_emails(db: Session, limit: int) -> list:
+    """Atomically mark up to ``limit`` ready emails as sending and return them oldest first."""
+    now = datetime.now(timezone.utc)
+    rows = db.execute(claim_emails_query(now, limit)).all()
+    db.commit()
+    rows.sort(key=lambda row: (row.created_at, row.id))
+    return rows
+
+
+def build_message(row) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = row.to_address
+    message["Subject"] = row.subject
+    message["Date"] = formatdate(usegmt=True)
+    # The same on every attempt, so a copy resent after a lost acknowledgement
+    # is recognisable as a duplicate
+    domain = parseaddr(settings.EMAIL_FROM)[1].rpartition("@")[2] or "localhost"
+    message["Message-ID"] = f"<{row.id}@{domain}>"
+    message.set_content(row.body)
+    return message
+
+
+def send_batch(connection: SMTPConnection, rows: Sequence[Any]) -> List[Delivery]:
+    """
+    Send ``rows`` over one session. A rejected message does not stop the
+    batch; a session failure does, and the rest of the batch is retried later.
+    """
+    deliveries: List[Delivery] = []
+    for index, row in enumerate(rows):
+        try:
+            connection.send(build_message(row))
+            deliveries.append((row, None))
+        except MESSAGE_ERRORS as exc:
+            deliveries.append((row, exc))
+        except Exception as exc:
+            deliveries.extend((pending, exc) for pending in rows[index:])
+            break
+    return deliveries
+
+
+def retry_update():
+    table = EmailOutbox.__table__
+    return (
+        update(table)
+        .where(table.c.id == bindparam("i"))
+        .values(
+            status=bindparam("s"),
+            attempts=bindparam("n"),
+            last_error=bindparam("e"),
+            next_attempt_at=bindparam("at"),
+        )
+    )
+
+
+def record_deliveries(db: Session, deliveries: Sequence[Delivery]) -> Dict[str, int]:
+    """
+    Store the outcome of a sent batch in one transaction and count outcomes.
+
+    Failed emails are retried after ``EMAIL_RETRY_BASE_SECONDS``, doubling
+    per attempt, until ``EMAIL_MAX_ATTEMPTS``; a permanent (5xx) rejection
+    is dead at once.
+    """
+    now = datetime.now(timezone.utc)
+    outcomes: Dict[str, int] = {}
+    sent = [row.id for row, error in deliveries if error is None]
+    if sent:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(sent))
+            .values(status="sent", sent_at=now, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        outcomes["sent"] = len(sent)
+
+    retries = []
+    for row, error in deliveries:
+        if error is None:
+            continue
+        attempts = row.attempts + 1
+        dead = is_permanent(error) or attempts >= settings.EMAIL_MAX_ATTEMPTS
+        retries.append({
+            "i": row.id,
+            "s": "dead" if dead else "failed",
+            "n": attempts,
+            "e": str(error) or error.__class__.__name__,
+            "at": None if dead else now + timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1)),
+        })
+        outcomes[retries[-1]["s"]] = outcomes.get(retries[-1]["s"], 0) + 1
+    if retries:
+        db.execute(retry_update(), retries)
+    db.commit()
+    return outcomes
+
+
+def drain_outbox(db: Session, connection: SMTPConnection, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Claim and send ready emails in the calling thread until none are left."""
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    outcomes: Dict[str, int] = {}
+    while True:
+        claimed = claim_emails(db, batch_size)
+        if not claimed:
+            return outcomes
+        for outcome, count in record_deliveries(db, send_batch(connection, claimed)).items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + count
+
+
+def smtp_connection() -> SMTPConnection:
+    return SMTPConnection(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        starttls=settings.SMTP_STARTTLS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    )
+
+
+class EmailDispatcher:
+    """
+    Per-process sender that delivers the email outbox in the background.
+
+    Each round claims up to ``batch_size`` ready emails, oldest first, and
+    splits them across ``connections`` SMTP sessions that send in parallel on
+    threads. Sessions stay open between rounds, so a batch pays no connection
+    or login handshake. Outcomes of the whole batch are then written in one
+    transaction. The dispatcher wakes on ``notify()`` and also polls, picking
+    up retries and emails queued by other processes. Requests only insert
+    outbox rows, so their latency never depends on the mail server.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        connection_factory: Callable[[], SMTPConnection],
+        connections: int,
+        batch_size: int,
+        poll_seconds: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.connection_factory = connection_factory
+        self.connections = max(1, connections)
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._pool: List[SMTPConnection] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.batches = 0
+        self.outcomes: Dict[str, int] = {}
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _claim(self) -> list:
+        db = self.session_factory()
+        try:
+            return claim_emails(db, self.batch_size)
+        finally:
+            db.close()
+
+    def _record(self, deliveries: List[Delivery]) -> Dict[str, int]:
+        db = self.session_factory()
+        try:
+            return record_deliveries(db, deliveries)
+        finally:
+            db.close()
+
+    async def _send_round(self) -> int:
+        claimed = await asyncio.to_thread(self._claim)
+        if not claimed:
+            return 0
+        shares = [claimed[i::len(self._pool)] for i in range(len(self._pool))]
+        results = await asyncio.gather(*(
+            asyncio.to_thread(send_batch, connection, share)
+            for connection, share in zip(self._pool, shares) if share
+        ))
+        outcomes = await asyncio.to_thread(self._record, [delivery for result in results for delivery in result])
+        self.batches += 1
+        for outcome, count in outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        return len(claimed)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                if await self._send_round() == self.batch_size:
+                    self._wakeup.set()
+            except Exception:
+                logger.exception("Sending queued emails failed")
+
+    def start(self) -> None:
+        # Without SMTP settings emails stay queued until a configured process starts
+        if self._task is not None or not settings.email_enabled:
+            return
+        self._stopping = False
+        self._pool = [self.connection_factory() for _ in range(self.connections)]
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Finish the batch being sent, then close the SMTP sessions."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await asyncio.gather(*(asyncio.to_thread(connection.close) for connection in self._pool))
+        self._pool = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "connections": len(self._pool),
+            "smtp_sessions": sum(connection.sessions for connection in self._pool),
+            "batches": self.batches,
+            "outcomes": dict(self.outcomes),
+        }
+
+
+email_dispatcher = EmailDispatcher(
+    session_factory=SessionLocal,
+    connection_factory=smtp_connection,
+    connections=settings.EMAIL_CONNECTIONS,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_POLL_SECONDS,
+)
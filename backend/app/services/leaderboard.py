@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.ranking import RankedBoard
+from app.db.base import SessionLocal
+from app.models.earnings import EarningsRollup
+from app.models.payment import Commission
+from app.models.user import User
+from app.services.platform_stats import paise
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ("all", "month", "week")
+# Commission statuses that count as earned; pending may still be cancelled
+EARNED_STATUSES = ("approved", "paid")
+# Earners rescored per rollup query
+RESCORE_CHUNK = 500
+
+# window -> user_id -> earnings in paise
+Scores = Dict[str, Dict[str, int]]
+
+
+def window_starts(at: datetime) -> Dict[str, Optional[date]]:
+    """First day of each window containing ``at``; weeks start on Monday."""
+    day = at.date()
+    return {"all": None, "month": day.replace(day=1), "week": day - timedelta(days=day.weekday())}
+
+
+def scan_ledger(db: Session, starts: Dict[str, Optional[date]], chunk_size: int) -> Scores:
+    """Earnings per window from one streaming pass over the earned commissions."""
+    totals: Scores = {window: defaultdict(int) for window in WINDOWS}
+    rows = db.execute(
+        select(Commission.user_id, Commission.created_at, Commission.amount)
+        .where(Commission.status.in_(EARNED_STATUSES))
+        .execution_options(yield_per=chunk_size)
+    )
+    for user_id, created_at, amount in rows:
+        day = created_at.date()
+        amount = paise(amount)
+        for window, start in starts.items():
+            if start is None or day >= start:
+                totals[window][user_id] += amount
+    return totals
+
+
+def changed_earners_query(since: Optional[datetime]):
+    stmt = select(Commission.user_id).where(Commission.updated_at.is_not(None))
+    if since is not None:
+        stmt = stmt.where(Commission.updated_at >= since)
+    return stmt
+
+
+def rescore_query(user_ids: List[str], starts: Dict[str, Optional[date]]):
+    """Monthly rollups for all-time and this month, daily ones for this week."""
+    return select(
+        EarningsRollup.user_id, EarningsRollup.period, EarningsRollup.period_start, EarningsRollup.amount,
+    ).where(
+        EarningsRollup.user_id.in_(user_ids),
+        EarningsRollup.status.in_(EARNED_STATUSES),
+        or_(
+            EarningsRollup.period == "month",
+            and_(EarningsRollup.period == "day", EarningsRollup.period_start >= starts["week"]),
+        ),
+    )
+
+
+def rescore(db: Session, user_ids: Iterable[str], starts: Dict[str, Optional[date]]) -> Scores:
+    """Current earnings of ``user_ids`` in every window, read from their rollups."""
+    user_ids = list(user_ids)
+    amounts = {window: dict.fromkeys(user_ids, 0.0) for window in WINDOWS}
+    for offset in range(0, len(user_ids), RESCORE_CHUNK):
+        chunk = user_ids[offset:offset + RESCORE_CHUNK]
+        for user_id, period, period_start, amount in db.execute(rescore_query(chunk, starts)):
+            if period == "day":
+                amounts["week"][user_id] += amount
+                continue
+            amounts["all"][user_id] += amount
+            if period_start == starts["month"]:
+                amounts["month"][user_id] += amount
+    return {
+        window: {user_id: paise(amount) for user_id, amount in by_user.items()}
+        for window, by_user in amounts.items()
+    }
+
+
+class Leaderboard:
+    """
+    Per-worker top-earner rankings for the all-time, monthly and weekly windows.
+
+    Boards are built at startup from a streaming scan of the commission
+    ledger, then kept current by polling for commissions updated since the
+    last poll: only their earners are rescored, from the earnings rollups,
+    so an approval shows up within ``poll_seconds`` in every worker without
+    re-sorting anyone else. Polls re-read the last ``overlap_seconds`` so a
+    transaction that commits after later ones is not missed. A new month or
+    week triggers a full rebuild.
+
+    Database reads run on a thread; the boards are only changed on the
+    event loop, so reads never see a half-applied update.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        poll_seconds: float,
+        overlap_seconds: float = 120,
+        chunk_size: int = 10000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.chunk_size = chunk_size
+        self._boards: Dict[str, RankedBoard] = {window: RankedBoard() for window in WINDOWS}
+        self._starts: Dict[str, Optional[date]] = {}
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.rebuilds = 0
+        self.last_rebuild_ms = 0.0
+        self.polls = 0
+        self.rescored = 0
+        self.failed_polls = 0
+
+    def _rebuild(self, starts: Dict[str, Optional[date]]) -> Tuple[Dict[str, RankedBoard], Optional[datetime]]:
+        db = self.session_factory()
+        try:
+            # Read before the scan: anything committed during it is picked up by the next poll
+            watermark = db.scalar(select(func.max(Commission.updated_at)))
+            totals = scan_ledger(db, starts, self.chunk_size)
+            return {window: RankedBoard(totals[window].items()) for window in WINDOWS}, watermark
+        finally:
+            db.close()
+
+    def _changes(self, starts: Dict[str, Optional[date]], since: Optional[datetime]) -> Tuple[Scores, Optional[datetime]]:
+        db = self.session_factory()
+        try:
+            watermark = db.scalar(select(func.max(Commission.updated_at)))
+            if watermark is None:
+                return {}, None
+            # No DISTINCT: it would make the planner walk a user_id index instead of the updated_at range
+            changed = set(db.scalars(changed_earners_query(since - self.overlap if since else None)))
+            return rescore(db, changed, starts), watermark
+        finally:
+            db.close()
+
+    async def refresh(self) -> None:
+        starts = window_starts(datetime.now(timezone.utc))
+        if not self.ready or starts != self._starts:
+            started = time.perf_counter()
+            boards, watermark = await asyncio.to_thread(self._rebuild, starts)
+            self._boards, self._starts, self._watermark = boards, starts, watermark
+            self.ready = True
+            self.rebuilds += 1
+            self.last_rebuild_ms = round((time.perf_counter() - started) * 1000, 2)
+            return
+
+        scores, watermark = await asyncio.to_thread(self._changes, self._starts, self._watermark)
+        for window, by_user in scores.items():
+            board = self._boards[window]
+            for user_id, score in by_user.items():
+                board.set(user_id, score)
+        self._watermark = watermark
+        self.polls += 1
+        self.rescored += len(scores.get("all", ()))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                self.failed_polls += 1
+                logger.exception("Refreshing the leaderboard failed")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def period_start(self, window: str) -> Optional[date]:
+        return self._starts.get(window)
+
+    def top(self, window: str, count: int) -> List[Tuple[int, str, int]]:
+        return self._boards[window].top(count)
+
+    def position(self, window: str, user_id: str) -> Tuple[Optional[int], int, int]:
+        """``(rank, score, ranked members)``; rank is None for users with no earnings."""
+        board = self._boards[window]
+        return board.rank(user_id), board.score(user_id), len(board)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "ranked": {window: len(board) for window, board in self._boards.items()},
+            "rebuilds": self.rebuilds,
+            "last_rebuild_ms": self.last_rebuild_ms,
+            "polls": self.polls,
+            "rescored": self.rescored,
+            "failed_polls": self.failed_polls,
+        }
+
+
+leaderboard = Leaderboard(session_factory=SessionLocal, poll_seconds=settings.LEADERBOARD_POLL_SECONDS)
+
+
+async def ranked_users(db: AsyncSession, window: str, count: int) -> List[Tuple[int, User, float]]:
+    """The top ``count`` of ``window`` as ``(rank, user, earnings)``, loading only those users."""
+    top = leaderboard.top(window, count)
+    users = {
+        user.id: user
+        for user in await db.scalars(select(User).where(User.id.in_([user_id for _, user_id, _ in top])))
+    }
+    return [(rank, users[user_id], score / 100) for rank, user_id, score in top if user_id in users]
@@ -0,0 +1,181 @@
+import logging
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+
+from app.models.course import Course, CourseModule, Lesson
+
+logger = logging.getLogger(__name__)
+
+# Ids are derived from the lesson's position so re-exploding keeps links stable
+_ID_NAMESPACE = uuid.UUID("6f1c1f9e-6c3b-4f57-9a55-6d0f2d8b7a10")
+
+# Keys of an authored lesson that map onto Lesson columns; the rest go to ``body``
+_LESSON_COLUMNS = {"title": "title", "duration": "duration_minutes", "video_url": "video_url"}
+
+
+def _entries(course_id: str, value: Any, where: str) -> List[Any]:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        logger.warning("Course %s: %s is not a list; skipped", course_id, where)
+        return []
+    return value
+
+
+def _typed(value: Any, kind: type) -> Any:
+    return value if isinstance(value, kind) and not isinstance(value, bool) else None
+
+
+def _explode(course_id: str, content: Any) -> Tuple[List[dict], List[dict]]:
+    """
+    Module and lesson rows for one course's ``content``.
+
+    Runs inside a flush, so malformed entries are logged and skipped rather
+    than raised: a bad syllabus must not abort the transaction that wrote it
+    along with unrelated changes. Skipped entries keep their positions, so
+    ids do not shift when they are fixed.
+    """
+    modules: List[dict] = []
+    lessons: List[dict] = []
+    if not isinstance(content, dict):
+        return modules, lessons
+
+    for module_position, module in enumerate(_entries(course_id, content.get("modules"), "modules")):
+        if not isinstance(module, dict):
+            logger.warning("Course %s: module %d is not an object; skipped", course_id, module_position)
+            continue
+        module_id = str(uuid.uuid5(_ID_NAMESPACE, f"{course_id}:{module_position}"))
+        modules.append({
+            "id": module_id,
+            "course_id": course_id,
+            "position": module_position,
+            "title": _typed(module.get("title"), str) or f"Module {module_position + 1}",
+        })
+        where = f"module {module_position} lessons"
+        for lesson_position, lesson in enumerate(_entries(course_id, module.get("lessons"), where)):
+            if not isinstance(lesson, dict):
+                logger.warning(
+                    "Course %s: lesson %d.%d is not an object; skipped", course_id, module_position, lesson_position
+                )
+                continue
+            row = {
+                "id": str(uuid.uuid5(_ID_NAMESPACE, f"{course_id}:{module_position}:{lesson_position}")),
+                "course_id": course_id,
+                "module_id": module_id,
+                "position": lesson_position,
+                "title": _typed(lesson.get("title"), str) or f"Lesson {lesson_position + 1}",
+                "duration_minutes": _typed(lesson.get("duration"), int),
+                "video_url": _typed(lesson.get("video_url"), str),
+            }
+            body = {key: value for key, value in lesson.items() if key not in _LESSON_COLUMNS}
+            row["body"] = body or None
+            lessons.append(row)
+    return modules, lessons
+
+
+def _replace_outlines(db: Session, courses: Sequence[Tuple[str, Any]]) -> Tuple[int, int]:
+    """Replace the modules and lessons of ``(course_id, content)`` pairs; returns ``(modules, lessons)``."""
+    ids = [course_id for course_id, _ in courses]
+    db.execute(delete(Lesson).where(Lesson.course_id.in_(ids)))
+    db.execute(delete(CourseModule).where(CourseModule.course_id.in_(ids)))
+    modules: List[dict] = []
+    lessons: List[dict] = []
+    for course_id, content in courses:
+        course_modules, course_lessons = _explode(course_id, content)
+        modules.extend(course_modules)
+        lessons.extend(course_lessons)
+    if modules:
+        db.execute(insert(CourseModule), modules)
+    if lessons:
+        db.execute(insert(Lesson), lessons)
+    return len(modules), len(lessons)
+
+
+def explode_course_content(
+    db: Session, course_ids: Optional[Iterable[str]] = None, batch_size: int = 500
+) -> Tuple[int, int]:
+    """
+    Rebuild the module/lesson store from ``Course.content`` blobs, for bulk
+    writes that bypass the ORM (ORM writes are exploded on flush).
+
+    Course ids are listed first, then ``content`` is read ``batch_size``
+    courses at a time; each batch replaces its modules and lessons with two
+    executemany INSERTs. Safe to re-run, and lesson ids are stable across
+    runs. Returns ``(modules, lessons)`` written.
+    """
+    id_query = select(Course.id).order_by(Course.id)
+    if course_ids is not None:
+        id_query = id_query.where(Course.id.in_(list(course_ids)))
+    all_ids = list(db.scalars(id_query))
+
+    total_modules = total_lessons = 0
+    for start in range(0, len(all_ids), batch_size):
+        ids = all_ids[start:start + batch_size]
+        batch = db.execute(select(Course.id, Course.content).where(Course.id.in_(ids))).all()
+        modules, lessons = _replace_outlines(db, batch)
+        db.commit()
+        total_modules += modules
+        total_lessons += lessons
+
+    return total_modules, total_lessons
+
+
+# ORM writes to Course.content re-explode that course in the same transaction,
+# so readers never see modules and lessons that lag the authored copy
+@event.listens_for(Session, "after_flush")
+def _explode_on_content_write(session: Session, flush_context: Any) -> None:
+    courses = [
+        (obj.id, obj.content)
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Course) and inspect(obj).attrs.content.history.has_changes()
+    ]
+    if courses:
+        _replace_outlines(session, courses)
+
+
+async def load_outlines(db: AsyncSession) -> Dict[str, dict]:
+    """
+    ``{course_id: {"modules": [...]}}`` for every active course.
+
+    Only lesson titles and durations are read. The shape matches the authored
+    ``content`` blob so clients can render the syllabus without downloading
+    any lesson bodies.
+    """
+    modules_by_course: Dict[str, List[dict]] = defaultdict(list)
+    modules_by_id: Dict[str, dict] = {}
+    module_rows = await db.execute(
+        select(CourseModule.id, CourseModule.course_id, CourseModule.title)
+        .join(Course, Course.id == CourseModule.course_id)
+        .where(Course.is_active.is_(True))
+        .order_by(CourseModule.course_id, CourseModule.position)
+    )
+    for module_id, course_id, title in module_rows:
+        module = {"id": module_id, "title": title, "lessons": []}
+        modules_by_course[course_id].append(module)
+        modules_by_id[module_id] = module
+
+    lesson_rows = await db.execute(
+        select(Lesson.id, Lesson.module_id, Lesson.title, Lesson.duration_minutes)
+        .join(Course, Course.id == Lesson.course_id)
+        .where(Course.is_active.is_(True))
+        .order_by(Lesson.course_id, Lesson.module_id, Lesson.position)
+    )
+    for lesson_id, module_id, title, duration in lesson_rows:
+        module = modules_by_id.get(module_id)
+        if module is not None:
+            module["lessons"].append({"id": lesson_id, "title": title, "duration": duration})
+
+    return {course_id: {"modules": modules} for course_id, modules in modules_by_course.items()}
+
+
+async def get_lesson(db: AsyncSession, course_id: str, lesson_id: str) -> Optional[Lesson]:
+    return await db.scalar(
+        select(Lesson)
+        .where(Lesson.id == lesson_id, Lesson.course_id == course_id)
+        .options(undefer(Lesson.body))
+    )
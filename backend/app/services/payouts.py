@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.payment import Commission, PayoutBatch
+from app.models.user import User
+from app.services.commissions import transition_commissions
+
+PAYOUT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+CSV_COLUMNS = ["user_id", "email", "full_name", "phone", "commission_count", "amount"]
+
+CHUNK_SIZE = 5000
+# Lines buffered into each chunk written to the response
+LINES_PER_WRITE = 500
+
+
+def create_payout_batch(
+    db: Session,
+    created_by: Optional[str] = None,
+    created_before: Optional[datetime] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> PayoutBatch:
+    """
+    Claim every unbatched approved commission for a new payout batch.
+
+    Rows are tagged with the batch id ``chunk_size`` at a time, one committed
+    UPDATE per chunk, so the claim never holds a long write lock. Commissions
+    stay ``approved`` until the batch export has been fully written.
+    """
+    batch = PayoutBatch(created_by=created_by)
+    db.add(batch)
+    db.commit()
+
+    while True:
+        unclaimed = select(Commission.id).where(
+            Commission.status == "approved",
+            Commission.payout_batch_id.is_(None),
+        )
+        if created_before is not None:
+            unclaimed = unclaimed.where(Commission.created_at < created_before)
+        claimed = db.execute(
+            update(Commission)
+            .where(
+                Commission.id.in_(unclaimed.limit(chunk_size).scalar_subquery()),
+                Commission.payout_batch_id.is_(None),
+            )
+            .values(payout_batch_id=batch.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            break
+
+    return batch
+
+
+def _earner_totals(db: Session, batch_id: str, chunk_size: int) -> Iterator[dict]:
+    """Stream the batch ordered by earner and fold it into one total per earner."""
+    rows = db.execute(
+        select(Commission.user_id, Commission.amount, User.email, User.full_name, User.phone)
+        .join(User, User.id == Commission.user_id)
+        .where(
+            Commission.payout_batch_id == batch_id,
+            Commission.status.in_(("approved", "paid")),
+        )
+        .order_by(Commission.user_id)
+        .execution_options(yield_per=chunk_size)
+    )
+    current = None
+    for user_id, amount, email, full_name, phone in rows:
+        if current is None or current["user_id"] != user_id:
+            if current is not None:
+                yield current
+            current = {
+                "user_id": user_id,
+                "email": email,
+                "full_name": full_name,
+                "phone": phone,
+                "commission_count": 0,
+                "amount": 0.0,
+            }
+        current["commission_count"] += 1
+        current["amount"] += amount
+    if current is not None:
+        yield current
+
+
+def _csv_line(earner: dict) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(earner[column] for column in CSV_COLUMNS)
+    return buffer.getvalue()
+
+
+def _ndjson_line(earner: dict) -> str:
+    return json.dumps(earner, separators=(",", ":")) + "\n"
+
+
+def mark_batch_paid(db: Session, batch_id: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """Move the batch's approved commissions to paid, one committed chunk at a time."""
+    paid = 0
+    while True:
+        ids = list(db.scalars(
+            select(Commission.id)
+            .where(Commission.payout_batch_id == batch_id, Commission.status == "approved")
+            .limit(chunk_size)
+        ))
+        if not ids:
+            return paid
+        paid += transition_commissions(db, "paid", commission_ids=ids)
+        db.commit()
+
+
+def release_payout_batch(db: Session, batch_id: str) -> int:
+    """Return the batch's unpaid commissions to the pool, so the next batch claims them."""
+    released = db.execute(
+        update(Commission)
+        .where(Commission.payout_batch_id == batch_id, Commission.status == "approved")
+        .values(payout_batch_id=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.execute(update(PayoutBatch).where(PayoutBatch.id == batch_id).values(status="released"))
+    db.commit()
+    return released
+
+
+def stream_payout(
+    session_factory: Callable[[], Session],
+    batch_id: str,
+    fmt: str = "csv",
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Yield the payout file for ``batch_id`` with constant memory.
+
+    Commissions are read through a server-side cursor (``yield_per``) in
+    earner order, so only the current earner's running total is held. Once
+    the last line has been produced the batch's commissions are marked paid
+    and the totals recorded. If the client disconnects first, nothing is
+    marked paid and the batch is released: its commissions go back to the
+    pool for the next batch. A completed batch can be exported again.
+    """
+    to_line = _csv_line if fmt == "csv" else _ndjson_line
+    earners = commissions = 0
+    total = 0.0
+
+    finished = False
+    reader = session_factory()
+    try:
+        lines: List[str] = []
+        if fmt == "csv":
+            lines.append(",".join(CSV_COLUMNS) + "\r\n")
+        for earner in _earner_totals(reader, batch_id, chunk_size):
+            earner["amount"] = round(earner["amount"], 2)
+            earners += 1
+            commissions += earner["commission_count"]
+            total += earner["amount"]
+            lines.append(to_line(earner))
+            if len(lines) >= LINES_PER_WRITE:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+        finished = True
+    finally:
+        # Release the read transaction before writing; SQLite cannot commit
+        # while another connection is still reading
+        reader.close()
+        if not finished:
+            writer = session_factory()
+            try:
+                release_payout_batch(writer, batch_id)
+            finally:
+                writer.close()
+
+    writer = session_factory()
+    try:
+        mark_batch_paid(writer, batch_id, chunk_size)
+        batch = writer.get(PayoutBatch, batch_id)
+        batch.earner_count = earners
+        batch.commission_count = commissions
+        batch.total_amount = round(total, 2)
+        batch.status = "completed"
+        batch.completed_at = datetime.now(timezone.utc)
+        writer.commit()
+    finally:
+        writer.close()
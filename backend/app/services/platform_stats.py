@@ -0,0 +1,258 @@
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.upsert import dialect_insert
+from app.models.counter import Counter
+from app.models.course import CourseEnrollment
+from app.models.payment import Commission, Transaction
+from app.models.user import User
+from app.services.counters import increment_statement
+
+logger = logging.getLogger(__name__)
+
+# Platform totals kept in ``counters``; money is stored in paise so it adds exactly
+TOTAL_USERS = "platform_total_users"
+ACTIVE_USERS = "platform_active_users"  # users holding a package
+REVENUE_PAISE = "platform_revenue_paise"
+PENDING_COMMISSIONS_PAISE = "platform_pending_commissions_paise"
+COURSES_COMPLETED = "platform_courses_completed"
+SIGNUPS_PREFIX = "platform_signups_"  # one counter per UTC day
+
+# Completed transactions of these types count as revenue
+REVENUE_TRANSACTION_TYPES = ("package_purchase",)
+# Daily signup counters older than this are dropped by the reconciler
+SIGNUP_DAYS_KEPT = 7
+
+
+def paise(amount: float) -> int:
+    return round(amount * 100)
+
+
+def signups_counter(day: Optional[date] = None) -> str:
+    return SIGNUPS_PREFIX + (day or datetime.now(timezone.utc).date()).isoformat()
+
+
+class PlatformDelta:
+    """
+    Counter changes made by one transaction, applied with one executemany upsert.
+
+    Rows are written in name order, so concurrent transactions lock the
+    counters they share in the same order and cannot deadlock on them.
+    """
+
+    def __init__(self) -> None:
+        self._deltas: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, amount: int = 1) -> None:
+        self._deltas[name] += amount
+
+    def rows(self) -> List[dict]:
+        return [{"name": name, "value": value} for name, value in sorted(self._deltas.items()) if value]
+
+    def apply(self, db: Session) -> None:
+        rows = self.rows()
+        if rows:
+            db.execute(increment_statement(), rows)
+
+    async def apply_async(self, db: AsyncSession) -> None:
+        rows = self.rows()
+        if rows:
+            await db.execute(increment_statement(), rows)
+
+
+async def record_signup(db: AsyncSession) -> None:
+    delta = PlatformDelta()
+    delta.add(TOTAL_USERS)
+    delta.add(signups_counter())
+    await delta.apply_async(db)
+
+
+@dataclass
+class PlatformStats:
+    total_users: int = 0
+    active_users: int = 0
+    new_signups_today: int = 0
+    total_revenue: float = 0.0
+    pending_commissions: float = 0.0
+    courses_completed: int = 0
+
+
+def platform_stats_query(today: str):
+    names = [TOTAL_USERS, ACTIVE_USERS, REVENUE_PAISE, PENDING_COMMISSIONS_PAISE, COURSES_COMPLETED, today]
+    return select(Counter.name, Counter.value).where(Counter.name.in_(names))
+
+
+async def get_platform_stats(db: AsyncSession) -> PlatformStats:
+    """Admin overview totals: one primary-key lookup per counter, at any table size."""
+    today = signups_counter()
+    values = dict((await db.execute(platform_stats_query(today))).all())
+    return PlatformStats(
+        total_users=values.get(TOTAL_USERS, 0),
+        active_users=values.get(ACTIVE_USERS, 0),
+        new_signups_today=values.get(today, 0),
+        total_revenue=values.get(REVENUE_PAISE, 0) / 100,
+        pending_commissions=values.get(PENDING_COMMISSIONS_PAISE, 0) / 100,
+        courses_completed=values.get(COURSES_COMPLETED, 0),
+    )
+
+
+def _exact_values(today: date) -> Dict[str, Any]:
+    """Scalar subqueries computing each counter from its source table."""
+    since = datetime.combine(today, time.min, tzinfo=timezone.utc)
+    count = func.count()
+    return {
+        TOTAL_USERS: select(count).select_from(User),
+        ACTIVE_USERS: select(count).select_from(User).where(User.package_type.is_not(None)),
+        REVENUE_PAISE: select(func.coalesce(func.sum(func.round(Transaction.amount * 100)), 0)).where(
+            Transaction.status == "completed",
+            Transaction.transaction_type.in_(REVENUE_TRANSACTION_TYPES),
+        ),
+        PENDING_COMMISSIONS_PAISE: select(func.coalesce(func.sum(func.round(Commission.amount * 100)), 0)).where(
+            Commission.status == "pending"
+        ),
+        COURSES_COMPLETED: select(count).select_from(CourseEnrollment).where(
+            CourseEnrollment.completed_at.is_not(None)
+        ),
+        signups_counter(today): select(count).select_from(User).where(User.created_at >= since),
+    }
+
+
+@dataclass
+class ReconcileReport:
+    checked: int = 0
+    drifted: List[dict] = field(default_factory=list)
+    corrected: int = 0
+    # Counters that moved between the check and the correction; retried next run
+    skipped: int = 0
+
+
+def reconcile_counters(db: Session, dry_run: bool = False) -> ReconcileReport:
+    """
+    Recompute every platform counter from the source tables and fix drift.
+
+    The exact values and the stored counters are read by a single SELECT, so
+    both come from one snapshot without locking anything. A drifted counter
+    is then set to its exact value only if it still holds the value that was
+    read; a counter bumped by a concurrent write in between is skipped rather
+    than overwritten, which also makes concurrent reconcilers harmless.
+    """
+    exact = _exact_values(datetime.now(timezone.utc).date())
+    names = list(exact)
+    columns = []
+    for index, name in enumerate(names):
+        columns.append(exact[name].scalar_subquery().label(f"exact_{index}"))
+        columns.append(select(Counter.value).where(Counter.name == name).scalar_subquery().label(f"stored_{index}"))
+    row = db.execute(select(*columns)).one()
+
+    report = ReconcileReport(checked=len(names))
+    for index, name in enumerate(names):
+        want, have = int(row[2 * index] or 0), row[2 * index + 1]
+        if want == (have or 0):
+            continue
+        report.drifted.append({"counter": name, "expected": want, "stored": have})
+        if dry_run:
+            continue
+        if have is None:
+            stmt = dialect_insert(Counter.__table__).values(name=name, value=want).on_conflict_do_nothing()
+        else:
+            stmt = (
+                update(Counter)
+                .where(Counter.name == name, Counter.value == have)
+                .values(value=want)
+                .execution_options(synchronize_session=False)
+            )
+        if db.execute(stmt).rowcount:
+            report.corrected += 1
+        else:
+            report.skipped += 1
+
+    if not dry_run:
+        oldest = datetime.now(timezone.utc).date() - timedelta(days=SIGNUP_DAYS_KEPT - 1)
+        db.execute(
+            delete(Counter).where(
+                Counter.name.startswith(SIGNUPS_PREFIX, autoescape=True),
+                Counter.name < signups_counter(oldest),
+            )
+        )
+        db.commit()
+    return report
+
+
+class PlatformStatsReconciler:
+    """
+    Per-process background task running ``reconcile_counters`` on startup,
+    which also fills the counters of a database that predates them, and then
+    every ``interval_seconds``.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], interval_seconds: float) -> None:
+        self.session_factory = session_factory
+        self.interval = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.corrected = 0
+        self.skipped = 0
+        self.failed_runs = 0
+        self.last_drifted: List[dict] = []
+
+    def _reconcile(self) -> ReconcileReport:
+        db = self.session_factory()
+        try:
+            return reconcile_counters(db)
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                report = await asyncio.to_thread(self._reconcile)
+            except Exception:
+                self.failed_runs += 1
+                logger.exception("Reconciling platform counters failed")
+            else:
+                self.runs += 1
+                self.corrected += report.corrected
+                self.skipped += report.skipped
+                self.last_drifted = report.drifted
+                if report.drifted:
+                    logger.warning("Corrected drift in platform counters: %s", report.drifted)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "corrected": self.corrected,
+            "skipped": self.skipped,
+            "failed_runs": self.failed_runs,
+            "last_drifted": self.last_drifted,
+        }
+
+
+platform_reconciler = PlatformStatsReconciler(
+    session_factory=SessionLocal,
+    interval_seconds=settings.PLATFORM_STATS_RECONCILE_SECONDS,
+)
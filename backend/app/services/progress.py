@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.base import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.models.course import CourseEnrollment
+from app.services.platform_stats import COURSES_COMPLETED, PlatformDelta
+
+logger = logging.getLogger(__name__)
+
+COMPLETE = 100.0
+
+
+def _greatest(*args):
+    # SQLite's multi-argument max() is its GREATEST
+    return func.greatest(*args) if settings.is_postgresql else func.max(*args)
+
+
+def progress_upsert():
+    """
+    Upsert of ``course_enrollments`` keyed on (user_id, course_id).
+
+    Progress and last access only move forward, so out-of-order flushes from
+    several workers converge on the same row. ``completed_at`` is left to
+    ``completion_update``.
+    """
+    table = CourseEnrollment.__table__
+    stmt = dialect_insert(table)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "course_id"],
+        set_={
+            "progress_percentage": _greatest(
+                func.coalesce(table.c.progress_percentage, 0.0), excluded.progress_percentage
+            ),
+            "last_accessed_at": _greatest(
+                func.coalesce(table.c.last_accessed_at, excluded.last_accessed_at),
+                excluded.last_accessed_at,
+            ),
+        },
+    )
+
+
+def completion_update():
+    """Stamp ``completed_at`` only on enrollments not completed yet, so each completion counts once."""
+    table = CourseEnrollment.__table__
+    return (
+        update(table)
+        .where(
+            table.c.user_id == bindparam("u"),
+            table.c.course_id == bindparam("c"),
+            table.c.completed_at.is_(None),
+        )
+        .values(completed_at=bindparam("at"))
+    )
+
+
+@dataclass
+class PendingProgress:
+    progress: float
+    accessed_at: datetime
+    completed_at: Optional[datetime] = None
+
+
+class ProgressBuffer:
+    """
+    Per-worker write-behind buffer for course player heartbeats.
+
+    Heartbeats are coalesced in memory per (user, course), keeping the highest
+    progress and the latest access time, and written as one executemany
+    upsert every ``interval_ms`` or as soon as ``max_entries`` pairs are
+    pending. A heartbeat that completes a course triggers an early flush, and
+    the buffer is drained on shutdown, so only in-progress positions are at
+    risk if a worker dies.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        interval_ms: int,
+        max_entries: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.max_entries = max_entries
+        self._pending: Dict[Tuple[str, str], PendingProgress] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.heartbeats = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, user_id: str, course_id: str, progress: float, at: Optional[datetime] = None) -> None:
+        at = at or datetime.now(timezone.utc)
+        progress = min(max(progress, 0.0), COMPLETE)
+        self.heartbeats += 1
+
+        key = (user_id, course_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = PendingProgress(progress=progress, accessed_at=at)
+        else:
+            pending.progress = max(pending.progress, progress)
+            pending.accessed_at = max(pending.accessed_at, at)
+
+        if pending.progress >= COMPLETE and pending.completed_at is None:
+            pending.completed_at = at
+            self._wakeup.set()
+        elif len(self._pending) >= self.max_entries:
+            self._wakeup.set()
+
+    def _merge_back(self, batch: Dict[Tuple[str, str], PendingProgress]) -> None:
+        # Requeue a failed batch under anything recorded while it was in flight
+        for key, failed in batch.items():
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = failed
+                continue
+            pending.progress = max(pending.progress, failed.progress)
+            pending.accessed_at = max(pending.accessed_at, failed.accessed_at)
+            if failed.completed_at is not None:
+                pending.completed_at = min(filter(None, (pending.completed_at, failed.completed_at)))
+
+    async def _complete(self, db: AsyncSession, completions: List[dict]) -> None:
+        # One statement per completion: the rowcount tells which ones are new,
+        # and completions are rare next to heartbeats
+        completed = 0
+        statement = completion_update()
+        for completion in completions:
+            completed += (await db.execute(statement, completion)).rowcount
+        platform = PlatformDelta()
+        platform.add(COURSES_COMPLETED, completed)
+        await platform.apply_async(db)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "course_id": course_id,
+                    "progress_percentage": pending.progress,
+                    "last_accessed_at": pending.accessed_at,
+                }
+                for (user_id, course_id), pending in batch.items()
+            ]
+            completions = [
+                {"u": user_id, "c": course_id, "at": pending.completed_at}
+                for (user_id, course_id), pending in batch.items()
+                if pending.completed_at is not None
+            ]
+
+            started = time.perf_counter()
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(progress_upsert(), rows)
+                    if completions:
+                        await self._complete(db, completions)
+                    await db.commit()
+            except Exception:
+                self.failed_flushes += 1
+                self._merge_back(batch)
+                raise
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Progress flush failed; %d entries requeued", len(self._pending))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "heartbeats": self.heartbeats,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+progress_buffer = ProgressBuffer(
+    session_factory=AsyncSessionLocal,
+    interval_ms=settings.PROGRESS_FLUSH_INTERVAL_MS,
+    max_entries=settings.PROGRESS_FLUSH_MAX_ENTRIES,
+)
@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """Razorpay's webhook signature: hex HMAC-SHA256 of the raw body."""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: str, secret: str) -> bool:
+    return hmac.compare_digest(sign_payload(body, secret), signature)
+
+
+def _razorpay_id(prefix: str) -> str:
+    return f"{prefix}_{secrets.token_hex(7)}"
+
+
+@dataclass
+class WebhookDelivery:
+    event_id: str
+    body: bytes
+    headers: Dict[str, str]
+
+
+class LocalRazorpay:
+    """
+    Local stand-in for Razorpay: issues order ids and produces signed webhook
+    deliveries shaped like the real ones, for load runs and manual testing
+    without network access or a Razorpay account.
+    """
+
+    def __init__(self, webhook_secret: str) -> None:
+        self.webhook_secret = webhook_secret
+
+    def create_order(self, amount: float, receipt: Optional[str] = None, currency: str = "INR") -> dict:
+        return {
+            "id": _razorpay_id("order"),
+            "entity": "order",
+            "amount": round(amount * 100),  # paise
+            "currency": currency,
+            "receipt": receipt,
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+
+    def event(self, event_type: str, order: dict, error: Optional[str] = None) -> WebhookDelivery:
+        payment = {
+            "id": _razorpay_id("pay"),
+            "entity": "payment",
+            "amount": order["amount"],
+            "currency": order["currency"],
+            "order_id": order["id"],
+            "status": "failed" if event_type == "payment.failed" else "captured",
+        }
+        if error:
+            payment["error_description"] = error
+        payload = {"payment": {"entity": payment}}
+        if event_type == "order.paid":
+            payload["order"] = {"entity": {**order, "status": "paid", "amount_paid": order["amount"]}}
+
+        event_id = _razorpay_id("evt")
+        body = json.dumps({
+            "entity": "event",
+            "event": event_type,
+            "contains": list(payload),
+            "payload": payload,
+            "created_at": int(time.time()),
+        }).encode()
+        return WebhookDelivery(
+            event_id=event_id,
+            body=body,
+            headers={
+                "Content-Type": "application/json",
+                "X-Razorpay-Event-Id": event_id,
+                "X-Razorpay-Signature": sign_payload(body, self.webhook_secret),
+            },
+        )
@@ -0,0 +1,317 @@
+import heapq
+import math
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.course import CourseEnrollment
+from app.models.recommendation import CourseNeighbor, RecommendationSource
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # the pure-Python path computes the same neighbors, only slower
+    np = sparse = None
+
+# Courses whose similarity rows come out of one sparse matrix product
+BATCH_SIZE = 256
+# An incremental refresh touching more of the catalog than this recomputes all of it
+FULL_REFRESH_SHARE = 0.5
+# Ids per IN list when deleting and reading by course
+CHUNK_SIZE = 500
+# Enrollments this long before a list was computed still count as new, covering
+# transactions that committed after the job read the learner counts
+SINCE_OVERLAP = timedelta(minutes=10)
+# Rows read past the requested limit, covering inactive courses the API skips
+LIMIT_MARGIN = 10
+
+# course_id -> [(neighbor_id, score, shared_learners)], best first
+Neighbors = Dict[str, List[Tuple[str, float, int]]]
+
+
+@dataclass
+class RefreshReport:
+    full: bool
+    changed: int = 0  # courses whose learner count moved (incremental runs)
+    courses: int = 0  # courses whose neighbors were recomputed
+    neighbors: int = 0  # rows written
+    enrollments: int = 0  # enrollments read
+    vectorized: bool = False
+    elapsed_ms: float = 0.0
+
+
+def learner_counts_query():
+    """Learner count and latest ``enrolled_at`` of every course."""
+    return (
+        select(CourseEnrollment.course_id, func.count(), func.max(CourseEnrollment.enrolled_at))
+        .group_by(CourseEnrollment.course_id)
+    )
+
+
+def co_enrollments_query(course_ids: Optional[Sequence[str]]):
+    """Every enrollment of the learners of ``course_ids`` (None: of everyone), grouped by learner."""
+    stmt = select(CourseEnrollment.user_id, CourseEnrollment.course_id).order_by(CourseEnrollment.user_id)
+    if course_ids is not None:
+        learners = select(CourseEnrollment.user_id).where(CourseEnrollment.course_id.in_(course_ids))
+        stmt = stmt.where(CourseEnrollment.user_id.in_(learners))
+    return stmt
+
+
+def _chunks(values: Sequence[str]) -> Iterable[List[str]]:
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _ranked(course_id: str, shared: Dict[str, int], counts: Dict[str, int], k: int) -> List[Tuple[str, float, int]]:
+    # Cosine of two binary learner vectors: overlap / sqrt(|A| * |B|); ties go to
+    # the larger overlap, then the lower id, so both code paths agree exactly
+    norm = math.sqrt(counts[course_id])
+    candidates = (
+        (-(count / (norm * math.sqrt(counts[other]))), -count, other)
+        for other, count in shared.items()
+        if other != course_id
+    )
+    return [(other, -score, -count) for score, count, other in heapq.nsmallest(k, candidates)]
+
+
+def _neighbors_python(
+    pairs: Sequence[Tuple[str, str]], counts: Dict[str, int], targets: Sequence[str], k: int
+) -> Neighbors:
+    by_user: Dict[str, Set[str]] = defaultdict(set)
+    by_course: Dict[str, Set[str]] = defaultdict(set)
+    for user_id, course_id in pairs:
+        if course_id in counts:
+            by_user[user_id].add(course_id)
+            by_course[course_id].add(user_id)
+
+    neighbors: Neighbors = {}
+    for course_id in targets:
+        shared: Counter = Counter()
+        for user_id in by_course[course_id]:
+            shared.update(by_user[user_id])
+        neighbors[course_id] = _ranked(course_id, shared, counts, k)
+    return neighbors
+
+
+def _neighbors_sparse(
+    pairs: Sequence[Tuple[str, str]], counts: Dict[str, int], targets: Sequence[str], k: int
+) -> Neighbors:
+    # Columns in id order, so sorting by column index breaks ties by id
+    courses = sorted(counts)
+    column = {course_id: index for index, course_id in enumerate(courses)}
+    # Pairs come grouped by learner: a new row starts wherever the user id changes
+    user_ids = np.fromiter((user_id for user_id, _ in pairs), dtype=object, count=len(pairs))
+    columns = np.fromiter((column.get(course_id, -1) for _, course_id in pairs), dtype=np.int64, count=len(pairs))
+    rows = np.concatenate(([0], np.cumsum(user_ids[1:] != user_ids[:-1])))
+    known = columns >= 0
+
+    # learners x courses; a pair read twice is summed, then counted once
+    learners = sparse.csr_matrix(
+        (np.ones(int(known.sum()), dtype=np.int32), (rows[known], columns[known])),
+        shape=(int(rows[-1]) + 1 if len(rows) else 0, len(courses)),
+    )
+    learners.sum_duplicates()
+    learners.data[:] = 1
+    by_course = learners.T.tocsr()
+    norms = np.sqrt(np.array([counts[course_id] for course_id in courses], dtype=np.float64))
+
+    neighbors: Neighbors = {}
+    for start in range(0, len(targets), BATCH_SIZE):
+        batch = targets[start:start + BATCH_SIZE]
+        indexes = [column[course_id] for course_id in batch]
+        # batch x courses: how many learners each target shares with every course
+        overlap = (by_course[indexes] @ learners).tocsr()
+        for row, (course_id, index) in enumerate(zip(batch, indexes)):
+            lo, hi = overlap.indptr[row], overlap.indptr[row + 1]
+            others, shared = overlap.indices[lo:hi], overlap.data[lo:hi]
+            keep = others != index
+            others, shared = others[keep], shared[keep]
+            scores = shared / (norms[index] * norms[others])
+            # lexsort's last key sorts first: best score, then larger overlap, then lower id
+            order = np.lexsort((others, -shared, -scores))[:k]
+            neighbors[course_id] = [
+                (courses[others[i]], float(scores[i]), int(shared[i])) for i in order
+            ]
+    return neighbors
+
+
+def compute_neighbors(
+    pairs: Sequence[Tuple[str, str]], counts: Dict[str, int], targets: Sequence[str], k: int
+) -> Neighbors:
+    """
+    Top ``k`` neighbors of each course in ``targets`` by cosine similarity.
+
+    ``pairs`` are (user_id, course_id) enrollments covering every learner of
+    the targets, grouped by user as ``co_enrollments_query`` returns them;
+    ``counts`` are the learner totals of all courses. Uses a sparse matrix
+    product when NumPy and SciPy are installed.
+    """
+    compute = _neighbors_python if sparse is None else _neighbors_sparse
+    return compute(pairs, counts, targets, k)
+
+
+def _store(db: Session, neighbors: Neighbors, counts: Dict[str, int], targets: Set[str], full: bool) -> int:
+    if full:
+        db.execute(delete(CourseNeighbor))
+        db.execute(delete(RecommendationSource))
+    else:
+        for chunk in _chunks(sorted(targets)):
+            db.execute(delete(CourseNeighbor).where(CourseNeighbor.course_id.in_(chunk)))
+            db.execute(delete(RecommendationSource).where(RecommendationSource.course_id.in_(chunk)))
+
+    rows = [
+        {"course_id": course_id, "rank": rank, "neighbor_id": neighbor_id, "score": score, "shared_learners": shared}
+        for course_id, ranked in neighbors.items()
+        for rank, (neighbor_id, score, shared) in enumerate(ranked, start=1)
+    ]
+    sources = [{"course_id": course_id, "learners": counts[course_id]} for course_id in targets if course_id in counts]
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(CourseNeighbor), rows[start:start + 5000])
+    for start in range(0, len(sources), 5000):
+        db.execute(insert(RecommendationSource), sources[start:start + 5000])
+    return len(rows)
+
+
+def _new_learners_query(course_ids: Sequence[str], since: Optional[datetime]):
+    """Courses taken by whoever enrolled in ``course_ids`` at or after ``since`` (None: ever)."""
+    learners = select(CourseEnrollment.user_id).where(CourseEnrollment.course_id.in_(course_ids))
+    if since is not None:
+        learners = learners.where(CourseEnrollment.enrolled_at >= since)
+    return select(CourseEnrollment.course_id).where(CourseEnrollment.user_id.in_(learners))
+
+
+def stale_courses(
+    db: Session,
+    counts: Dict[str, int],
+    latest: Dict[str, Optional[datetime]],
+    sources: Dict[str, Tuple[int, Optional[datetime]]],
+) -> Tuple[Set[str], Set[str]]:
+    """
+    ``(stale, changed)``: the courses whose neighbor lists may have moved, and
+    those among them whose learners did.
+
+    A changed course ranks differently in every list that holds it. A course
+    that gained learners only became more similar to the other courses of
+    those learners, found from ``enrolled_at``; one that lost learners became
+    more similar to everything it still shares a learner with. A course that
+    gained as many learners as it lost keeps its count but has an enrollment
+    newer than its list (``latest``), so it counts as grown.
+
+    Removed enrollments leave no trace: when a learner leaves a course whose
+    count another learner's enrollment then restores, the other courses of
+    the learner who left keep their old overlap with it until a ``full`` run.
+    """
+    grown, shrunk = [], []
+    for course_id in counts.keys() | sources.keys():
+        before, computed_at = sources.get(course_id, (0, None))
+        now, enrolled_at = counts.get(course_id, 0), latest.get(course_id)
+        joined = computed_at is not None and enrolled_at is not None and enrolled_at >= computed_at - SINCE_OVERLAP
+        if now > before or (now == before and joined):
+            grown.append(course_id)
+        elif now < before:
+            shrunk.append(course_id)
+    changed = set(grown) | set(shrunk)
+
+    stale = set(changed)
+    for chunk in _chunks(sorted(changed)):
+        stale.update(db.scalars(select(CourseNeighbor.course_id).where(CourseNeighbor.neighbor_id.in_(chunk))))
+    for chunk in _chunks(sorted(shrunk)):
+        stale.update(course_id for _, course_id in db.execute(co_enrollments_query(chunk)))
+    for chunk in _chunks(sorted(grown)):
+        computed = [sources.get(course_id, (0, None))[1] for course_id in chunk]
+        # A course never computed before counts all its learners as new
+        since = None if None in computed else min(computed) - SINCE_OVERLAP
+        stale.update(db.scalars(_new_learners_query(chunk, since)))
+    return stale, changed
+
+
+def refresh_recommendations(db: Session, full: bool = False, k: Optional[int] = None) -> RefreshReport:
+    """
+    Recompute the stored neighbor lists, all of them or only the stale ones.
+
+    Staleness is worked out from each course's learner count and the time
+    its list was computed (see ``stale_courses``); only the enrollments of
+    the stale courses' learners are then read. Enrollments backfilled with
+    past ``enrolled_at`` times, and enrollments deleted from courses that
+    gained as many since, need a ``full`` run. Runs in one transaction;
+    meant to be run by one job at a time.
+    """
+    started = time.perf_counter()
+    k = k or settings.RECOMMENDATION_NEIGHBORS
+    report = RefreshReport(full=full, vectorized=sparse is not None)
+
+    counts: Dict[str, int] = {}
+    latest: Dict[str, Optional[datetime]] = {}
+    for course_id, learners, enrolled_at in db.execute(learner_counts_query()):
+        counts[course_id], latest[course_id] = learners, enrolled_at
+    sources = {
+        course_id: (learners, computed_at)
+        for course_id, learners, computed_at in db.execute(
+            select(RecommendationSource.course_id, RecommendationSource.learners, RecommendationSource.computed_at)
+        )
+    }
+
+    targets: Set[str] = set(counts) | set(sources)
+    if not full:
+        stale, changed = stale_courses(db, counts, latest, sources)
+        report.changed = len(changed)
+        # Past this, reading the learners of every stale course costs about as much as a rebuild
+        report.full = full = len(stale) > FULL_REFRESH_SHARE * max(len(counts), 1)
+        if not full:
+            targets = stale
+
+    if not targets:
+        return report
+
+    computable = sorted(course_id for course_id in targets if course_id in counts)
+    pairs = db.execute(co_enrollments_query(None if full else computable)).all()
+    report.enrollments = len(pairs)
+
+    neighbors = compute_neighbors(pairs, counts, computable, k)
+    report.courses = len(targets)
+    report.neighbors = _store(db, neighbors, counts, targets, full)
+    db.commit()
+    report.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+def related_query(course_id: str, limit: int):
+    """The best ``limit`` neighbors of a course, plus ``LIMIT_MARGIN`` spares."""
+    return (
+        select(CourseNeighbor.neighbor_id, CourseNeighbor.score, CourseNeighbor.shared_learners)
+        .where(CourseNeighbor.course_id == course_id)
+        .order_by(CourseNeighbor.rank)
+        .limit(limit + LIMIT_MARGIN)
+    )
+
+
+def recommended_query(user_id: str, limit: int):
+    """
+    Neighbors of the user's courses they have not taken, scored by summed
+    similarity: the best ``limit``, plus ``LIMIT_MARGIN`` spares.
+    """
+    taken = select(CourseEnrollment.course_id).where(CourseEnrollment.user_id == user_id)
+    score = func.sum(CourseNeighbor.score)
+    return (
+        select(CourseNeighbor.neighbor_id, score.label("score"))
+        .where(CourseNeighbor.course_id.in_(taken), CourseNeighbor.neighbor_id.not_in(taken))
+        .group_by(CourseNeighbor.neighbor_id)
+        .order_by(score.desc(), CourseNeighbor.neighbor_id)
+        .limit(limit + LIMIT_MARGIN)
+    )
+
+
+async def related_courses(db: AsyncSession, course_id: str, limit: int) -> List[Tuple[str, float, int]]:
+    return [tuple(row) for row in await db.execute(related_query(course_id, limit))]
+
+
+async def recommended_courses(db: AsyncSession, user_id: str, limit: int) -> List[Tuple[str, float]]:
+    return [tuple(row) for row in await db.execute(recommended_query(user_id, limit))]
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+from app.models.referral import ReferralPath
+from app.models.user import User
+
+# Upper bound on backfill passes; a referred_by cycle fails earlier on the primary key
+MAX_TREE_DEPTH = 1000
+
+
+def link_user_statement(user_id: str, referrer_id: Optional[str]) -> Executable:
+    """
+    INSERT adding ``user_id`` under ``referrer_id`` in the closure table.
+
+    Writes the user's depth-0 row plus one row per upline of the referrer, so
+    the cost is proportional to the referrer's depth, not the tree size.
+    """
+    self_row = select(literal(user_id), literal(user_id), literal(0))
+    if referrer_id is None:
+        source = self_row
+    else:
+        uplines = select(
+            ReferralPath.ancestor_id, literal(user_id), ReferralPath.depth + 1
+        ).where(ReferralPath.descendant_id == referrer_id)
+        source = self_row.union_all(uplines)
+    return insert(ReferralPath).from_select(
+        ["ancestor_id", "descendant_id", "depth"], source
+    )
+
+
+def uplines_query(user_id: str, max_depth: int):
+    """``(ancestor_id, depth)`` for the uplines of ``user_id``, nearest first."""
+    return (
+        select(ReferralPath.ancestor_id, ReferralPath.depth)
+        .where(
+            ReferralPath.descendant_id == user_id,
+            ReferralPath.depth.between(1, max_depth),
+        )
+        .order_by(ReferralPath.depth)
+    )
+
+
+def downline_counts_query(user_id: str, max_depth: int):
+    """``(depth, count)`` of the downline of ``user_id`` per level."""
+    return (
+        select(ReferralPath.depth, func.count())
+        .where(
+            ReferralPath.ancestor_id == user_id,
+            ReferralPath.depth.between(1, max_depth),
+        )
+        .group_by(ReferralPath.depth)
+        .order_by(ReferralPath.depth)
+    )
+
+
+async def link_user(db: AsyncSession, user_id: str, referrer_id: Optional[str]) -> None:
+    await db.execute(link_user_statement(user_id, referrer_id))
+
+
+async def get_uplines(db: AsyncSession, user_id: str, max_depth: int) -> List[Tuple[str, int]]:
+    result = await db.execute(uplines_query(user_id, max_depth))
+    return [(ancestor_id, depth) for ancestor_id, depth in result]
+
+
+async def get_downline_counts(db: AsyncSession, user_id: str, max_depth: int) -> Dict[int, int]:
+    result = await db.execute(downline_counts_query(user_id, max_depth))
+    counts = {level: 0 for level in range(1, max_depth + 1)}
+    counts.update({depth: count for depth, count in result})
+    return counts
+
+
+def backfill_level_query(depth: int):
+    """Closure rows at ``depth``: each path one level up, extended by the users it referred."""
+    return (
+        select(ReferralPath.ancestor_id, User.id, literal(depth))
+        .join(User, User.referred_by == ReferralPath.descendant_id)
+        .where(ReferralPath.depth == depth - 1)
+    )
+
+
+def backfill_referral_paths(db: Session) -> int:
+    """
+    Rebuild the closure table from ``User.referred_by``.
+
+    Works level by level with one INSERT ... SELECT per depth, so the number
+    of statements is the height of the tree rather than the number of users.
+    Returns the number of rows written.
+    """
+    db.query(ReferralPath).delete(synchronize_session=False)
+    total = db.execute(
+        insert(ReferralPath).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(User.id, User.id, literal(0)),
+        )
+    ).rowcount
+
+    for depth in range(1, MAX_TREE_DEPTH + 1):
+        inserted = db.execute(
+            insert(ReferralPath).from_select(
+                ["ancestor_id", "descendant_id", "depth"], backfill_level_query(depth)
+            )
+        ).rowcount
+        if not inserted:
+            break
+        total += inserted
+
+    db.commit()
+    return total
@@ -0,0 +1,135 @@
+import html
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from sqlalchemy import String, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services.catalog import PACKAGE_TIERS
+
+# Words after this many are ignored
+MAX_TERMS = 8
+# Private-use characters mark matches inside the database; after the text is
+# HTML-escaped they become <mark> tags, so course text can never inject markup
+_OPEN, _CLOSE = "\ue000", "\ue001"
+_TERM = re.compile(r"\w+")
+
+# Column weights: title, short description, description, tags. The page is
+# ranked from the index and the filter columns alone; highlights and
+# snippets, which re-read the text, are built for that page only
+SQLITE_SEARCH = """
+SELECT docs.course_id, -hit.ranking AS score,
+       highlight(course_search, 0, :open, :close) AS title,
+       snippet(course_search, -1, :open, :close, '…', 16) AS snippet
+FROM (
+    SELECT course_search.rowid AS id, bm25(course_search, 10.0, 4.0, 1.0, 4.0) AS ranking
+    FROM course_search
+    JOIN course_search_docs docs ON docs.rowid = course_search.rowid
+    WHERE course_search MATCH :query AND docs.is_active {tier_filter}
+    ORDER BY ranking
+    LIMIT :limit OFFSET :offset
+) AS hit
+JOIN course_search ON course_search.rowid = hit.id
+JOIN course_search_docs docs ON docs.rowid = hit.id
+WHERE course_search MATCH :query
+ORDER BY hit.ranking
+"""
+
+# Ranked on the GIN-indexed vector first; headlines are built for the page only
+POSTGRESQL_SEARCH = """
+SELECT hit.id, hit.score,
+       ts_headline('english', hit.title, hit.query, :title_options) AS title,
+       ts_headline('english', concat_ws(' ', hit.short_description, hit.description), hit.query, :snippet_options)
+           AS snippet
+FROM (
+    SELECT c.id, c.title, c.short_description, c.description, q.query,
+           ts_rank_cd(c.search_vector, q.query, 32) AS score
+    FROM courses c, to_tsquery('english', :query) AS q(query)
+    WHERE c.search_vector @@ q.query AND c.is_active {tier_filter}
+    ORDER BY score DESC, c.id
+    LIMIT :limit OFFSET :offset
+) AS hit
+ORDER BY hit.score DESC, hit.id
+"""
+
+_HEADLINE = f'StartSel="{_OPEN}", StopSel="{_CLOSE}", FragmentDelimiter="…"'
+TITLE_OPTIONS = _HEADLINE + ", HighlightAll=true"
+SNIPPET_OPTIONS = _HEADLINE + ", MaxWords=24, MinWords=12, MaxFragments=1"
+
+
+@dataclass
+class SearchHit:
+    course_id: str
+    score: float
+    title: str  # HTML-escaped, matches wrapped in <mark>
+    snippet: str
+
+
+def search_terms(query: str) -> List[str]:
+    return _TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def match_expression(terms: Sequence[str]) -> str:
+    """Every term must match, each as a prefix: "seo mark" finds "SEO marketing"."""
+    if settings.is_postgresql:
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def unlocked_packages(package: str) -> List[str]:
+    """``package`` and every lower one; courses without a package are open to all."""
+    return list(PACKAGE_TIERS[: PACKAGE_TIERS.index(package) + 1])
+
+
+def render_marks(value: Optional[str]) -> str:
+    return html.escape(value or "").replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def search_statement(filter_by_package: bool):
+    tier_filter = ""
+    if filter_by_package:
+        tier_filter = "AND (required_package IS NULL OR required_package IN :packages)"
+    template = POSTGRESQL_SEARCH if settings.is_postgresql else SQLITE_SEARCH
+    stmt = text(template.format(tier_filter=tier_filter))
+    if filter_by_package:
+        stmt = stmt.bindparams(bindparam("packages", type_=String, expanding=True))
+    return stmt
+
+
+def search_params(terms: Sequence[str], package: Optional[str], limit: int, offset: int) -> dict:
+    params = {"query": match_expression(terms), "limit": limit, "offset": offset}
+    if package is not None:
+        params["packages"] = unlocked_packages(package)
+    if settings.is_postgresql:
+        params.update(title_options=TITLE_OPTIONS, snippet_options=SNIPPET_OPTIONS)
+    else:
+        params.update(open=_OPEN, close=_CLOSE)
+    return params
+
+
+async def search_courses(
+    db: AsyncSession,
+    query: str,
+    package: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[SearchHit]:
+    """
+    Active courses matching every word of ``query``, best first.
+
+    SQLite ranks with FTS5's BM25, PostgreSQL with ``ts_rank_cd`` over a
+    vector weighting titles above descriptions. With a ``package``, only
+    courses it unlocks are returned.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    params = search_params(terms, package, limit, offset)
+    rows = await db.execute(search_statement(package is not None), params)
+    return [
+        SearchHit(course_id=course_id, score=score, title=render_marks(title), snippet=render_marks(snippet))
+        for course_id, score, title, snippet in rows
+    ]
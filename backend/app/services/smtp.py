@@ -0,0 +1,258 @@
+import asyncio
+import email
+import email.policy
+import random
+import smtplib
+import ssl
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Callable, Iterable, List, Optional, Set
+
+# A session idle longer than this is checked with NOOP before reuse; servers
+# drop idle clients after a few minutes
+IDLE_CHECK_SECONDS = 30
+
+# Errors about one message; the session stays usable for the next one.
+# Anything else (refused connection, timeout, failed login) is about the session
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def is_permanent(exc: Exception) -> bool:
+    """True for a 5xx rejection of a message: retrying will not deliver it."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, MESSAGE_ERRORS) and exc.smtp_code >= 500
+
+
+class SMTPConnection:
+    """
+    One SMTP session kept open across messages and batches.
+
+    The session is opened (EHLO, STARTTLS, AUTH) on first use and reused for
+    every later message, so a batch pays the handshake once. Not thread-safe:
+    give each sending thread its own connection.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        timeout: float = 10,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.sessions = 0
+        self.sent = 0
+
+    def _open(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if self.user:
+                smtp.login(self.user, self.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        self.sessions += 1
+        return smtp
+
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp is not None and time.monotonic() - self._last_used > IDLE_CHECK_SECONDS:
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._smtp is None:
+            self._smtp = self._open()
+        return self._smtp
+
+    def send(self, message: EmailMessage) -> None:
+        """Send one message; a session the server dropped is reopened once."""
+        for attempt in range(2):
+            smtp = self._session()
+            try:
+                smtp.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if attempt:
+                    raise
+                continue
+            except MESSAGE_ERRORS:
+                self._last_used = time.monotonic()
+                raise
+            except Exception:
+                self.close()
+                raise
+            self._last_used = time.monotonic()
+            self.sent += 1
+            return
+
+    def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+
+@dataclass
+class ReceivedEmail:
+    mail_from: str
+    recipients: List[str]
+    data: bytes
+
+    @property
+    def message(self) -> EmailMessage:
+        return email.message_from_bytes(self.data, policy=email.policy.default)
+
+
+def _address(argument: str) -> str:
+    """``FROM:<a@example.com> SIZE=10`` -> ``a@example.com``."""
+    _, _, rest = argument.partition(":")
+    return rest.strip().split(" ", 1)[0].strip("<>")
+
+
+class LocalSMTPServer:
+    """
+    Local stand-in for an SMTP relay: speaks enough ESMTP for smtplib (EHLO,
+    AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT) and keeps every accepted
+    message in memory, for tests, load runs and manual testing without
+    network access or a mail provider. ``fail_rate`` answers that share of
+    messages with a temporary 451, to exercise retries, and
+    ``unknown_recipients`` are refused with a permanent 550. There is no
+    STARTTLS, so point the app at it with ``SMTP_STARTTLS=false``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fail_rate: float = 0.0,
+        seed: Optional[int] = None,
+        on_message: Optional[Callable[[ReceivedEmail], None]] = None,
+        unknown_recipients: Iterable[str] = (),
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.unknown_recipients = set(unknown_recipients)
+        self.on_message = on_message
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self.messages: List[ReceivedEmail] = []
+        self.sessions = 0
+        self.rejected = 0
+
+    async def start(self) -> int:
+        """Start listening; returns the bound port (useful with ``port=0``)."""
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    @staticmethod
+    async def _read_data(reader: asyncio.StreamReader) -> bytes:
+        lines = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError("Client disconnected during DATA")
+            if line in (b".\r\n", b".\n"):
+                return b"".join(lines)
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b".") else line)
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.sessions += 1
+        self._writers.add(writer)
+
+        def reply(*lines: str) -> None:
+            for line in lines:
+                writer.write(line.encode() + b"\r\n")
+
+        reply("220 localhost ESMTP stand-in ready")
+        mail_from: Optional[str] = None
+        recipients: List[str] = []
+        try:
+            while True:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+                verb = command.upper()
+                if verb == "EHLO":
+                    reply("250-localhost", "250-8BITMIME", "250-SMTPUTF8", "250 AUTH PLAIN")
+                elif verb == "HELO":
+                    reply("250 localhost")
+                elif verb == "AUTH":
+                    reply("235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    mail_from, recipients = _address(argument), []
+                    reply("250 2.1.0 OK")
+                elif verb == "RCPT":
+                    if mail_from is None:
+                        reply("503 5.5.1 MAIL first")
+                    elif _address(argument) in self.unknown_recipients:
+                        reply("550 5.1.1 No such mailbox")
+                    else:
+                        recipients.append(_address(argument))
+                        reply("250 2.1.5 OK")
+                elif verb == "DATA":
+                    if not recipients:
+                        reply("503 5.5.1 RCPT first")
+                        continue
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    data = await self._read_data(reader)
+                    if self.fail_rate and self._rng.random() < self.fail_rate:
+                        self.rejected += 1
+                        reply("451 4.3.0 Temporary failure, try again later")
+                    else:
+                        received = ReceivedEmail(mail_from, recipients, data)
+                        self.messages.append(received)
+                        if self.on_message is not None:
+                            self.on_message(received)
+                        reply(f"250 2.0.0 Queued as {len(self.messages)}")
+                    mail_from, recipients = None, []
+                elif verb == "RSET":
+                    mail_from, recipients = None, []
+                    reply("250 2.0.0 OK")
+                elif verb == "NOOP":
+                    reply("250 2.0.0 OK")
+                elif verb == "QUIT":
+                    reply("221 2.0.0 Bye")
+                    break
+                else:
+                    reply("502 5.5.2 Command not recognized")
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
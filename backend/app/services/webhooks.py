@@ -0,0 +1,375 @@
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.upsert import dialect_insert
+from app.models.payment import Transaction
+from app.models.user import User
+from app.models.webhook import RazorpayEvent
+from app.services.commissions import settle_transactions
+from app.services.emails import purchase_receipt_email, queue_emails
+from app.services.platform_stats import ACTIVE_USERS, REVENUE_PAISE, REVENUE_TRANSACTION_TYPES, PlatformDelta, paise
+
+logger = logging.getLogger(__name__)
+
+# Events that mean the order's money has been captured
+CAPTURE_EVENTS = ("payment.captured", "order.paid")
+FAILURE_EVENTS = ("payment.failed",)
+# Advisory lock that serializes webhook claims across processes on PostgreSQL
+CLAIM_LOCK_KEY = zlib.crc32(b"razorpay_events.claim")
+
+
+class WebhookError(Exception):
+    """An event that cannot be applied yet; it is retried with backoff."""
+
+
+def parse_event(body: bytes) -> Tuple[str, Optional[str]]:
+    """``(event_type, order_id)`` of a Razorpay webhook body; ValueError if malformed."""
+    event = json.loads(body)
+    if not isinstance(event, dict) or not isinstance(event.get("event"), str):
+        raise ValueError("Not a Razorpay event")
+    entities = event.get("payload") or {}
+    payment = (entities.get("payment") or {}).get("entity") or {}
+    order = (entities.get("order") or {}).get("entity") or {}
+    return event["event"], payment.get("order_id") or order.get("id")
+
+
+async def store_event(
+    db: AsyncSession, event_id: str, event_type: str, order_id: Optional[str], body: bytes
+) -> bool:
+    """Insert the event into the inbox; False if this event id was already received."""
+    stmt = dialect_insert(RazorpayEvent.__table__).values(
+        id=event_id,
+        event_type=event_type,
+        order_id=order_id,
+        payload=body.decode(),
+        status="pending",
+        attempts=0,
+        # Set here rather than by the database: SQLite's CURRENT_TIMESTAMP has
+        # one-second resolution, too coarse to keep an order's events in sequence
+        received_at=datetime.now(timezone.utc),
+    ).on_conflict_do_nothing(index_elements=["id"])
+    result = await db.execute(stmt)
+    return result.rowcount == 1
+
+
+def _ready_condition(now: datetime):
+    stale = now - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT_SECONDS)
+    in_flight = aliased(RazorpayEvent)
+    return and_(
+        or_(
+            RazorpayEvent.status == "pending",
+            and_(RazorpayEvent.status == "failed", RazorpayEvent.next_attempt_at <= now),
+            # Claimed by a worker that died before finishing
+            and_(RazorpayEvent.status == "processing", RazorpayEvent.claimed_at < stale),
+        ),
+        # Never while another worker, in any process, is applying an event of the same order
+        ~exists().where(
+            in_flight.order_id == RazorpayEvent.order_id,
+            in_flight.id != RazorpayEvent.id,
+            in_flight.status == "processing",
+            in_flight.claimed_at >= stale,
+        ),
+    )
+
+
+def claim_events_query(now: datetime, limit: int):
+    """UPDATE ... RETURNING that marks the ``limit`` oldest ready events as processing."""
+    ready = _ready_condition(now)
+    oldest = (
+        select(RazorpayEvent.id)
+        .where(ready)
+        .order_by(RazorpayEvent.received_at, RazorpayEvent.id)
+        .limit(limit)
+    )
+    return (
+        update(RazorpayEvent)
+        .where(RazorpayEvent.id.in_(oldest.scalar_subquery()), ready)
+        .values(status="processing", claimed_at=now)
+        .returning(RazorpayEvent.id, RazorpayEvent.order_id, RazorpayEvent.received_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim_events(db: Session, limit: int) -> List[Tuple[str, Optional[str]]]:
+    """
+    Atomically mark up to ``limit`` ready events as processing.
+
+    Returns ``(event_id, order_id)`` pairs oldest first. The claim is one
+    conditional UPDATE, so concurrent workers never get the same event, and it
+    skips orders that already have an event being processed, so one order's
+    events are applied by one process at a time. SQLite runs one writer at a
+    time; on PostgreSQL a transaction-level advisory lock serializes claims,
+    which the in-flight check needs to see each other's claims.
+    """
+    now = datetime.now(timezone.utc)
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(CLAIM_LOCK_KEY)))
+    rows = db.execute(claim_events_query(now, limit)).all()
+    db.commit()
+    rows.sort(key=lambda row: (row.received_at, row.id))
+    return [(row.id, row.order_id) for row in rows]
+
+
+def _payment_entity(event: RazorpayEvent) -> dict:
+    entities = json.loads(event.payload).get("payload") or {}
+    return (entities.get("payment") or {}).get("entity") or {}
+
+
+def _order_transaction(db: Session, order_id: Optional[str]) -> Transaction:
+    transaction = None
+    if order_id:
+        transaction = db.scalar(select(Transaction).where(Transaction.razorpay_order_id == order_id))
+    if transaction is None:
+        # The order may have been created by a request that has not committed yet
+        raise WebhookError(f"No transaction for order {order_id}")
+    return transaction
+
+
+def _complete_order(db: Session, event: RazorpayEvent, now: datetime) -> None:
+    transaction = _order_transaction(db, event.order_id)
+    payment = _payment_entity(event)
+    amount = payment.get("amount")
+    if amount is not None and amount != round(transaction.amount * 100):
+        raise WebhookError(f"Captured {amount} paise, expected {round(transaction.amount * 100)}")
+
+    # Only the first capture of an order completes it; redeliveries and
+    # order.paid after payment.captured fall through here
+    completed = db.execute(
+        update(Transaction)
+        .where(Transaction.id == transaction.id, Transaction.status != "completed")
+        .values(
+            status="completed",
+            razorpay_payment_id=payment.get("id") or transaction.razorpay_payment_id,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not completed:
+        return
+
+    platform = PlatformDelta()
+    user = db.get(User, transaction.user_id)
+    if transaction.transaction_type in REVENUE_TRANSACTION_TYPES:
+        platform.add(REVENUE_PAISE, paise(transaction.amount))
+    if transaction.transaction_type == "package_purchase" and transaction.package_type:
+        if user.package_type is None:
+            platform.add(ACTIVE_USERS)
+        user.package_type = transaction.package_type
+        user.package_purchased_at = now
+    platform.apply(db)
+    queue_emails(db, [purchase_receipt_email(user, transaction, payment.get("id"), now)])
+    settle_transactions(db, transaction_ids=[transaction.id])
+
+
+def _fail_order(db: Session, event: RazorpayEvent, now: datetime) -> None:
+    transaction = _order_transaction(db, event.order_id)
+    # A failed attempt never undoes a capture; the buyer may retry the same order
+    db.execute(
+        update(Transaction)
+        .where(Transaction.id == transaction.id, Transaction.status == "pending")
+        .values(status="failed", updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def process_event(db: Session, event_id: str) -> Optional[str]:
+    """
+    Apply one claimed event and return its final status.
+
+    The event's status, the transaction, the buyer's package, any
+    commissions and their emails are committed together. Transitions only
+    move forward (pending/failed -> completed, pending -> failed), so
+    replays, duplicates and out-of-order deliveries cannot double-apply a
+    purchase.
+    """
+    event = db.get(RazorpayEvent, event_id)
+    if event is None or event.status != "processing":
+        return None
+
+    now = datetime.now(timezone.utc)
+    try:
+        event.status = "processed"
+        event.processed_at = now
+        event.last_error = None
+        if event.event_type in CAPTURE_EVENTS:
+            _complete_order(db, event, now)
+        elif event.event_type in FAILURE_EVENTS:
+            _fail_order(db, event, now)
+        else:
+            event.status = "ignored"
+        db.commit()
+        return event.status
+    except Exception as exc:
+        db.rollback()
+        event = db.get(RazorpayEvent, event_id)
+        event.attempts += 1
+        event.last_error = str(exc) or exc.__class__.__name__
+        event.processed_at = None
+        if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            event.status = "dead"
+        else:
+            event.status = "failed"
+            event.next_attempt_at = now + timedelta(seconds=2 ** event.attempts)
+        db.commit()
+        if not isinstance(exc, WebhookError):
+            logger.exception("Razorpay event %s failed", event_id)
+        return event.status
+
+
+def drain_events(db: Session, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Claim and apply ready events in the calling thread until none are left."""
+    batch_size = batch_size or settings.WEBHOOK_CLAIM_BATCH_SIZE
+    outcomes: Dict[str, int] = {}
+    while True:
+        claimed = claim_events(db, batch_size)
+        if not claimed:
+            return outcomes
+        for event_id, _ in claimed:
+            outcome = process_event(db, event_id)
+            if outcome:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+
+class WebhookWorkers:
+    """
+    Per-process pool that applies stored webhook events in the background.
+
+    A dispatcher claims ready events oldest first and routes each one to a
+    worker chosen by hashing its order id, so events for the same order are
+    applied one at a time, in arrival order. Across processes the claim itself
+    keeps that order: it skips orders with an event still being processed. Each worker applies its events
+    on a thread with its own session. The dispatcher wakes on every new event
+    and also polls, picking up retries and events stored by other processes.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int,
+        batch_size: int,
+        poll_seconds: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.received = 0
+        self.duplicates = 0
+        self.outcomes: Dict[str, int] = {}
+
+    def notify(self, stored: bool = True) -> None:
+        if stored:
+            self.received += 1
+            self._wakeup.set()
+        else:
+            self.duplicates += 1
+
+    def _claim(self, limit: int) -> List[Tuple[str, Optional[str]]]:
+        db = self.session_factory()
+        try:
+            return claim_events(db, limit)
+        finally:
+            db.close()
+
+    def _process(self, event_id: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            return process_event(db, event_id)
+        finally:
+            db.close()
+
+    def _queued(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def _dispatch(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            # Never hold more claimed events in memory than one batch
+            capacity = self.batch_size - self._queued()
+            if capacity <= 0:
+                continue
+            try:
+                claimed = await asyncio.to_thread(self._claim, capacity)
+            except Exception:
+                logger.exception("Claiming Razorpay events failed")
+                continue
+            for event_id, order_id in claimed:
+                partition = zlib.crc32((order_id or event_id).encode()) % self.workers
+                self._queues[partition].put_nowait(event_id)
+            if len(claimed) == capacity:
+                self._wakeup.set()
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            event_id = await queue.get()
+            try:
+                outcome = await asyncio.to_thread(self._process, event_id)
+                if outcome:
+                    self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            except Exception:
+                logger.exception("Applying Razorpay event %s failed", event_id)
+            finally:
+                queue.task_done()
+                if queue.empty():
+                    self._wakeup.set()
+
+    def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+        self._queues = [asyncio.Queue() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._work(queue)) for queue in self._queues]
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        """Stop claiming, finish the events already claimed, then stop the workers."""
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            pass
+        self._dispatcher = None
+        for queue in self._queues:
+            await queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "queued": self._queued(),
+            "outcomes": dict(self.outcomes),
+        }
+
+
+webhook_workers = WebhookWorkers(
+    session_factory=SessionLocal,
+    workers=settings.WEBHOOK_WORKERS,
+    batch_size=settings.WEBHOOK_CLAIM_BATCH_SIZE,
+    poll_seconds=settings.WEBHOOK_POLL_SECONDS,
+)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+HTTP benchmark for the API: concurrent virtual users against auth and catalog
+endpoints, reporting throughput and p50/p95/p99 latency
+
+Requests go through httpx's ASGI transport into ``app.main:app`` in this
+process (default), or to a real uvicorn server started for the run. The
+database is a synthetic dataset from ``generate_data.py``, generated once per
+size and seed and copied fresh for every run.
+
+Usage (from backend/):
+    python -m benchmarks.api --dataset-users 10000 --output bench.json
+    python -m benchmarks.api --dataset-users 10000 --compare bench.json
+    python -m benchmarks.api --transport uvicorn --workers 4 --scenarios login,me
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import (
+    PASSWORD,
+    compare_results,
+    environment,
+    exit_on_regressions,
+    load_results,
+    prepare_database,
+    print_table,
+    save_results,
+    summarize,
+)
+
+API = "/api/v1"
+# Distinct accounts the login scenarios cycle through
+LOGIN_POOL_SIZE = 5000
+
+
+@dataclass
+class VirtualUser:
+    index: int
+    rng: random.Random
+    token: Optional[str] = None
+    sent: int = 0
+
+
+@dataclass
+class RunContext:
+    client: httpx.AsyncClient
+    dataset_users: int
+    run_id: str
+    emails: List[str]
+    slugs: List[str] = field(default_factory=list)
+
+    def dataset_email(self, rng: random.Random) -> str:
+        return rng.choice(self.emails)
+
+
+Step = Callable[[RunContext, VirtualUser], Awaitable[httpx.Response]]
+
+
+async def catalog(ctx: RunContext, vu: VirtualUser) -> httpx.Response:
+    return await ctx.client.get(f"{API}/courses/")
+
+
+async def catalog_filtered(ctx: RunContext, vu: VirtualUser) -> httpx.Response:
+    package = vu.rng.choice(("silver", "gold", "platinum"))
+    return await ctx.client.get(f"{API}/courses/", params={"package": package, "featured": "true"})
+
+
+async def course_detail(ctx: RunContext, vu: VirtualUser) -> httpx.Response:
+    return await ctx.client.get(f"{API}/courses/{vu.rng.choice(ctx.slugs)}")
+
+
+async def login(ctx: RunContext, vu: VirtualUser) -> httpx.Response:
+    return await ctx.client.post(
+        f"{API}/auth/login", data={"username": ctx.dataset_email(vu.rng), "password": PASSWORD}
+    )
+
+
+async def me(ctx: RunContext, vu: VirtualUser) -> httpx.Response:
+    return await ctx.client.get(f"{API}/auth/me", headers={"Authorization": f"Bearer {vu.token}"})
+
+
+async def signup(ctx: RunContext, vu: VirtualUser) -> httpx.Response:
+    return await ctx.client.post(f"{API}/auth/signup", json={
+        "email": f"bench-{ctx.run_id}-{vu.index}-{vu.sent}@example.com",
+        "full_name": "Bench User",
+        "password": PASSWORD,
+        "referred_by": f"R{vu.rng.randrange(ctx.dataset_users):07X}",
+    })
+
+
+SCENARIOS: Dict[str, Step] = {
+    "catalog": catalog,
+    "catalog-filtered": catalog_filtered,
+    "course-detail": course_detail,
+    "login": login,
+    "me": me,
+    "signup": signup,
+}
+
+
+async def _prepare(ctx: RunContext, users: List[VirtualUser], scenario: str) -> None:
+    if scenario == "course-detail" and not ctx.slugs:
+        listing = (await ctx.client.get(f"{API}/courses/")).json()
+        ctx.slugs = [course["slug"] or course["id"] for course in listing]
+    if scenario == "me":
+        for vu in users:
+            if vu.token is None:
+                response = await login(ctx, vu)
+                response.raise_for_status()
+                vu.token = response.json()["access_token"]
+
+
+async def run_scenario(
+    ctx: RunContext, name: str, concurrency: int, duration: float, warmup: float, seed: int
+) -> Dict[str, float]:
+    step = SCENARIOS[name]
+    users = [VirtualUser(index=i, rng=random.Random(f"{seed}:{name}:{i}")) for i in range(concurrency)]
+    await _prepare(ctx, users, name)
+
+    latencies: List[float] = []
+    errors = 0
+    recording = False
+
+    async def drive(vu: VirtualUser, deadline: float) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await step(ctx, vu)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            vu.sent += 1
+            if recording:
+                latencies.append(time.perf_counter() - started)
+                errors += failed
+
+    if warmup:
+        await asyncio.gather(*(drive(vu, time.perf_counter() + warmup) for vu in users))
+    recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(vu, started + duration) for vu in users))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def login_pool(database_url: str, size: int) -> List[str]:
+    """Emails of active, non-admin dataset users, spread over the whole table."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            total = connection.scalar(text("SELECT count(*) FROM users WHERE is_active AND NOT is_superuser"))
+            stride = max(1, total // size)
+            rows = connection.execute(text(
+                "SELECT email FROM (SELECT email, row_number() OVER (ORDER BY id) AS n FROM users "
+                "WHERE is_active AND NOT is_superuser AND email NOT LIKE 'bench-%') AS active "
+                "WHERE n % :stride = 0 LIMIT :size"
+            ), {"stride": stride, "size": size})
+            return [email for email, in rows]
+    finally:
+        engine.dispose()
+
+
+async def _wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise SystemExit("❌ uvicorn exited during startup")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("❌ uvicorn did not become healthy in time")
+
+
+async def run(args, database_url: str) -> dict:
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    process = None
+    app = None
+    if args.transport == "uvicorn":
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            env={**os.environ, "DATABASE_URL": database_url},
+        )
+        await _wait_until_up(base_url, process)
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+    else:
+        # Settings are read at import time, so the app is imported only now
+        from app.main import app
+
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    results = {}
+    try:
+        ctx = RunContext(
+            client=client,
+            dataset_users=args.dataset_users,
+            run_id=uuid.uuid4().hex[:8],
+            emails=login_pool(database_url, LOGIN_POOL_SIZE),
+        )
+        for name in scenarios:
+            print(f"⏱  {name}: {args.concurrency} virtual users for {args.duration:g}s...")
+            results[name] = await run_scenario(
+                ctx, name, args.concurrency, args.duration, args.warmup, args.seed
+            )
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints with concurrent virtual users")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--dataset-users", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "raju-bench"))
+    parser.add_argument("--database-url", help="Benchmark this database instead of a generated SQLite dataset")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--rate-limit", action="store_true",
+        help="Keep the auth rate limits on; every virtual user shares one client address, so login is throttled",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    database_url = prepare_database(args)
+    os.environ["DATABASE_URL"] = database_url
+    # Read by the in-process app and inherited by a uvicorn server
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if args.rate_limit else "false"
+    scenarios = asyncio.run(run(args, database_url))
+    from app.core.config import settings
+
+    results = {
+        "environment": environment(),
+        "config": {
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "dataset_users": args.dataset_users,
+            "seed": args.seed,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "rate_limit": settings.RATE_LIMIT_ENABLED,
+        },
+        "scenarios": scenarios,
+    }
+    print()
+    print_table(scenarios)
+    if args.output:
+        save_results(args.output, results)
+        print(f"\n💾 Results written to {args.output}")
+    if args.compare:
+        baseline = load_results(args.compare)
+        differing = [
+            key for key, value in results["config"].items()
+            if key in baseline.get("config", {}) and baseline["config"][key] != value
+        ]
+        if differing:
+            print(f"⚠️  Baseline was recorded with a different {', '.join(differing)}")
+        exit_on_regressions(compare_results(baseline, results, args.threshold), args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Helpers shared by the benchmark scripts: generated datasets, latency
+summaries, result files and baseline comparison.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+# Password of every generated dataset user
+PASSWORD = "pass123"
+# Fixed so a given --dataset-users/--seed always produces the same database
+DATASET_END = "2026-01-01"
+
+# Metrics where a larger value is a regression; throughput is the opposite
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRIC = "throughput_rps"
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """Throughput and latency percentiles (milliseconds) for one scenario."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        THROUGHPUT_METRIC: round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Optional[str]]:
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_results(path: str, results: dict) -> None:
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def print_table(scenarios: Dict[str, Dict[str, float]]) -> None:
+    header = f"{'scenario':<22}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in scenarios.items():
+        print(
+            f"{name:<22}{stats['requests']:>10}{stats['errors']:>8}{stats[THROUGHPUT_METRIC]:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+
+def compare_results(baseline: dict, current: dict, threshold_pct: float) -> List[str]:
+    """
+    Print per-scenario changes against ``baseline`` and return the regressions.
+
+    A latency percentile that grew, or throughput that shrank, by more than
+    ``threshold_pct`` percent counts as a regression. Scenarios missing from
+    either run are skipped.
+    """
+    regressions: List[str] = []
+    print(f"\nCompared with {baseline.get('environment', {}).get('commit') or 'baseline'}:")
+    for name, stats in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for metric in LATENCY_METRICS + (THROUGHPUT_METRIC,):
+            old, new = before.get(metric), stats.get(metric)
+            if not old or new is None:
+                continue
+            delta = (new - old) / old * 100
+            worse = delta > threshold_pct if metric != THROUGHPUT_METRIC else -delta > threshold_pct
+            changes.append(f"{metric} {old:.2f}→{new:.2f} ({delta:+.1f}%){' ❌' if worse else ''}")
+            if worse:
+                regressions.append(f"{name} {metric} {delta:+.1f}%")
+        print(f"  {name}: " + ", ".join(changes))
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path) as source:
+        return json.load(source)
+
+
+def exit_on_regressions(regressions: List[str], threshold_pct: float) -> None:
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {threshold_pct:g}%: " + "; ".join(regressions))
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {threshold_pct:g}%")
+
+
+def prepare_database(args) -> str:
+    """Database URL for this run: a fresh copy of the cached dataset, unless one was given."""
+    if args.database_url:
+        return args.database_url
+
+    from app.db.migrations import head_revision
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    # Keyed by schema revision too, so a new migration never reuses a stale dataset
+    name = f"dataset-{args.dataset_users}-{args.seed}-r{head_revision()}.db"
+    pristine = os.path.join(args.data_dir, name)
+    if not os.path.exists(pristine):
+        print(f"🌱 Generating a {args.dataset_users:,}-user dataset (cached in {pristine})...")
+        partial = pristine + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        subprocess.run(
+            [
+                sys.executable, "generate_data.py",
+                "--users", str(args.dataset_users),
+                "--seed", str(args.seed),
+                "--end", DATASET_END,
+                "--password", PASSWORD,
+            ],
+            env={**os.environ, "DATABASE_URL": f"sqlite:///{partial}"},
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        os.replace(partial, pristine)
+
+    working = os.path.join(args.data_dir, "bench-run.db")
+    shutil.copyfile(pristine, working)
+    return f"sqlite:///{working}"
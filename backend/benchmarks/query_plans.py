@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check: EXPLAIN every hot query of the app against a
+seeded database and fail if any of them reads a whole table
+
+The registry and the check live in ``app.db.query_plans`` and also run in
+the test suite (tests/test_query_plans.py); this is the command-line entry
+point, for larger datasets and for PostgreSQL.
+
+Usage (from backend/):
+    python -m benchmarks.query_plans                 # generated SQLite dataset
+    python -m benchmarks.query_plans --verbose       # print every plan
+    python -m benchmarks.query_plans --database-url postgresql://...
+
+Exits 1 when a query scans a table it is not allowed to.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from app.db.query_plans import check_plans, hot_queries
+from benchmarks.common import prepare_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query's plan scans a whole table")
+    parser.add_argument("--dataset-users", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "raju-bench"))
+    parser.add_argument("--database-url", help="Check plans on this (migrated, seeded) database instead")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not only failing ones")
+    args = parser.parse_args()
+
+    database_url = prepare_database(args)
+    os.environ["DATABASE_URL"] = database_url
+    failures = check_plans(database_url, hot_queries(), args.verbose)
+    if failures:
+        print(f"\n❌ {len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} scan a whole table:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✅ Every hot query is served by an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Course search benchmark: full-text index against ``LIKE '%term%'``.
+
+Builds a synthetic catalog in a fresh SQLite database migrated to head, so
+the index is filled by the same triggers that keep it in sync in the app,
+then runs each query two ways:
+
+* ``like``: every word matched with ``LIKE '%word%'`` against the title,
+  descriptions and tags, first 20 by title. No index applies, so every
+  course is read;
+* ``fts``: ``search_statement`` as served by ``/courses/search``, ranked by
+  BM25 with highlights and snippets.
+
+The index only reads matching courses, so it wins by the most on selective
+words; a word found in nearly every course still has every course ranked.
+
+    python -m benchmarks.search --courses 100000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+from .common import print_table, save_results, summarize
+
+QUERIES = ("marketing", "seo", "youtube monetization", "affil", "email automation funnels", "instag", "quantum")
+PAGE_SIZE = 20
+
+# Real words placed at fixed frequency ranks of a Zipf-distributed vocabulary,
+# from near-universal ("marketing") to rare ("funnels"); the rest is filler
+RANKED_WORDS = {
+    "marketing": 3, "learn": 5, "business": 8, "email": 30, "seo": 40, "affiliate": 60, "youtube": 100,
+    "automation": 150, "monetization": 300, "instagram": 400, "funnels": 600,
+}
+VOCABULARY_SIZE = 5000
+PACKAGES = (None, "silver", "gold", "platinum")
+
+
+def vocabulary(rng: random.Random) -> List[str]:
+    syllables = ("ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "da", "pe", "zo", "gu", "ha", "bri", "sto")
+    words = {"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(VOCABULARY_SIZE * 2)}
+    filler = sorted(words)[:VOCABULARY_SIZE]
+    rng.shuffle(filler)
+    for word, rank in sorted(RANKED_WORDS.items(), key=lambda item: item[1]):
+        filler.insert(rank, word)
+    return filler[:VOCABULARY_SIZE]
+
+
+class Writer:
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+        self.words = vocabulary(rng)
+        self.weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.words) + 1)))
+
+    def text(self, count: int) -> str:
+        return " ".join(self.rng.choices(self.words, cum_weights=self.weights, k=count))
+
+    def course(self, i: int) -> dict:
+        return {
+            "id": str(uuid.UUID(int=self.rng.getrandbits(128))),
+            "title": f"{self.text(3).title()} {i}",
+            "short_description": self.text(12).capitalize() + ".",
+            "description": self.text(80).capitalize() + ".",
+            "tags": json.dumps(self.text(3).split()),
+            "required_package": self.rng.choice(PACKAGES),
+            "slug": f"course-{i}",
+        }
+
+
+def build_catalog(engine, count: int, seed: int) -> None:
+    from sqlalchemy import text
+
+    writer = Writer(random.Random(seed))
+    insert = text(
+        "INSERT INTO courses (id, title, short_description, description, tags, required_package, slug, "
+        "price, is_active, is_featured) VALUES (:id, :title, :short_description, :description, :tags, "
+        ":required_package, :slug, 0, 1, 0)"
+    )
+    with engine.begin() as connection:
+        for offset in range(0, count, 5000):
+            connection.execute(insert, [writer.course(i) for i in range(offset, min(offset + 5000, count))])
+
+
+def like_statement(words: int):
+    from sqlalchemy import text
+
+    columns = ("c.title", "c.short_description", "c.description", "c.tags")
+    clauses = [
+        "(" + " OR ".join(f"{column} LIKE :word{n}" for column in columns) + ")" for n in range(words)
+    ]
+    return text(
+        f"SELECT c.id, c.title FROM courses c WHERE c.is_active AND {' AND '.join(clauses)} "
+        f"ORDER BY c.title LIMIT {PAGE_SIZE}"
+    )
+
+
+def run(args) -> Dict[str, Dict[str, float]]:
+    from sqlalchemy import create_engine
+
+    from app.db.migrations import upgrade
+    from app.services.search import search_params, search_statement, search_terms
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    try:
+        upgrade(engine)
+        started = time.perf_counter()
+        build_catalog(engine, args.courses, args.seed)
+        print(f"Indexed {args.courses:,} courses in {time.perf_counter() - started:.1f}s")
+
+        scenarios: Dict[str, Dict[str, float]] = {}
+        with engine.connect() as connection:
+            for query in QUERIES:
+                terms = search_terms(query)
+                like = like_statement(len(terms))
+                like_params = {f"word{n}": f"%{term}%" for n, term in enumerate(terms)}
+                fts = search_statement(False)
+                fts_params = search_params(terms, None, PAGE_SIZE, 0)
+                for name, statement, params in (("like", like, like_params), ("fts", fts, fts_params)):
+                    connection.execute(statement, params).all()  # warm the page cache
+                    latencies: List[float] = []
+                    started = time.perf_counter()
+                    for _ in range(args.repeat):
+                        query_started = time.perf_counter()
+                        connection.execute(statement, params).all()
+                        latencies.append(time.perf_counter() - query_started)
+                    scenarios[f"{query[:15]} {name}"] = summarize(latencies, time.perf_counter() - started)
+        return scenarios
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-text course search with LIKE scans")
+    parser.add_argument("--courses", type=int, default=100_000, help="Synthetic catalog size")
+    parser.add_argument("--repeat", type=int, default=10, help="Measured runs per query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Set before importing the app: settings are read at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'search.db')}"
+        scenarios = run(args)
+
+    print_table(scenarios)
+    for query in QUERIES:
+        like, fts = scenarios[f"{query[:15]} like"]["p50_ms"], scenarios[f"{query[:15]} fts"]["p50_ms"]
+        print(f"{query}: fts {like / fts:.1f}x (p50 vs like)")
+
+    if args.output:
+        save_results(args.output, {
+            "config": {"courses": args.courses, "repeat": args.repeat, "seed": args.seed},
+            "scenarios": scenarios,
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Serialization micro-benchmark for the paginated list endpoints.
+
+Serves the same page of rows from a throwaway in-process app three ways:
+
+* ``orm``: ORM instances returned through ``response_model``, the way the
+  list endpoints used to, with FastAPI's default ``JSONResponse``;
+* ``orm+fast``: the same, rendered by ``FastJSONResponse``;
+* ``rows``: column tuples encoded by ``page_response``, as the list
+  endpoints now do.
+
+Rows are generated once up front, so only validation and encoding are
+timed, not database reads.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Tuple
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse, orjson, page_response
+from app.models.payment import Commission, Transaction
+from app.models.user import User
+from app.schemas.pagination import Page
+from app.schemas.payment import CommissionResponse, TransactionResponse
+from app.schemas.user import UserResponse
+
+from .common import print_table, save_results, summarize
+
+PATHS = ("orm", "orm+fast", "rows")
+
+
+def _user(rng: random.Random, i: int, at: datetime) -> User:
+    return User(
+        id=str(uuid.UUID(int=rng.getrandbits(128))), email=f"user{i}@example.com",
+        full_name=f"User {i}", phone=f"+91-98{i:08d}", is_active=True, is_verified=bool(i % 3),
+        referral_code=f"{i:08X}", package_type=rng.choice(["silver", "gold", "platinum"]), created_at=at,
+    )
+
+
+def _transaction(rng: random.Random, i: int, at: datetime) -> Transaction:
+    return Transaction(
+        id=str(uuid.UUID(int=rng.getrandbits(128))), amount=rng.choice([2950.0, 5310.0, 10620.0]),
+        currency="INR", transaction_type="package_purchase", status="completed", package_type="gold",
+        razorpay_order_id=f"order_{i:014d}", description="Gold package", created_at=at,
+    )
+
+
+def _commission(rng: random.Random, i: int, at: datetime) -> Commission:
+    return Commission(
+        id=str(uuid.UUID(int=rng.getrandbits(128))), amount=round(rng.uniform(100, 5000), 2),
+        commission_type=f"level_{i % 3 + 1}", commission_rate=rng.choice([0.1, 0.05, 0.02]),
+        source_transaction_id=str(uuid.UUID(int=rng.getrandbits(128))),
+        referred_user_id=str(uuid.UUID(int=rng.getrandbits(128))), status="approved",
+        approved_at=at, paid_at=None, created_at=at,
+    )
+
+
+RESOURCES: Dict[str, Tuple[type, Callable]] = {
+    "users": (UserResponse, _user),
+    "transactions": (TransactionResponse, _transaction),
+    "commissions": (CommissionResponse, _commission),
+}
+
+
+def build_app(count: int, seed: int) -> FastAPI:
+    app = FastAPI()
+    for name, (item_model, factory) in RESOURCES.items():
+        rng = random.Random(seed)
+        start = datetime(2026, 1, 1)
+        entities = [factory(rng, i, start + timedelta(minutes=i)) for i in range(count)]
+        rows = [tuple(getattr(entity, field) for field in item_model.model_fields) for entity in entities]
+
+        def orm_page(entities=entities):
+            return Page(items=entities, next_cursor="cursor")
+
+        def row_page(item_model=item_model, rows=rows):
+            return page_response(item_model, rows, "cursor")
+
+        app.add_api_route(f"/orm/{name}", orm_page, response_model=Page[item_model], response_class=JSONResponse)
+        app.add_api_route(f"/orm+fast/{name}", orm_page, response_model=Page[item_model], response_class=FastJSONResponse)
+        app.add_api_route(f"/rows/{name}", row_page, response_model=Page[item_model])
+    return app
+
+
+async def run(args) -> dict:
+    app = build_app(args.rows, args.seed)
+    scenarios: Dict[str, Dict[str, float]] = {}
+    bodies: Dict[str, Dict[str, bytes]] = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name in RESOURCES:
+            for path in PATHS:
+                url = f"/{path}/{name}"
+                response = await client.get(url)  # warm caches and adapters
+                response.raise_for_status()
+                bodies.setdefault(name, {})[path] = response.content
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    request_started = time.perf_counter()
+                    (await client.get(url)).raise_for_status()
+                    latencies.append(time.perf_counter() - request_started)
+                summary = summarize(latencies, time.perf_counter() - started)
+                summary["bytes"] = len(response.content)
+                scenarios[f"{name} {path}"] = summary
+
+    for name, by_path in bodies.items():
+        decoded = {path: httpx.Response(200, content=body).json() for path, body in by_path.items()}
+        if any(body != decoded["orm"] for body in decoded.values()):
+            raise SystemExit(f"{name}: serialization paths disagree")
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list-endpoint serialization paths")
+    parser.add_argument("--rows", type=int, default=10_000, help="Items per page")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured requests per path")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    scenarios = asyncio.run(run(args))
+    print(f"{args.rows} rows per page, orjson {'installed' if orjson else 'not installed'}")
+    print_table(scenarios)
+    for name in RESOURCES:
+        baseline = scenarios[f"{name} orm"]["p50_ms"]
+        speedups = ", ".join(
+            f"{path} {baseline / scenarios[f'{name} {path}']['p50_ms']:.1f}x" for path in PATHS[1:]
+        )
+        print(f"{name}: {speedups} (p50 vs orm)")
+
+    if args.output:
+        save_results(args.output, {
+            "config": {"rows": args.rows, "repeat": args.repeat, "seed": args.seed, "orjson": orjson is not None},
+            "scenarios": scenarios,
+        })
+
+
+if __name__ == "__main__":
+    main()
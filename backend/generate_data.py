@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for Raju Affiliate Learning Platform
+Builds production-sized data (users, referral trees, purchases, commissions,
+enrollments) for load testing and query benchmarks
+
+Usage: python generate_data.py --users 1000000 --seed 42
+"""
+
+import argparse
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, update
+
+from app.core.security import get_password_hash
+from app.db.base import SessionLocal
+from app.db.bulk import bulk_insert
+from app.db.init_db import init_db
+from app.models.course import Course, CourseEnrollment
+from app.models.payment import Commission, Transaction
+from app.models.user import User
+from app.services.catalog import PACKAGE_TIERS, bump_catalog_version
+from app.services.commissions import settle_transactions, transition_commissions
+from app.services.earnings import rebuild_rollups
+from app.services.lessons import explode_course_content
+from app.services.platform_stats import reconcile_counters
+from app.services.referrals import backfill_referral_paths
+
+# Share of users on each package; None signed up but never bought
+PACKAGE_MIX = {None: 0.40, "silver": 0.35, "gold": 0.18, "platinum": 0.07}
+# Package prices in INR, as listed on the admin dashboard
+PACKAGE_PRICES = {"silver": 2950.0, "gold": 5310.0, "platinum": 8850.0}
+
+FAILED_CHECKOUT_RATE = 0.05
+INACTIVE_RATE = 0.02
+MAX_ENROLLMENTS = 4
+PROGRESS_STEPS = (0.0, 5.0, 20.0, 45.0, 70.0, 90.0, 100.0)
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Arjun", "Deepa", "Divya", "Ishaan", "Kavya", "Kiran",
+    "Meera", "Neha", "Nikhil", "Pooja", "Priya", "Rahul", "Rajesh", "Riya", "Rohan", "Sanjay",
+    "Sneha", "Suresh", "Tanvi", "Varun", "Vikram",
+]
+LAST_NAMES = [
+    "Agarwal", "Bose", "Chopra", "Das", "Gupta", "Iyer", "Joshi", "Kapoor", "Kumar", "Mehta",
+    "Nair", "Patel", "Rao", "Reddy", "Shah", "Sharma", "Singh", "Verma",
+]
+TOPICS = [
+    "Affiliate Marketing", "Content Creation", "Copywriting", "Digital Marketing", "Email Marketing",
+    "Facebook Ads", "Google Ads", "Instagram Growth", "Personal Branding", "Sales Funnels",
+    "SEO", "Stock Market Basics", "Video Editing", "YouTube Growth",
+]
+LEVELS = {"beginner": "Essentials", "intermediate": "Growth", "advanced": "Mastery"}
+
+
+class DatasetGenerator:
+    """
+    Deterministic generator: the same seed and ``end`` always produce the same
+    rows, ids included.
+
+    Referrers are picked by preferential attachment (every referral puts the
+    referrer back in the urn), which gives the power-law tree shape of real
+    affiliate programs: most users refer nobody, a few refer thousands.
+    """
+
+    def __init__(
+        self,
+        users: int,
+        courses: int,
+        seed: int,
+        end: datetime,
+        days: int,
+        referred_ratio: float,
+        hashed_password: str,
+    ) -> None:
+        self.user_count = users
+        self.course_count = courses
+        self.rng = random.Random(seed)
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_URL, f"raju-synthetic:{seed}")
+        self.end = end
+        self.start = end - timedelta(days=days)
+        self.referred_ratio = referred_ratio
+        self.hashed_password = hashed_password
+        self.unlocked: Dict[str, List[str]] = {}
+        self.counts: Dict[str, int] = {"users": 0, "transactions": 0, "enrollments": 0}
+
+    def _id(self, kind: str, index: int) -> str:
+        return str(uuid.uuid5(self.namespace, f"{kind}:{index}"))
+
+    def _hex(self, digits: int) -> str:
+        return f"{self.rng.getrandbits(digits * 4):0{digits}x}"
+
+    def _later(self, moment: datetime, mean_hours: float) -> datetime:
+        return min(moment + timedelta(hours=self.rng.expovariate(1 / mean_hours)), self.end)
+
+    def course_rows(self) -> List[dict]:
+        rows = []
+        for index in range(self.course_count):
+            package = PACKAGE_TIERS[index % len(PACKAGE_TIERS)]
+            topic = self.rng.choice(TOPICS)
+            level = self.rng.choice(list(LEVELS))
+            title = f"{topic} {LEVELS[level]} {index + 1}"
+            modules = [
+                {
+                    "title": f"Module {module + 1}",
+                    "lessons": [
+                        {"title": f"Lesson {lesson + 1}", "duration": self.rng.randint(5, 30)}
+                        for lesson in range(self.rng.randint(3, 8))
+                    ],
+                }
+                for module in range(self.rng.randint(2, 6))
+            ]
+            rows.append({
+                "id": self._id("course", index),
+                "title": title,
+                "description": f"{title}: a {level} course on {topic.lower()}.",
+                "short_description": f"{level.title()} {topic.lower()}",
+                "thumbnail_url": None,
+                "video_url": None,
+                "content": {"modules": modules},
+                "duration_minutes": sum(l["duration"] for m in modules for l in m["lessons"]),
+                "difficulty_level": level,
+                "price": 0.0,
+                "required_package": package,
+                "is_active": True,
+                "is_featured": self.rng.random() < 0.1,
+                "slug": title.lower().replace(" ", "-"),
+                "tags": [topic.lower(), level],
+                "created_at": self.start,
+            })
+
+        # Each package unlocks its own courses plus those of every lower one
+        unlocked: List[str] = []
+        for package in PACKAGE_TIERS:
+            unlocked = unlocked + [row["id"] for row in rows if row["required_package"] == package]
+            self.unlocked[package] = unlocked
+        return rows
+
+    def _package(self) -> Optional[str]:
+        return self.rng.choices(list(PACKAGE_MIX), weights=list(PACKAGE_MIX.values()))[0]
+
+    def _transaction(self, user_index: int, package: str, created_at: datetime, status: str) -> dict:
+        self.counts["transactions"] += 1
+        return {
+            "id": self._id("transaction", self.counts["transactions"]),
+            "user_id": self._id("user", user_index),
+            "amount": PACKAGE_PRICES[package],
+            "currency": "INR",
+            "transaction_type": "package_purchase",
+            "status": status,
+            "razorpay_order_id": f"order_{self._hex(14)}",
+            "razorpay_payment_id": f"pay_{self._hex(14)}" if status == "completed" else None,
+            "razorpay_signature": None,
+            "package_type": package,
+            "extra_data": None,
+            "description": f"{package.title()} package",
+            "created_at": created_at,
+        }
+
+    def _enrollments(self, user_index: int, package: str, purchased_at: datetime) -> List[dict]:
+        available = self.unlocked.get(package) or []
+        count = min(self.rng.randint(0, MAX_ENROLLMENTS), len(available))
+        rows = []
+        for course_id in self.rng.sample(available, count):
+            self.counts["enrollments"] += 1
+            enrolled_at = self._later(purchased_at, 72)
+            progress = self.rng.choice(PROGRESS_STEPS)
+            last_accessed_at = self._later(enrolled_at, 240) if progress else None
+            rows.append({
+                "id": self._id("enrollment", self.counts["enrollments"]),
+                "user_id": self._id("user", user_index),
+                "course_id": course_id,
+                "progress_percentage": progress,
+                "completed_at": last_accessed_at if progress == 100.0 else None,
+                "last_accessed_at": last_accessed_at,
+                "enrolled_at": enrolled_at,
+            })
+        return rows
+
+    def generate_users(self, db, chunk_size: int) -> None:
+        urn = array("q")  # user indexes, repeated once per referral they made
+        step = (self.end - self.start) / self.user_count
+        users: List[dict] = []
+        transactions: List[dict] = []
+        enrollments: List[dict] = []
+        started = time.perf_counter()
+
+        for index in range(self.user_count):
+            created_at = self.start + step * index + step * self.rng.random()
+            referred_by = None
+            if urn and self.rng.random() < self.referred_ratio:
+                referrer = urn[self.rng.randrange(len(urn))]
+                referred_by = self._id("user", referrer)
+                urn.append(referrer)
+            urn.append(index)
+
+            package = self._package()
+            purchased_at = self._later(created_at, 24) if package else None
+            users.append({
+                "id": self._id("user", index),
+                "email": "admin@example.com" if index == 0 else f"user{index}@example.com",
+                "hashed_password": self.hashed_password,
+                "full_name": f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                "phone": f"+91-9{self.rng.randrange(10 ** 9):09d}",
+                "is_active": index == 0 or self.rng.random() >= INACTIVE_RATE,
+                "is_verified": True,
+                "is_superuser": index == 0,
+                "avatar_url": None,
+                "bio": None,
+                "referral_code": f"R{index:07X}",
+                "referred_by": referred_by,
+                "package_type": package,
+                "package_purchased_at": purchased_at,
+                "created_at": created_at,
+            })
+
+            if self.rng.random() < FAILED_CHECKOUT_RATE:
+                attempted = package or self.rng.choice(PACKAGE_TIERS)
+                transactions.append(self._transaction(index, attempted, self._later(created_at, 12), "failed"))
+            if package:
+                transactions.append(self._transaction(index, package, purchased_at, "completed"))
+                enrollments.extend(self._enrollments(index, package, purchased_at))
+
+            if len(users) >= chunk_size or index == self.user_count - 1:
+                bulk_insert(db, User, users)
+                bulk_insert(db, Transaction, transactions)
+                bulk_insert(db, CourseEnrollment, enrollments)
+                db.commit()
+                self.counts["users"] = index + 1
+                print(
+                    f"  … {index + 1:,} users, {self.counts['transactions']:,} transactions, "
+                    f"{self.counts['enrollments']:,} enrollments ({time.perf_counter() - started:.0f}s)"
+                )
+                users, transactions, enrollments = [], [], []
+
+
+def generate(args) -> None:
+    init_db()
+    db = SessionLocal()
+    try:
+        if db.scalar(select(func.count()).select_from(User)):
+            raise SystemExit("❌ The database already has users; generate into an empty database")
+
+        end = datetime.fromisoformat(args.end) if args.end else datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        generator = DatasetGenerator(
+            users=args.users,
+            courses=args.courses,
+            seed=args.seed,
+            end=end,
+            days=args.days,
+            referred_ratio=args.referred_ratio,
+            # One bcrypt hash shared by every user: hashing is the slowest part of a real signup
+            hashed_password=get_password_hash(args.password),
+        )
+        print(f"🌱 Generating {args.users:,} users (seed {args.seed}, ending {end.date()})...")
+
+        courses = generator.course_rows()
+        bulk_insert(db, Course, courses)
+        bump_catalog_version(db)
+        db.commit()
+        modules, lessons = explode_course_content(db)
+        print(f"✅ {len(courses)} courses, {modules} modules, {lessons} lessons")
+
+        generator.generate_users(db, args.chunk_size)
+
+        paths = backfill_referral_paths(db)
+        print(f"✅ {paths:,} referral closure rows")
+
+        # Synthetic earners must not get a "commission earned" email each
+        settled = settle_transactions(db, emails=False)
+        # Settlement stamps commissions with the current time; date them at their purchase
+        db.execute(
+            update(Commission).values(
+                created_at=select(Transaction.created_at)
+                .where(Transaction.id == Commission.source_transaction_id)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+        approved = transition_commissions(db, "approved", created_before=end - timedelta(days=7))
+        db.commit()
+        paid = transition_commissions(db, "paid", created_before=end - timedelta(days=30))
+        db.commit()
+        print(f"✅ {settled.commissions:,} commissions ({approved:,} approved, {paid:,} of them paid)")
+
+        report = rebuild_rollups(db)
+        print(f"✅ {report.rows:,} earnings rollup rows")
+
+        # Bulk inserts bypass the counter updates; /admin/stats reads these
+        stats = reconcile_counters(db)
+        print(f"✅ {stats.corrected} platform counters filled")
+        print("\n🎉 Dataset generated! Every user's password is the --password value")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for load testing")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--courses", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365, help="Signups are spread over this many days")
+    parser.add_argument("--end", help="ISO date of the last signup (default: today; fix it for identical datasets)")
+    parser.add_argument("--referred-ratio", type=float, default=0.8, help="Share of signups with a referrer")
+    parser.add_argument("--password", default="pass123")
+    parser.add_argument("--chunk-size", type=int, default=20_000, help="Users per bulk insert")
+    generate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Management commands for Raju Affiliate Learning Platform
+
+Usage: python manage.py <command> [options]
+"""
+
+import argparse
+from datetime import datetime
+
+from app.db.base import SessionLocal
+
+
+def migrate(args):
+    from app.db.base import engine
+    from app.db.migrations import (
+        SchemaOutOfDate, current_revision, has_baseline_tables, head_revision, stamp_baseline, upgrade,
+    )
+
+    adopted = False
+    if current_revision(engine) is None and has_baseline_tables(engine):
+        if not args.adopt:
+            raise SystemExit(
+                "❌ Database has tables but no migration history; "
+                "if it was created by create_all(), run `python manage.py migrate --adopt`"
+            )
+        try:
+            stamp_baseline(engine)
+        except SchemaOutOfDate as exc:
+            raise SystemExit(f"❌ {exc}")
+        adopted = True
+        print("✅ Adopted existing database at the baseline revision")
+
+    before = current_revision(engine)
+    upgrade(engine, args.revision)
+    after = current_revision(engine)
+    if before == after:
+        print(f"✅ Database already at revision {after} (head is {head_revision()})")
+    else:
+        print(f"✅ Migrated database from {before or 'empty'} to {after}")
+
+    if adopted and after == head_revision():
+        rebuild_derived_tables()
+
+
+def rebuild_derived_tables():
+    """Fill the tables added since the baseline from the adopted database's rows."""
+    from app.services.earnings import rebuild_rollups
+    from app.services.platform_stats import reconcile_counters
+    from app.services.referrals import backfill_referral_paths
+
+    db = SessionLocal()
+    try:
+        print(f"✅ Rebuilt referral tree: {backfill_referral_paths(db)} closure rows")
+        print(f"✅ Rebuilt {rebuild_rollups(db).rows} earnings rollup rows")
+        print(f"✅ Filled {reconcile_counters(db).corrected} platform counters")
+    finally:
+        db.close()
+
+
+def backfill_referrals(args):
+    from app.services.referrals import backfill_referral_paths
+
+    db = SessionLocal()
+    try:
+        rows = backfill_referral_paths(db)
+        print(f"✅ Rebuilt referral tree: {rows} closure rows")
+    finally:
+        db.close()
+
+
+def settle_commissions(args):
+    from app.services.commissions import settle_transactions
+
+    db = SessionLocal()
+    try:
+        result = settle_transactions(db, batch_size=args.batch_size)
+        print(
+            f"✅ Settled {result.transactions} transactions into "
+            f"{result.commissions} commissions ({result.batches} batches)"
+        )
+    finally:
+        db.close()
+
+
+def transition_commissions(args):
+    from app.services.commissions import transition_commissions as transition
+
+    if not (args.ids or args.user_id or args.before or args.all):
+        raise SystemExit(
+            "❌ No filter given; pass --ids, --user-id or --before, or --all to move every commission"
+        )
+    db = SessionLocal()
+    try:
+        created_before = datetime.fromisoformat(args.before) if args.before else None
+        changed = transition(
+            db,
+            args.status,
+            commission_ids=args.ids,
+            user_id=args.user_id,
+            created_before=created_before,
+        )
+        db.commit()
+        print(f"✅ Marked {changed} commissions as {args.status}")
+    finally:
+        db.close()
+
+
+def rebuild_earnings(args):
+    from app.services.earnings import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        report = rebuild_rollups(db, dry_run=args.dry_run)
+        for drift in report.drifted[: args.show]:
+            print(f"  ⚠️  {drift}")
+        action = "Checked" if args.dry_run else "Rebuilt"
+        print(f"✅ {action} {report.rows} rollup rows, {len(report.drifted)} drifted")
+    finally:
+        db.close()
+
+
+def reconcile_stats(args):
+    from app.services.platform_stats import reconcile_counters
+
+    db = SessionLocal()
+    try:
+        report = reconcile_counters(db, dry_run=args.dry_run)
+        for drift in report.drifted:
+            print(f"  ⚠️  {drift}")
+        if args.dry_run:
+            print(f"✅ Checked {report.checked} platform counters, {len(report.drifted)} drifted")
+        else:
+            print(
+                f"✅ Checked {report.checked} platform counters: {report.corrected} corrected, "
+                f"{report.skipped} changed meanwhile (rerun to retry)"
+            )
+    finally:
+        db.close()
+
+
+def build_recommendations(args):
+    from app.services.recommendations import refresh_recommendations
+
+    db = SessionLocal()
+    try:
+        report = refresh_recommendations(db, full=args.full, k=args.neighbors)
+        mode = "Rebuilt" if report.full else "Refreshed"
+        engine = "sparse matrix" if report.vectorized else "pure Python"
+        print(
+            f"✅ {mode} neighbors of {report.courses} courses ({report.changed} with new learners): "
+            f"{report.neighbors} rows from {report.enrollments} enrollments in {report.elapsed_ms:.0f} ms ({engine})"
+        )
+    finally:
+        db.close()
+
+
+def payout_run(args):
+    from app.models.payment import PayoutBatch
+    from app.services.payouts import create_payout_batch, stream_payout
+
+    db = SessionLocal()
+    try:
+        if args.batch_id:
+            batch = db.get(PayoutBatch, args.batch_id)
+            if batch is None or batch.status == "released":
+                raise SystemExit(f"❌ Payout batch {args.batch_id} not found or released; run without --batch-id")
+        batch_id = args.batch_id or create_payout_batch(db).id
+    finally:
+        db.close()
+
+    with open(args.output, "w", newline="") as output:
+        for chunk in stream_payout(SessionLocal, batch_id, args.format):
+            output.write(chunk)
+    print(f"✅ Payout batch {batch_id} written to {args.output}")
+
+
+def process_webhooks(args):
+    from app.services.webhooks import drain_events
+
+    db = SessionLocal()
+    try:
+        outcomes = drain_events(db)
+        summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+        print(f"✅ Applied Razorpay events: {summary or 'none ready'}")
+    finally:
+        db.close()
+
+
+def send_emails(args):
+    from app.core.config import settings
+    from app.services.emails import drain_outbox, smtp_connection
+
+    if not settings.email_enabled:
+        raise SystemExit("SMTP_HOST and EMAIL_FROM must be set to send email")
+    db = SessionLocal()
+    connection = smtp_connection()
+    try:
+        outcomes = drain_outbox(db, connection, batch_size=args.batch_size)
+        summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+        print(f"✅ Sent queued emails: {summary or 'none ready'}")
+    finally:
+        connection.close()
+        db.close()
+
+
+def smtp_stand_in(args):
+    import asyncio
+
+    from app.services.smtp import LocalSMTPServer
+
+    def show(received):
+        message = received.message
+        print(f"📧 {received.mail_from} -> {', '.join(received.recipients)}: {message['Subject']}", flush=True)
+
+    async def serve():
+        server = LocalSMTPServer(args.host, args.port, fail_rate=args.fail_rate, on_message=show)
+        port = await server.start()
+        print(f"✅ Accepting mail on {args.host}:{port} (run the API with SMTP_HOST={args.host} "
+              f"SMTP_PORT={port} SMTP_STARTTLS=false)", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def simulate_razorpay(args):
+    import asyncio
+    import random
+
+    import httpx
+    from sqlalchemy import select
+
+    from app.core.config import settings
+    from app.models.payment import Transaction
+    from app.models.user import User
+    from app.services.razorpay import LocalRazorpay
+
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        raise SystemExit("RAZORPAY_WEBHOOK_SECRET must be set to sign simulated webhooks")
+    razorpay = LocalRazorpay(settings.RAZORPAY_WEBHOOK_SECRET)
+
+    # Stand in for the checkout step: a pending purchase per order, as the
+    # order endpoint would have written before redirecting to Razorpay
+    db = SessionLocal()
+    try:
+        user_ids = list(db.scalars(select(User.id).where(User.is_active.is_(True)).limit(args.orders)))
+        deliveries = []
+        for user_id in user_ids:
+            order = razorpay.create_order(args.amount, receipt=user_id)
+            db.add(Transaction(
+                user_id=user_id,
+                amount=args.amount,
+                transaction_type="package_purchase",
+                status="pending",
+                razorpay_order_id=order["id"],
+                package_type=args.package,
+            ))
+            deliveries.append(razorpay.event("payment.captured", order))
+            deliveries.append(razorpay.event("order.paid", order))
+        db.commit()
+    finally:
+        db.close()
+
+    # Razorpay retries until it sees a 2xx, so the same event arrives more than once
+    deliveries += random.sample(deliveries, k=int(len(deliveries) * args.duplicate_ratio))
+    random.shuffle(deliveries)
+
+    async def send():
+        limit = asyncio.Semaphore(args.concurrency)
+        async with httpx.AsyncClient(timeout=30) as client:
+            async def deliver(delivery):
+                async with limit:
+                    response = await client.post(args.url, content=delivery.body, headers=delivery.headers)
+                    return response.status_code
+            return await asyncio.gather(*(deliver(delivery) for delivery in deliveries))
+
+    statuses = asyncio.run(send())
+    accepted = sum(1 for code in statuses if code == 200)
+    print(f"✅ Delivered {len(statuses)} webhooks for {len(user_ids)} orders, {accepted} acknowledged")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Platform management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Apply schema migrations (run before starting new code)"
+    )
+    migrate_parser.add_argument("revision", nargs="?", default="head")
+    migrate_parser.add_argument(
+        "--adopt", action="store_true",
+        help="Stamp a database created by create_all() before migrations existed, then upgrade "
+             "and rebuild the derived tables"
+    )
+    migrate_parser.set_defaults(func=migrate)
+
+    backfill = subparsers.add_parser(
+        "backfill-referrals", help="Rebuild the referral closure table from users.referred_by"
+    )
+    backfill.set_defaults(func=backfill_referrals)
+
+    settle = subparsers.add_parser(
+        "settle-commissions", help="Create commissions for completed, unsettled transactions"
+    )
+    settle.add_argument("--batch-size", type=int, default=None)
+    settle.set_defaults(func=settle_commissions)
+
+    transition = subparsers.add_parser(
+        "transition-commissions", help="Bulk-move commissions to approved, paid or cancelled"
+    )
+    transition.add_argument("status", choices=["approved", "paid", "cancelled"])
+    transition.add_argument("--ids", nargs="+", help="Only these commission ids")
+    transition.add_argument("--user-id", help="Only commissions earned by this user")
+    transition.add_argument("--before", help="Only commissions created before this ISO date")
+    transition.add_argument(
+        "--all", action="store_true", help="Move every commission in a valid source status (no filter)"
+    )
+    transition.set_defaults(func=transition_commissions)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-earnings", help="Recompute earnings rollups from the commission ledger"
+    )
+    rebuild.add_argument("--dry-run", action="store_true", help="Only report drift")
+    rebuild.add_argument("--show", type=int, default=20, help="Drifted rows to print")
+    rebuild.set_defaults(func=rebuild_earnings)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-stats", help="Recompute the admin platform counters from the tables"
+    )
+    reconcile.add_argument("--dry-run", action="store_true", help="Only report drift")
+    reconcile.set_defaults(func=reconcile_stats)
+
+    recommendations = subparsers.add_parser(
+        "build-recommendations", help="Recompute \"learners also took\" course neighbors from enrollments"
+    )
+    recommendations.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every course, not only those whose learners changed; needed after backfilling "
+        "enrollments or deleting them from courses that have since gained as many",
+    )
+    recommendations.add_argument("--neighbors", type=int, default=None, help="Neighbors kept per course")
+    recommendations.set_defaults(func=build_recommendations)
+
+    payout = subparsers.add_parser(
+        "payout-run", help="Claim approved commissions and write the payout file"
+    )
+    payout.add_argument("output", help="File to write")
+    payout.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    payout.add_argument("--batch-id", help="Re-export an existing batch instead of claiming a new one")
+    payout.set_defaults(func=payout_run)
+
+    webhooks = subparsers.add_parser(
+        "process-webhooks", help="Apply stored Razorpay events that are ready, then exit"
+    )
+    webhooks.set_defaults(func=process_webhooks)
+
+    emails = subparsers.add_parser(
+        "send-emails", help="Send queued emails that are ready over SMTP, then exit"
+    )
+    emails.add_argument("--batch-size", type=int, default=None)
+    emails.set_defaults(func=send_emails)
+
+    stand_in = subparsers.add_parser(
+        "smtp-stand-in", help="Run a local SMTP server that accepts and prints every message"
+    )
+    stand_in.add_argument("--host", default="127.0.0.1")
+    stand_in.add_argument("--port", type=int, default=1025)
+    stand_in.add_argument("--fail-rate", type=float, default=0.0, help="Share of messages refused with a 451")
+    stand_in.set_defaults(func=smtp_stand_in)
+
+    simulate = subparsers.add_parser(
+        "simulate-razorpay", help="Create pending orders and fire signed webhooks at a running API"
+    )
+    simulate.add_argument("--url", default="http://localhost:8000/api/v1/webhooks/razorpay")
+    simulate.add_argument("--orders", type=int, default=100)
+    simulate.add_argument("--amount", type=float, default=2999.0)
+    simulate.add_argument("--package", choices=["silver", "gold", "platinum"], default="gold")
+    simulate.add_argument("--duplicate-ratio", type=float, default=0.3)
+    simulate.add_argument("--concurrency", type=int, default=50)
+    simulate.set_defaults(func=simulate_razorpay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ from app.db.base import SessionLocal
 from app.models.user import User
 from app.models.course import Course
 from app.core.security import get_password_hash
+from app.services.catalog import bump_catalog_version
+import app.services.lessons  # noqa: F401  explodes Course.content into lessons on flush
 import uuid
 
 def create_sample_data():
@@ -186,6 +188,8 @@ def create_sample_data():
             db.add(user)
             created_users.append(user)
         
+        # Tell running API workers to rebuild their catalog snapshot
+        bump_catalog_version(db)
         db.commit()
         
         print(f"✅ Created {len(created_courses)} courses")
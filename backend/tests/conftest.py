@@ -0,0 +1,99 @@
+"""
+Shared fixtures. Settings are read when ``app`` is first imported, so the
+environment is fixed here, before any test module imports it: a throwaway
+SQLite database, cheap password hashing, no rate limits and no mail server.
+"""
+
+import os
+import shutil
+import tempfile
+
+DATA_DIR = tempfile.mkdtemp(prefix="raju-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATA_DIR, 'test.db')}"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["RAZORPAY_WEBHOOK_SECRET"] = "test-webhook-secret"
+os.environ.pop("SMTP_HOST", None)
+
+import uuid
+from typing import Optional
+
+import httpx
+import pytest
+from sqlalchemy import delete
+
+from app.db.base import Base, SessionLocal, async_engine, engine
+from app.db.migrations import upgrade
+from app.models.payment import Transaction
+from app.models.user import User
+from app.services.referrals import link_user_statement
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    upgrade(engine)
+    yield
+    engine.dispose()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """A session on the test database; every table is emptied afterwards."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(delete(table))
+        session.commit()
+        session.close()
+
+
+@pytest.fixture
+async def client(db):
+    """HTTP client for the app, without its startup hooks or background workers."""
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    # Pooled aiosqlite connections belong to this test's event loop
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a committed user, optionally referred by another one."""
+    def make(name: str, referrer: Optional[User] = None, package: Optional[str] = None) -> User:
+        user = User(
+            email=f"{name}@example.com",
+            hashed_password="not-a-hash",
+            full_name=name.title(),
+            referral_code=uuid.uuid4().hex[:8].upper(),
+            referred_by=referrer.id if referrer else None,
+            package_type=package,
+        )
+        db.add(user)
+        db.flush()
+        db.execute(link_user_statement(user.id, user.referred_by))
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_purchase(db):
+    """Create a committed, completed package purchase, ready to be settled."""
+    def make(buyer: User, amount: float = 2999.0, package: str = "gold") -> Transaction:
+        transaction = Transaction(
+            user_id=buyer.id,
+            amount=amount,
+            transaction_type="package_purchase",
+            status="completed",
+            package_type=package,
+        )
+        db.add(transaction)
+        db.commit()
+        return transaction
+    return make
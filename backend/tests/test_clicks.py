@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, select
+
+from app.core.hyperloglog import HyperLogLog, hash64
+from app.db.base import AsyncSessionLocal, async_engine
+from app.models.referral import ReferralClick
+from app.services.clicks import ClickBuffer, referrer_cache, unknown_code_cache
+
+SIGNUP = "http://localhost:3000/auth/signup"
+# 1.04 / sqrt(1024) registers
+STANDARD_ERROR = 0.0325
+
+
+def sketch_of(values) -> HyperLogLog:
+    sketch = HyperLogLog()
+    for value in values:
+        sketch.add_hash(hash64(str(value)))
+    return sketch
+
+
+@pytest.fixture
+def code_lookups():
+    """Count the referral-code SELECTs the app runs."""
+    referrer_cache.clear()
+    unknown_code_cache.clear()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "users.referral_code" in statement:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    referrer_cache.clear()
+    unknown_code_cache.clear()
+
+
+async def test_unknown_codes_are_cached_briefly(db, client, make_user, code_lookups):
+    for _ in range(3):
+        response = await client.get("/r/NOSUCHCODE")
+        assert (response.status_code, response.headers["location"]) == (302, SIGNUP)
+    assert len(code_lookups) == 1
+
+    # The code is taken later; once the short entry expires the link works
+    user = make_user("late")
+    user.referral_code = "NOSUCHCODE"
+    db.commit()
+    assert (await client.get("/r/NOSUCHCODE")).headers["location"] == SIGNUP
+    unknown_code_cache.clear()
+    assert (await client.get("/r/NOSUCHCODE")).headers["location"] == f"{SIGNUP}?ref=NOSUCHCODE"
+    assert len(code_lookups) == 2
+
+
+@pytest.mark.parametrize("count", [10, 500, 5_000, 50_000])
+def test_estimate_is_within_the_standard_error(count):
+    estimate = sketch_of(range(count)).estimate()
+    assert abs(estimate - count) <= 3 * STANDARD_ERROR * count + 1
+
+
+def test_merged_sketches_count_the_union():
+    first, second = sketch_of(range(0, 6_000)), sketch_of(range(4_000, 10_000))
+    merged = HyperLogLog.union([first, second])
+
+    # Merging is exact: the same registers as one sketch of every value
+    assert merged.to_bytes() == sketch_of(range(10_000)).to_bytes()
+    assert abs(merged.estimate() - 10_000) <= 3 * STANDARD_ERROR * 10_000
+    assert HyperLogLog.union([second, first, first]).to_bytes() == merged.to_bytes()
+    assert HyperLogLog(merged.to_bytes()).estimate() == merged.estimate()
+
+
+async def test_flushes_from_two_workers_merge_their_visitors(db, make_user):
+    referrer = make_user("referrer")
+    at = datetime(2026, 1, 5, 9, 15, tzinfo=timezone.utc)
+    workers = [ClickBuffer(AsyncSessionLocal, interval_ms=60_000, max_entries=1000) for _ in range(2)]
+    for visitor in range(0, 600):
+        workers[0].record(referrer.id, hash64(str(visitor)), at=at)
+    for visitor in range(400, 1_000):
+        workers[1].record(referrer.id, hash64(str(visitor)), at=at)
+    for worker in workers:
+        await worker.flush()
+    await async_engine.dispose()
+
+    clicks, sketch = db.execute(select(ReferralClick.clicks, ReferralClick.visitor_sketch)).one()
+    assert clicks == 1_200
+    assert sketch == sketch_of(range(1_000)).to_bytes()
@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.counter import Counter
+from app.models.earnings import EarningsRollup
+from app.models.email import EmailOutbox
+from app.models.payment import Commission
+from app.services.commissions import settle_transactions, transition_commissions
+from app.services.platform_stats import PENDING_COMMISSIONS_PAISE
+
+
+@pytest.fixture
+def chain(make_user):
+    """top <- referrer <- buyer"""
+    top = make_user("top")
+    referrer = make_user("referrer", referrer=top)
+    buyer = make_user("buyer", referrer=referrer)
+    return top, referrer, buyer
+
+
+def commissions(db):
+    db.expire_all()
+    return db.scalars(select(Commission).order_by(Commission.amount.desc())).all()
+
+
+def ledger(db):
+    """Everything settlement writes besides the commissions themselves."""
+    db.expire_all()
+    rollups = db.execute(
+        select(EarningsRollup.user_id, EarningsRollup.period, EarningsRollup.status, EarningsRollup.amount,
+               EarningsRollup.count)
+        .order_by(EarningsRollup.user_id, EarningsRollup.period, EarningsRollup.status)
+    ).all()
+    pending = db.scalar(select(Counter.value).where(Counter.name == PENDING_COMMISSIONS_PAISE))
+    emails = db.scalars(select(EmailOutbox.dedupe_key).order_by(EmailOutbox.dedupe_key)).all()
+    return rollups, pending, emails
+
+
+def test_settling_twice_pays_once(db, chain, make_purchase):
+    top, referrer, buyer = chain
+    make_purchase(buyer)
+
+    result = settle_transactions(db)
+    assert (result.transactions, result.commissions) == (1, 2)
+    assert [(c.user_id, c.commission_type, c.amount, c.status) for c in commissions(db)] == [
+        (referrer.id, "direct", 299.9, "pending"),
+        (top.id, "indirect", 59.98, "pending"),
+    ]
+    settled = ledger(db)
+    assert settled[1] == 29990 + 5998
+    assert len(settled[2]) == 2
+
+    again = settle_transactions(db)
+    assert (again.transactions, again.commissions) == (0, 0)
+    assert len(commissions(db)) == 2
+    assert ledger(db) == settled
+
+    # Naming the transaction explicitly does not pay it again either
+    assert settle_transactions(db, transaction_ids=[c.source_transaction_id for c in commissions(db)]).commissions == 0
+    assert ledger(db) == settled
+
+
+def test_transitions_only_move_forward(db, chain, make_purchase):
+    _, _, buyer = chain
+    make_purchase(buyer)
+    settle_transactions(db)
+    direct, indirect = commissions(db)
+
+    # Paid needs approval first
+    assert transition_commissions(db, "paid", commission_ids=[direct.id]) == 0
+    assert transition_commissions(db, "approved", commission_ids=[direct.id]) == 1
+    assert transition_commissions(db, "approved", commission_ids=[direct.id]) == 0
+    assert transition_commissions(db, "paid", commission_ids=[direct.id]) == 1
+    db.commit()
+
+    # Nothing leaves paid or cancelled
+    for status in ("approved", "cancelled", "paid"):
+        assert transition_commissions(db, status, commission_ids=[direct.id]) == 0
+    assert transition_commissions(db, "cancelled", commission_ids=[indirect.id]) == 1
+    for status in ("approved", "paid", "cancelled"):
+        assert transition_commissions(db, status, commission_ids=[indirect.id]) == 0
+    db.commit()
+
+    direct, indirect = commissions(db)
+    assert (direct.status, indirect.status) == ("paid", "cancelled")
+    assert direct.approved_at is not None and direct.paid_at is not None
+    # Neither is pending any more
+    assert db.scalar(select(Counter.value).where(Counter.name == PENDING_COMMISSIONS_PAISE)) == 0
+
+
+def test_transition_reads_id_iterators_once(db, chain, make_purchase):
+    _, _, buyer = chain
+    make_purchase(buyer)
+    settle_transactions(db)
+    direct, indirect = commissions(db)
+    transition_commissions(db, "approved", commission_ids=[direct.id])
+    db.commit()
+
+    # Cancelling runs one UPDATE per source status (pending, then approved)
+    assert transition_commissions(db, "cancelled", commission_ids=iter([direct.id])) == 1
+    assert transition_commissions(db, "cancelled", commission_ids=(c for c in [indirect.id])) == 1
+    assert transition_commissions(db, "cancelled", commission_ids=[]) == 0
+    db.commit()
+    assert [c.status for c in commissions(db)] == ["cancelled", "cancelled"]
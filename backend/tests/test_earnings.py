@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import select, update
+
+from app.models.earnings import EarningsRollup
+from app.models.payment import Commission
+from app.services.commissions import settle_transactions, transition_commissions
+from app.services.earnings import REFERRAL, RollupDelta, rebuild_rollups
+
+
+@pytest.fixture
+def earners(db, make_user, make_purchase):
+    """Two earners with commissions in every status."""
+    top = make_user("top")
+    referrer = make_user("referrer", referrer=top)
+    buyers = [make_user(f"buyer{n}", referrer=referrer) for n in range(4)]
+    # Signup records the referral in the referrer's rollups, as record_referral does
+    signups = RollupDelta()
+    for user in [referrer, *buyers]:
+        signups.add(user.referred_by, None, REFERRAL, 0.0)
+    signups.apply(db)
+    db.commit()
+
+    for buyer, amount in zip(buyers, [2999.0, 4999.0, 9999.0, 999.0]):
+        make_purchase(buyer, amount=amount)
+    settle_transactions(db)
+    ids = db.scalars(select(Commission.id).order_by(Commission.amount)).all()
+    transition_commissions(db, "approved", commission_ids=ids[:5])
+    transition_commissions(db, "paid", commission_ids=ids[:2])
+    transition_commissions(db, "cancelled", commission_ids=ids[5:6])
+    db.commit()
+    return top, referrer
+
+
+def test_incremental_rollups_match_a_rebuild(db, earners):
+    report = rebuild_rollups(db, dry_run=True)
+    assert report.drifted == []
+    statuses = set(db.scalars(select(EarningsRollup.status)))
+    assert statuses == {"pending", "approved", "paid", "cancelled", REFERRAL}
+
+
+def test_rebuild_reports_and_fixes_drift(db, earners):
+    top, _ = earners
+    db.execute(
+        update(EarningsRollup)
+        .where(EarningsRollup.user_id == top.id, EarningsRollup.period == "month", EarningsRollup.status == "paid")
+        .values(amount=EarningsRollup.amount + 100, count=EarningsRollup.count + 1)
+    )
+    db.commit()
+
+    [drift] = rebuild_rollups(db, dry_run=True).drifted
+    assert (drift["user_id"], drift["period"], drift["status"]) == (top.id, "month", "paid")
+    assert drift["stored_amount"] == round(drift["expected_amount"] + 100, 2)
+    assert drift["stored_count"] == drift["expected_count"] + 1
+    # A dry run changes nothing
+    assert len(rebuild_rollups(db, dry_run=True).drifted) == 1
+
+    assert len(rebuild_rollups(db).drifted) == 1
+    assert rebuild_rollups(db, dry_run=True).drifted == []
@@ -0,0 +1,171 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.email import EmailOutbox
+from app.services.emails import (
+    EmailDispatcher,
+    _email,
+    drain_outbox,
+    queue_emails,
+    smtp_connection,
+    welcome_email,
+)
+from app.services.smtp import LocalSMTPServer
+
+RETRY_BASE_SECONDS = 60
+UNKNOWN_ADDRESS = "nobody@example.com"
+
+
+@pytest.fixture
+async def smtp_server(monkeypatch):
+    server = LocalSMTPServer(seed=7, unknown_recipients=[UNKNOWN_ADDRESS])
+    await server.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", server.host)
+    monkeypatch.setattr(settings, "SMTP_PORT", server.port)
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(settings, "EMAIL_FROM", "Raju <noreply@example.com>")
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", RETRY_BASE_SECONDS)
+    yield server
+    await server.stop()
+
+
+def queue(db, count, to_address="learner@example.com"):
+    emails = [_email("test", f"{to_address}:{n}", to_address, f"Message {n}", f"Body {n}\n") for n in range(count)]
+    queue_emails(db, emails)
+    db.commit()
+    return emails
+
+
+def outbox(db):
+    db.expire_all()
+    return db.scalars(select(EmailOutbox).order_by(EmailOutbox.subject)).all()
+
+
+async def drain(db, connection):
+    # smtplib blocks, and the stand-in serves on this event loop
+    return await asyncio.to_thread(drain_outbox, db, connection)
+
+
+def make_ready(db):
+    """Move every scheduled retry into the past."""
+    db.execute(update(EmailOutbox).values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    db.commit()
+
+
+def seconds_until_retry(row) -> float:
+    return (row.next_attempt_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+
+
+def test_queues_without_smtp_settings(db, make_user):
+    assert not settings.email_enabled
+    user = make_user("learner")
+
+    queue_emails(db, [welcome_email(user)])
+    queue_emails(db, [welcome_email(user)])
+    db.commit()
+    queue_emails(db, [welcome_email(user)])
+    db.commit()
+
+    [row] = outbox(db)
+    assert (row.dedupe_key, row.status, row.to_address) == (f"welcome:{user.id}", "pending", user.email)
+
+
+async def test_drain_sends_over_one_session(db, smtp_server):
+    emails = queue(db, 5)
+    connection = smtp_connection()
+
+    assert await drain(db, connection) == {"sent": 5}
+    assert await drain(db, connection) == {}
+    await asyncio.to_thread(connection.close)
+
+    assert smtp_server.sessions == 1
+    received = {message.message["Message-ID"]: message.message["Subject"] for message in smtp_server.messages}
+    assert received == {f"<{email['id']}@example.com>": email["subject"] for email in emails}
+    assert [row.status for row in outbox(db)] == ["sent"] * 5
+
+
+async def test_temporary_failures_retry_with_backoff(db, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 3)
+    queue(db, 2)
+    connection = smtp_connection()
+    smtp_server.fail_rate = 1.0
+
+    assert await drain(db, connection) == {"failed": 2}
+    for row in outbox(db):
+        assert (row.status, row.attempts) == ("failed", 1)
+        assert "451" in row.last_error
+        assert RETRY_BASE_SECONDS - 5 < seconds_until_retry(row) <= RETRY_BASE_SECONDS
+    # Not due yet
+    assert await drain(db, connection) == {}
+
+    make_ready(db)
+    assert await drain(db, connection) == {"failed": 2}
+    for row in outbox(db):
+        assert row.attempts == 2
+        assert 2 * RETRY_BASE_SECONDS - 5 < seconds_until_retry(row) <= 2 * RETRY_BASE_SECONDS
+
+    smtp_server.fail_rate = 0.0
+    make_ready(db)
+    assert await drain(db, connection) == {"sent": 2}
+    assert [(row.status, row.attempts, row.last_error) for row in outbox(db)] == [("sent", 2, None)] * 2
+
+    # The last allowed attempt failing gives up on the email
+    queue(db, 1, to_address="late@example.com")
+    smtp_server.fail_rate = 1.0
+    assert await drain(db, connection) == {"failed": 1}
+    make_ready(db)
+    assert await drain(db, connection) == {"failed": 1}
+    make_ready(db)
+    assert await drain(db, connection) == {"dead": 1}
+    await asyncio.to_thread(connection.close)
+    assert smtp_server.sessions == 1
+
+
+async def test_permanent_rejection_is_dead_at_once(db, smtp_server):
+    nobody = _email("test", "nobody", UNKNOWN_ADDRESS, "Message nobody", "Body\n")
+    queue_emails(db, [nobody])
+    queue(db, 2)
+    connection = smtp_connection()
+
+    assert await drain(db, connection) == {"sent": 2, "dead": 1}
+    await asyncio.to_thread(connection.close)
+
+    dead = db.scalar(select(EmailOutbox).where(EmailOutbox.to_address == UNKNOWN_ADDRESS))
+    assert (dead.status, dead.attempts, dead.next_attempt_at) == ("dead", 1, None)
+    assert "550" in dead.last_error
+    # The rejection did not cost the session
+    assert smtp_server.sessions == 1
+    assert len(smtp_server.messages) == 2
+
+
+async def test_dispatcher_reuses_its_sessions(db, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 0)
+    smtp_server.fail_rate = 0.2
+    emails = queue(db, 40)
+    dispatcher = EmailDispatcher(
+        session_factory=SessionLocal,
+        connection_factory=smtp_connection,
+        connections=settings.EMAIL_CONNECTIONS,
+        batch_size=8,
+        poll_seconds=0.05,
+    )
+
+    dispatcher.start()
+    dispatcher.notify()
+    for _ in range(200):
+        if len(smtp_server.messages) == len(emails):
+            break
+        await asyncio.sleep(0.05)
+    stats = dispatcher.stats()
+    await dispatcher.stop()
+
+    assert len(smtp_server.messages) == len(emails)
+    assert smtp_server.rejected > 0
+    assert stats["batches"] >= len(emails) // 8
+    assert smtp_server.sessions == stats["smtp_sessions"] == settings.EMAIL_CONNECTIONS
+    assert {row.status for row in outbox(db)} == {"sent"}
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.models.email import EmailOutbox
+from app.models.payment import Commission
+from app.services.platform_stats import reconcile_counters
+from benchmarks.common import DATASET_END, PASSWORD
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_dataset_is_quiet_and_reconciled(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'dataset.db'}"
+    subprocess.run(
+        [sys.executable, "generate_data.py", "--users", "200", "--seed", "7", "--end", DATASET_END, "--password", PASSWORD],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+    engine = create_engine(database_url)
+    try:
+        with Session(engine) as db:
+            assert db.scalar(select(func.count()).select_from(Commission)) > 0
+            # Synthetic commissions queue no emails
+            assert db.scalar(select(func.count()).select_from(EmailOutbox)) == 0
+            # The counters behind /admin/stats are already exact
+            assert reconcile_counters(db, dry_run=True).drifted == []
+    finally:
+        engine.dispose()
@@ -0,0 +1,80 @@
+from sqlalchemy import insert, select
+
+from app.models.course import Course, CourseModule, Lesson
+from app.models.user import User
+from app.services.lessons import explode_course_content
+
+CONTENT = {
+    "modules": [
+        {"title": "Basics", "lessons": [{"title": "Intro", "duration": 5, "notes": "Read me"}, {"title": "Setup"}]},
+        {"title": "Next steps", "lessons": [{"title": "Practice", "video_url": "https://example.com/v.mp4"}]},
+    ]
+}
+
+
+def outline(db, course_id):
+    return db.execute(
+        select(CourseModule.title, Lesson.id, Lesson.title, Lesson.duration_minutes, Lesson.body)
+        .join(Lesson, Lesson.module_id == CourseModule.id)
+        .where(CourseModule.course_id == course_id)
+        .order_by(CourseModule.position, Lesson.position)
+    ).all()
+
+
+def test_content_writes_explode_in_the_same_transaction(db):
+    course = Course(title="SEO", slug="seo", content=CONTENT)
+    db.add(course)
+    db.flush()
+
+    # Visible before commit: the lessons are written by the flush that writes the course
+    lessons = outline(db, course.id)
+    assert [(module, title) for module, _, title, _, _ in lessons] == [
+        ("Basics", "Intro"), ("Basics", "Setup"), ("Next steps", "Practice"),
+    ]
+    assert (lessons[0][3], lessons[0][4]) == (5, {"notes": "Read me"})
+    db.commit()
+
+    course.content = {"modules": [{"title": "Basics", "lessons": [{"title": "Intro, revised"}]}]}
+    db.commit()
+    [(_, lesson_id, title, _, _)] = outline(db, course.id)
+    # Ids follow the lesson's position, so links to it survive edits
+    assert (lesson_id, title) == (lessons[0][1], "Intro, revised")
+
+    course.title = "Search engines"
+    course.content = {"modules": []}
+    db.rollback()
+    assert len(outline(db, course.id)) == 1
+
+
+def test_bulk_writes_are_exploded_on_request(db):
+    db.execute(insert(Course), [{"id": "bulk", "title": "Bulk", "slug": "bulk", "content": CONTENT}])
+    db.commit()
+    assert outline(db, "bulk") == []
+
+    assert explode_course_content(db) == (2, 3)
+    assert [title for _, _, title, _, _ in outline(db, "bulk")] == ["Intro", "Setup", "Practice"]
+
+
+def test_malformed_content_is_skipped_without_aborting_the_commit(db, make_user, caplog):
+    course = Course(title="SEO", slug="seo", content={"modules": [
+        "not a module",
+        None,
+        {"title": "Basics", "lessons": [None, {"title": 7, "duration": "five", "video_url": 3}, "Setup"]},
+        {"title": "Extras", "lessons": "not a list"},
+    ]})
+    db.add(course)
+    # An unrelated change in the same transaction still commits
+    user = make_user("author")
+    user.full_name = "Course Author"
+    db.commit()
+
+    # Mistyped columns fall back to their defaults
+    [(module, lesson_id, title, duration, body)] = outline(db, course.id)
+    assert (module, title, duration, body) == ("Basics", "Lesson 2", None, None)
+    assert "module 0 is not an object" in caplog.text
+    assert db.scalar(select(User.full_name).where(User.id == user.id)) == "Course Author"
+
+    # Fixing the bad entries keeps the surviving lesson's id
+    course.content = {"modules": [{}, {}, {"title": "Basics", "lessons": [{}, {"title": "Intro"}]}]}
+    db.commit()
+    assert [row[1] for row in outline(db, course.id)][1] == lesson_id
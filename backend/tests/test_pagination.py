@@ -0,0 +1,86 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import String, insert, literal, select, type_coerce
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db import pagination
+from app.db.pagination import encode_cursor
+from app.models.payment import Transaction
+
+TRANSACTIONS = "/api/v1/payments/transactions"
+TIED_AT = datetime(2026, 1, 5, 9, 30)
+
+
+@pytest.fixture
+def buyer(db, make_user, make_purchase):
+    """A buyer with transactions that share sort values, stored both ways SQLite stores them."""
+    user = make_user("buyer")
+    for n in range(3):
+        # Server default: CURRENT_TIMESTAMP, no microseconds
+        make_purchase(user, amount=100.0 + n)
+    for n in range(5):
+        db.add(Transaction(
+            user_id=user.id, amount=200.0 + n, transaction_type="package_purchase",
+            status="completed", created_at=TIED_AT,
+        ))
+    for n in range(3):
+        # The same instant as text without microseconds, as a server default writes it
+        db.execute(insert(Transaction).values(
+            id=f"legacy-{n}", user_id=user.id, amount=300.0 + n, transaction_type="package_purchase",
+            status="completed", created_at=type_coerce(literal(TIED_AT.strftime("%Y-%m-%d %H:%M:%S")), String),
+        ))
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+
+
+async def walk(client, headers, limit):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(TRANSACTIONS, params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4])
+async def test_pages_with_tied_sort_values_skip_and_repeat_nothing(db, client, buyer, limit):
+    expected = db.scalars(
+        select(Transaction.id).order_by(type_coerce(Transaction.created_at, String).desc(), Transaction.id.desc())
+    ).all()
+    assert len(expected) == 11
+
+    assert await walk(client, buyer, limit) == expected
+
+
+async def test_tampered_and_forged_cursors_are_rejected(client, buyer, monkeypatch):
+    page = (await client.get(TRANSACTIONS, params={"limit": 2}, headers=buyer)).json()
+    cursor = page["next_cursor"]
+
+    raw = bytearray(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    raw[-3] ^= 1
+    tampered = base64.urlsafe_b64encode(bytes(raw)).rstrip(b"=").decode()
+
+    payload = json.dumps(["2999-01-01 00:00:00", "zzz"]).encode()
+    unsigned = base64.urlsafe_b64encode(b"\0" * 12 + payload).rstrip(b"=").decode()
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "another-deployment")
+    forged = encode_cursor("2999-01-01 00:00:00", "zzz")
+    monkeypatch.undo()
+    # Correctly signed, but not a (sort value, id) pair
+    malformed = base64.urlsafe_b64encode(
+        pagination._sign(b'{"a":1}') + b'{"a":1}'
+    ).rstrip(b"=").decode()
+
+    for bad in (tampered, unsigned, forged, malformed, "not-a-cursor", "%%%"):
+        response = await client.get(TRANSACTIONS, params={"cursor": bad}, headers=buyer)
+        assert response.status_code == 400, bad
+        assert response.json() == {"detail": "Invalid pagination cursor"}
+    assert (await client.get(TRANSACTIONS, params={"cursor": cursor}, headers=buyer)).status_code == 200
@@ -0,0 +1,129 @@
+import csv
+import io
+import threading
+from collections import defaultdict
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.base import SessionLocal
+from app.models.payment import Commission, PayoutBatch
+from app.services import payouts
+from app.services.commissions import settle_transactions, transition_commissions
+from app.services.payouts import create_payout_batch, stream_payout
+
+AMOUNTS = [2999.0, 4999.0, 9999.0, 1234.5, 2999.0, 777.0]
+
+
+@pytest.fixture
+def approved(db, make_user, make_purchase):
+    """Approved commissions for two earners: a direct referrer and the referrer's own upline."""
+    top = make_user("top")
+    referrer = make_user("referrer", referrer=top)
+    for n, amount in enumerate(AMOUNTS):
+        make_purchase(make_user(f"buyer{n}", referrer=referrer), amount=amount)
+    settle_transactions(db)
+    transition_commissions(db, "approved")
+    db.commit()
+    return db.scalar(select(func.count()).select_from(Commission))
+
+
+def batch_ids(db):
+    db.expire_all()
+    return db.scalars(select(Commission.payout_batch_id)).all()
+
+
+def statuses(db):
+    db.expire_all()
+    return set(db.scalars(select(Commission.status)))
+
+
+def test_chunked_claims_never_overlap(db, approved, make_user, make_purchase):
+    first = create_payout_batch(db, chunk_size=3)
+    assert batch_ids(db) == [first.id] * approved
+    # Nothing is left for a second batch
+    assert create_payout_batch(db, chunk_size=3).id not in batch_ids(db)
+
+    # New commissions go to the next batch only
+    make_purchase(make_user("late", referrer=make_user("late-referrer")))
+    settle_transactions(db)
+    transition_commissions(db, "approved")
+    db.commit()
+    second = create_payout_batch(db, chunk_size=1)
+    ids = batch_ids(db)
+    assert (ids.count(first.id), ids.count(second.id)) == (approved, len(ids) - approved)
+
+
+def test_concurrent_claims_never_overlap(db, approved):
+    claimed = []
+
+    def claim():
+        session = SessionLocal()
+        try:
+            claimed.append(create_payout_batch(session, chunk_size=1).id)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=claim) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = batch_ids(db)
+    assert None not in ids and set(ids) <= set(claimed)
+    assert len(ids) == approved
+
+
+def test_csv_totals_match_the_ledger(db, approved):
+    batch = create_payout_batch(db)
+    output = "".join(stream_payout(SessionLocal, batch.id))
+
+    rows = list(csv.DictReader(io.StringIO(output)))
+    exported = {row["user_id"]: (int(row["commission_count"]), float(row["amount"])) for row in rows}
+    ledger = defaultdict(lambda: [0, 0.0])
+    for user_id, amount in db.execute(select(Commission.user_id, Commission.amount)):
+        ledger[user_id][0] += 1
+        ledger[user_id][1] += amount
+    assert exported == {user_id: (count, round(amount, 2)) for user_id, (count, amount) in ledger.items()}
+
+    db.expire_all()
+    batch = db.get(PayoutBatch, batch.id)
+    assert (batch.status, batch.earner_count, batch.commission_count) == ("completed", 2, approved)
+    assert batch.total_amount == round(sum(amount for _, amount in exported.values()), 2)
+    # Exporting a completed batch again gives the same file
+    assert "".join(stream_payout(SessionLocal, batch.id)) == output
+
+
+def test_paid_only_after_the_stream_finishes(db, approved, monkeypatch):
+    monkeypatch.setattr(payouts, "LINES_PER_WRITE", 1)
+    batch = create_payout_batch(db)
+    stream = stream_payout(SessionLocal, batch.id, "ndjson")
+
+    next(stream)
+    assert statuses(db) == {"approved"}
+    rest = list(stream)
+    assert len(rest) == 1
+    assert statuses(db) == {"paid"}
+    db.expire_all()
+    assert db.get(PayoutBatch, batch.id).status == "completed"
+
+
+def test_interrupted_stream_releases_its_commissions(db, approved, monkeypatch):
+    monkeypatch.setattr(payouts, "LINES_PER_WRITE", 1)
+    batch = create_payout_batch(db)
+    stream = stream_payout(SessionLocal, batch.id)
+
+    next(stream)
+    # The client went away halfway through the file
+    stream.close()
+
+    assert statuses(db) == {"approved"}
+    assert batch_ids(db) == [None] * approved
+    db.expire_all()
+    assert db.get(PayoutBatch, batch.id).status == "released"
+
+    retry = create_payout_batch(db)
+    assert batch_ids(db) == [retry.id] * approved
+    list(stream_payout(SessionLocal, retry.id))
+    assert statuses(db) == {"paid"}
@@ -0,0 +1,83 @@
+import uuid
+
+from sqlalchemy import event, func, select
+
+from app.db.base import SessionLocal
+from app.models.counter import Counter
+from app.models.payment import Commission
+from app.models.user import User
+from app.services.commissions import settle_transactions, transition_commissions
+from app.services.platform_stats import (
+    PENDING_COMMISSIONS_PAISE,
+    TOTAL_USERS,
+    PlatformDelta,
+    paise,
+    reconcile_counters,
+    signups_counter,
+)
+
+
+def counter(db, name):
+    db.expire_all()
+    return db.scalar(select(Counter.value).where(Counter.name == name))
+
+
+def test_pending_commissions_add_up_in_paise(db, make_user, make_purchase):
+    referrer = make_user("referrer", referrer=make_user("top"))
+    # Ten percent of these has a third decimal place, rounded once per commission
+    for n, amount in enumerate([999.99, 333.33, 0.35, 1234.57]):
+        make_purchase(make_user(f"buyer{n}", referrer=referrer), amount=amount)
+    settle_transactions(db)
+
+    amounts = db.scalars(select(Commission.amount)).all()
+    assert counter(db, PENDING_COMMISSIONS_PAISE) == sum(paise(amount) for amount in amounts)
+    drifted = {row["counter"] for row in reconcile_counters(db, dry_run=True).drifted}
+    assert PENDING_COMMISSIONS_PAISE not in drifted
+
+    approved = db.scalars(select(Commission.id).order_by(Commission.amount).limit(3)).all()
+    transition_commissions(db, "approved", commission_ids=approved)
+    db.commit()
+    remaining = db.scalars(select(Commission.amount).where(Commission.status == "pending")).all()
+    assert counter(db, PENDING_COMMISSIONS_PAISE) == sum(paise(amount) for amount in remaining)
+
+
+def test_reconcile_keeps_deltas_written_while_it_runs(db, make_user):
+    # Users created without record_signup leave the user counters behind
+    for n in range(3):
+        make_user(f"user{n}")
+    assert counter(db, TOTAL_USERS) is None
+
+    signed_up = []
+
+    def signup_in_between(orm_execute_state):
+        # Runs just before the reconciler's first correcting write, after its read
+        if (orm_execute_state.is_update or orm_execute_state.is_insert) and not signed_up:
+            signed_up.append(True)
+            with SessionLocal() as other:
+                other.add(User(
+                    email="late@example.com",
+                    hashed_password="not-a-hash",
+                    full_name="Late",
+                    referral_code=uuid.uuid4().hex[:8].upper(),
+                ))
+                signup = PlatformDelta()
+                signup.add(TOTAL_USERS)
+                signup.add(signups_counter())
+                signup.apply(other)
+                other.commit()
+
+    event.listen(db, "do_orm_execute", signup_in_between)
+    report = reconcile_counters(db)
+    event.remove(db, "do_orm_execute", signup_in_between)
+
+    # The counter the signup touched was read as missing, then found holding 1:
+    # the reconciler leaves it rather than writing the stale 3 over it
+    assert report.skipped >= 1
+    assert {row["counter"] for row in report.drifted} >= {TOTAL_USERS, signups_counter()}
+    assert counter(db, TOTAL_USERS) == 1
+
+    # The next run sees all four users
+    assert reconcile_counters(db).skipped == 0
+    assert counter(db, TOTAL_USERS) == 4 == db.scalar(select(func.count()).select_from(User))
+    assert counter(db, signups_counter()) == 4
+    assert reconcile_counters(db, dry_run=True).drifted == []
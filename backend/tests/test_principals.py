@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import delete, update
+
+from app.core.principals import PRINCIPALS_VERSION, principal_cache, principal_version
+from app.core.security import create_access_token
+from app.db.base import engine
+from app.models.user import User
+from app.services.counters import increment_statement
+
+ME = "/api/v1/users/me"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    principal_cache.clear()
+    # Check the shared version on every request
+    monkeypatch.setattr(principal_version, "poll_seconds", 0)
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture
+def learner(make_user):
+    user = make_user("learner")
+    return user, {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+
+
+async def test_deactivation_evicts_the_cached_principal(db, client, learner):
+    user, headers = learner
+    assert (await client.get(ME, headers=headers)).status_code == 200
+    assert principal_cache.get(user.email) is not None
+
+    user.is_active = False
+    db.flush()
+    # Not evicted before the change commits
+    assert principal_cache.get(user.email) is not None
+    db.commit()
+    assert principal_cache.get(user.email) is None
+    assert (await client.get(ME, headers=headers)).status_code == 400
+
+
+async def test_package_change_is_seen_at_once(db, client, learner):
+    user, headers = learner
+    assert (await client.get(ME, headers=headers)).json()["package_type"] is None
+
+    user.package_type = "gold"
+    db.commit()
+    assert (await client.get(ME, headers=headers)).json()["package_type"] == "gold"
+
+
+async def test_bulk_updates_clear_every_principal(db, client, learner):
+    user, headers = learner
+    await client.get(ME, headers=headers)
+
+    db.execute(update(User).where(User.id == user.id).values(is_active=False))
+    db.commit()
+    assert len(principal_cache) == 0
+    assert (await client.get(ME, headers=headers)).status_code == 400
+
+
+async def test_core_deletes_clear_every_principal(db, client, learner):
+    user, headers = learner
+    await client.get(ME, headers=headers)
+
+    db.execute(delete(User.__table__).where(User.__table__.c.id == user.id))
+    db.commit()
+    assert len(principal_cache) == 0
+    assert (await client.get(ME, headers=headers)).status_code == 401
+
+
+async def test_changes_by_other_workers_clear_the_cache(db, client, learner):
+    user, headers = learner
+    await client.get(ME, headers=headers)
+    await client.get(ME, headers=headers)
+    assert principal_cache.get(user.email) is not None
+
+    # Another worker deactivated the user: its row and the version move, and
+    # no session event in this process hears of it
+    with engine.begin() as connection:
+        connection.execute(update(User.__table__).where(User.id == user.id).values(is_active=False))
+        connection.execute(increment_statement(), [{"name": PRINCIPALS_VERSION, "value": 1}])
+    assert principal_cache.get(user.email) is not None
+
+    assert (await client.get(ME, headers=headers)).status_code == 400
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.db.base import AsyncSessionLocal, async_engine
+from app.models.counter import Counter
+from app.models.course import Course, CourseEnrollment
+from app.services.platform_stats import COURSES_COMPLETED
+from app.services.progress import ProgressBuffer
+
+START = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def buffers():
+    """Make buffers that flush only when asked, as if on separate workers."""
+    def make() -> ProgressBuffer:
+        return ProgressBuffer(AsyncSessionLocal, interval_ms=60_000, max_entries=1000)
+    yield make
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def enrollment(db, make_user):
+    """A learner and a course, and a reader for the learner's enrollment row."""
+    learner = make_user("learner")
+    course = Course(title="SEO", slug="seo")
+    db.add(course)
+    db.commit()
+
+    def read():
+        row = db.execute(
+            select(CourseEnrollment.progress_percentage, CourseEnrollment.last_accessed_at, CourseEnrollment.completed_at)
+            .where(CourseEnrollment.user_id == learner.id, CourseEnrollment.course_id == course.id)
+        ).one_or_none()
+        completed = db.scalar(select(Counter.value).where(Counter.name == COURSES_COMPLETED))
+        # End the read so the buffers' writes are not blocked behind it
+        db.commit()
+        return row, completed
+    return learner.id, course.id, read
+
+
+def aware(at):
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+
+async def test_progress_never_moves_backwards(buffers, enrollment):
+    user_id, course_id, read = enrollment
+    first, second = buffers(), buffers()
+
+    first.record(user_id, course_id, 60.0, at=START)
+    first.record(user_id, course_id, 40.0, at=START + timedelta(minutes=1))
+    assert await first.flush() == 1
+    (progress, accessed, _), _ = read()
+    assert (progress, aware(accessed)) == (60.0, START + timedelta(minutes=1))
+
+    # A slower worker flushes an older, lower heartbeat afterwards
+    second.record(user_id, course_id, 30.0, at=START)
+    await second.flush()
+    (progress, accessed, _), _ = read()
+    assert (progress, aware(accessed)) == (60.0, START + timedelta(minutes=1))
+
+    first.record(user_id, course_id, 75.0, at=START + timedelta(minutes=2))
+    await first.flush()
+    (progress, accessed, _), _ = read()
+    assert (progress, aware(accessed)) == (75.0, START + timedelta(minutes=2))
+
+
+async def test_a_completion_counts_once(buffers, enrollment):
+    user_id, course_id, read = enrollment
+    first, second = buffers(), buffers()
+
+    first.record(user_id, course_id, 100.0, at=START)
+    first.record(user_id, course_id, 100.0, at=START + timedelta(minutes=1))
+    await first.flush()
+    (progress, _, completed_at), completed = read()
+    assert (progress, aware(completed_at), completed) == (100.0, START, 1)
+
+    # Replayed on this worker and on another one
+    first.record(user_id, course_id, 100.0, at=START + timedelta(minutes=2))
+    second.record(user_id, course_id, 120.0, at=START + timedelta(minutes=3))
+    await first.flush()
+    await second.flush()
+    (progress, _, completed_at), completed = read()
+    assert (progress, aware(completed_at), completed) == (100.0, START, 1)
+
+
+async def test_stop_flushes_pending_heartbeats(buffers, enrollment):
+    user_id, course_id, read = enrollment
+    buffer = buffers()
+    buffer.start()
+    buffer.record(user_id, course_id, 40.0, at=START)
+    assert read() == (None, None)
+
+    await buffer.stop()
+    (progress, _, completed_at), _ = read()
+    assert (progress, completed_at) == (40.0, None)
+    assert buffer.stats()["pending"] == 0
+    assert buffer.stats()["rows_written"] == 1
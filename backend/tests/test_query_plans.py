@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.db.query_plans import check_plans, hot_queries
+from benchmarks.common import DATASET_END, PASSWORD
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_every_hot_query_is_served_by_an_index(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'dataset.db'}"
+    # generate_data.py migrates the empty database to head, then seeds it
+    subprocess.run(
+        [
+            sys.executable, "generate_data.py",
+            "--users", "300",
+            "--seed", "42",
+            "--end", DATASET_END,
+            "--password", PASSWORD,
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+    assert check_plans(database_url, hot_queries(), verbose=False) == []
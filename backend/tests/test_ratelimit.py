@@ -0,0 +1,93 @@
+import hashlib
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.api import deps
+from app.core.ratelimit import MemoryStore, Rate, RateLimiter, SQLiteStore
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+RATE = Rate.parse("3/minute")
+NOW = 1_000_000.0
+
+# Charges one bucket ``hits`` times at a fixed instant and prints how many were allowed
+HITS = """
+import sys
+from app.core.ratelimit import Rate, SQLiteStore
+store = SQLiteStore(sys.argv[1])
+print(sum(not store.hit([("shared", Rate.parse("10/minute"))], 1_000_000.0) for _ in range(int(sys.argv[2]))))
+"""
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemoryStore() if request.param == "memory" else SQLiteStore(str(tmp_path / "buckets.sqlite"))
+    yield store
+    store.close()
+
+
+def test_burst_then_one_request_per_interval(store):
+    limits = [("key", RATE)]
+    assert [store.hit(limits, NOW) for _ in range(RATE.count)] == [0.0] * RATE.count
+    assert store.hit(limits, NOW) == pytest.approx(RATE.interval)
+
+    # One emission interval later there is room for exactly one more
+    assert store.hit(limits, NOW + RATE.interval - 1) == pytest.approx(1)
+    assert store.hit(limits, NOW + RATE.interval) == 0.0
+    assert store.hit(limits, NOW + RATE.interval) == pytest.approx(RATE.interval)
+
+    # A full period refills the whole burst
+    later = NOW + RATE.interval + RATE.period
+    assert [store.hit(limits, later) for _ in range(RATE.count)] == [0.0] * RATE.count
+
+
+def test_a_limited_request_charges_no_bucket(store):
+    tight, loose = ("tight", Rate(1, 60)), ("loose", Rate(2, 60))
+    assert store.hit([tight, loose], NOW) == 0.0
+    assert store.hit([tight, loose], NOW) == pytest.approx(60)
+    # The rejected check left the loose bucket with one request to spare
+    assert store.hit([loose], NOW) == 0.0
+    assert store.hit([loose], NOW) > 0
+
+
+def test_sqlite_buckets_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "buckets.sqlite")
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", HITS, path, "15"], cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(2)
+    ]
+    allowed = [int(worker.communicate()[0]) for worker in workers]
+    assert all(worker.returncode == 0 for worker in workers)
+    # Thirty attempts from two processes share one burst of ten
+    assert sum(allowed) == 10
+
+    store = SQLiteStore(path)
+    try:
+        assert store.hit([("shared", Rate.parse("10/minute"))], NOW) == pytest.approx(6)
+    finally:
+        store.close()
+
+
+async def test_login_attempts_are_limited_per_hashed_email(client, monkeypatch):
+    store = MemoryStore()
+    limiter = RateLimiter(store)
+    monkeypatch.setattr(deps, "rate_limiter", limiter)
+    per_email = deps.LOGIN_RATE_PER_EMAIL
+
+    for n in range(per_email.count):
+        # Case and surrounding spaces do not make a new account
+        username = " Learner@Example.com " if n % 2 else "learner@example.com"
+        response = await client.post("/api/v1/auth/login", data={"username": username, "password": "wrong"})
+        assert response.status_code != 429
+    response = await client.post("/api/v1/auth/login", data={"username": "LEARNER@example.com", "password": "wrong"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    limiter.close()
+
+    account = hashlib.sha256(b"learner@example.com").hexdigest()[:32]
+    assert f"login:email:{account}" in store._tats
+    assert not any("@" in key for key in store._tats)
@@ -0,0 +1,43 @@
+from sqlalchemy import select
+
+from app.models.referral import ReferralPath
+from app.services.referrals import backfill_referral_paths, uplines_query
+
+
+def closure(db):
+    db.expire_all()
+    return set(db.execute(select(ReferralPath.ancestor_id, ReferralPath.descendant_id, ReferralPath.depth)))
+
+
+def test_backfill_matches_the_incremental_closure(db, make_user):
+    # Four levels under root, a second branch, and a tree of its own
+    root = make_user("root")
+    level1 = make_user("level1", referrer=root)
+    level2 = make_user("level2", referrer=level1)
+    level3 = make_user("level3", referrer=level2)
+    level4 = make_user("level4", referrer=level3)
+    sibling = make_user("sibling", referrer=level1)
+    make_user("nephew", referrer=sibling)
+    make_user("loner")
+    incremental = closure(db)
+
+    assert backfill_referral_paths(db) == len(incremental)
+    assert closure(db) == incremental
+
+    # Spot-check the deepest user's uplines
+    uplines = db.execute(uplines_query(level4.id, 10)).all()
+    assert uplines == [(level3.id, 1), (level2.id, 2), (level1.id, 3), (root.id, 4)]
+
+
+def test_backfill_repairs_missing_and_stale_rows(db, make_user):
+    root = make_user("root")
+    middle = make_user("middle", referrer=root)
+    leaf = make_user("leaf", referrer=middle)
+    expected = closure(db)
+
+    db.query(ReferralPath).filter(ReferralPath.descendant_id == leaf.id).delete(synchronize_session=False)
+    db.add(ReferralPath(ancestor_id=leaf.id, descendant_id=root.id, depth=7))
+    db.commit()
+
+    backfill_referral_paths(db)
+    assert closure(db) == expected
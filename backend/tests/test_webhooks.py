@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.payment import Commission, Transaction
+from app.models.webhook import RazorpayEvent
+from app.services.commissions import settle_transactions
+from app.services.razorpay import LocalRazorpay
+from app.services.webhooks import claim_events, drain_events, process_event
+
+WEBHOOK_URL = "/api/v1/webhooks/razorpay"
+PRICE = 2999.0
+
+
+@pytest.fixture
+def razorpay():
+    return LocalRazorpay(settings.RAZORPAY_WEBHOOK_SECRET)
+
+
+@pytest.fixture
+def order(db, make_user, razorpay):
+    """A pending gold purchase by a buyer two levels below the top of a referral chain."""
+    top = make_user("top")
+    referrer = make_user("referrer", referrer=top)
+    buyer = make_user("buyer", referrer=referrer)
+    order = razorpay.create_order(PRICE, receipt=buyer.id)
+    db.add(Transaction(
+        user_id=buyer.id,
+        amount=PRICE,
+        transaction_type="package_purchase",
+        status="pending",
+        razorpay_order_id=order["id"],
+        package_type="gold",
+    ))
+    db.commit()
+    return order
+
+
+async def deliver(client, delivery):
+    return await client.post(WEBHOOK_URL, content=delivery.body, headers=delivery.headers)
+
+
+def order_transaction(db, order) -> Transaction:
+    db.expire_all()
+    return db.scalar(select(Transaction).where(Transaction.razorpay_order_id == order["id"]))
+
+
+async def test_rejects_bad_signatures(db, client, razorpay, order):
+    delivery = razorpay.event("payment.captured", order)
+    forged = LocalRazorpay("another-secret").event("payment.captured", order)
+    unsigned = {key: value for key, value in delivery.headers.items() if key != "X-Razorpay-Signature"}
+
+    assert (await deliver(client, forged)).status_code == 400
+    assert (await client.post(WEBHOOK_URL, content=delivery.body, headers=unsigned)).status_code == 400
+    tampered = delivery.body.replace(str(order["amount"]).encode(), b"100")
+    assert (await client.post(WEBHOOK_URL, content=tampered, headers=delivery.headers)).status_code == 400
+    assert db.scalar(select(func.count()).select_from(RazorpayEvent)) == 0
+
+
+async def test_redelivered_event_is_applied_once(db, client, razorpay, order):
+    delivery = razorpay.event("payment.captured", order)
+    for _ in range(3):
+        assert (await deliver(client, delivery)).status_code == 200
+
+    assert db.scalar(select(func.count()).select_from(RazorpayEvent)) == 1
+    assert drain_events(db) == {"processed": 1}
+    assert drain_events(db) == {}
+
+
+async def test_events_of_an_order_are_applied_in_arrival_order(db, client, razorpay, order):
+    failed = razorpay.event("payment.failed", order, error="Card declined")
+    captured = razorpay.event("payment.captured", order)
+    await deliver(client, failed)
+    await deliver(client, captured)
+
+    claimed = claim_events(db, 10)
+    assert [event_id for event_id, _ in claimed] == [failed.event_id, captured.event_id]
+
+    assert process_event(db, failed.event_id) == "processed"
+    assert order_transaction(db, order).status == "failed"
+    # The buyer retried the same order and paid
+    assert process_event(db, captured.event_id) == "processed"
+    assert order_transaction(db, order).status == "completed"
+
+    # A late failure never undoes a capture
+    await deliver(client, razorpay.event("payment.failed", order))
+    assert drain_events(db) == {"processed": 1}
+    assert order_transaction(db, order).status == "completed"
+
+
+async def test_stale_claim_is_claimed_again(db, client, razorpay, order):
+    delivery = razorpay.event("payment.captured", order)
+    await deliver(client, delivery)
+    assert [event_id for event_id, _ in claim_events(db, 10)] == [delivery.event_id]
+    # Claimed by a worker that is still within its claim timeout
+    assert claim_events(db, 10) == []
+
+    # ... and now one that died holding it
+    expired = datetime.now(timezone.utc) - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT_SECONDS + 1)
+    db.execute(update(RazorpayEvent).values(claimed_at=expired))
+    db.commit()
+    assert [event_id for event_id, _ in claim_events(db, 10)] == [delivery.event_id]
+    assert process_event(db, delivery.event_id) == "processed"
+
+
+async def test_order_with_an_event_in_flight_is_not_claimed(db, client, razorpay, order):
+    failed = razorpay.event("payment.failed", order, error="Card declined")
+    captured = razorpay.event("payment.captured", order)
+    await deliver(client, failed)
+    # One process claims the order's first event ...
+    assert [event_id for event_id, _ in claim_events(db, 10)] == [failed.event_id]
+
+    # ... so another process leaves the next one until it is applied
+    await deliver(client, captured)
+    with SessionLocal() as other:
+        assert claim_events(other, 10) == []
+    assert process_event(db, failed.event_id) == "processed"
+    with SessionLocal() as other:
+        assert [event_id for event_id, _ in claim_events(other, 10)] == [captured.event_id]
+
+
+async def test_stale_claim_does_not_hold_back_its_order(db, client, razorpay, order):
+    failed = razorpay.event("payment.failed", order, error="Card declined")
+    captured = razorpay.event("payment.captured", order)
+    await deliver(client, failed)
+    claim_events(db, 10)
+    await deliver(client, captured)
+
+    # The worker holding the first event died
+    expired = datetime.now(timezone.utc) - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT_SECONDS + 1)
+    db.execute(update(RazorpayEvent).where(RazorpayEvent.id == failed.event_id).values(claimed_at=expired))
+    db.commit()
+    assert [event_id for event_id, _ in claim_events(db, 10)] == [failed.event_id, captured.event_id]
+
+
+async def test_capture_completes_order_and_settles_commissions_once(db, client, razorpay, order):
+    captured = razorpay.event("payment.captured", order)
+    for delivery in (captured, razorpay.event("order.paid", order), captured):
+        await deliver(client, delivery)
+    assert drain_events(db) == {"processed": 2}
+
+    transaction = order_transaction(db, order)
+    assert transaction.status == "completed"
+    assert transaction.user.package_type == "gold"
+    commissions = db.execute(
+        select(Commission.commission_type, Commission.amount)
+        .where(Commission.source_transaction_id == transaction.id)
+        .order_by(Commission.amount.desc())
+    ).all()
+    assert commissions == [("direct", 299.9), ("indirect", 59.98)]
+
+    # Settling again, or replaying the capture, pays nobody twice
+    assert settle_transactions(db).commissions == 0
+    await deliver(client, razorpay.event("payment.captured", order))
+    assert drain_events(db) == {"processed": 1}
+    assert db.scalar(select(func.count()).select_from(Commission)) == 2
+
+
+def test_an_order_belongs_to_one_transaction(db, order, make_user):
+    other = make_user("other")
+    db.add(Transaction(
+        user_id=other.id, amount=PRICE, transaction_type="package_purchase",
+        status="pending", razorpay_order_id=order["id"],
+    ))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    # Transactions without an order are not affected
+    for _ in range(2):
+        db.add(Transaction(user_id=other.id, amount=10.0, transaction_type="commission", status="completed"))
+    db.commit()